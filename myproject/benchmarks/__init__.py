@@ -0,0 +1,8 @@
+"""
+Performance benchmarks of the project.
+
+Each module is a script run from the `myproject` directory, for example
+`python -m benchmarks.list_serialization`. The benchmarks use the database
+configured in the settings, creating a separate test database for the data
+they seed.
+"""
@@ -0,0 +1,148 @@
+"""
+Throughput of the sync task views under gunicorn vs the async ones.
+
+Usage: python -m benchmarks.async_views [--users N] [--tasks M]
+           [--requests R] [--concurrency C] [--workers W]
+
+Seeds N users with M tasks each in a fresh test database and sends R
+requests per scenario from C concurrent clients to:
+
+- wsgi: the sync views under gunicorn, as deployed by the Dockerfile,
+- asgi: the same sync views under uvicorn, run in a thread each,
+- asgi-async: the async views of /api/tasks/async/ under uvicorn.
+
+Reports the requests per second and the p95 latency of every setup. The
+ASGI setups need uvicorn, which is not a dependency of the project: they
+are skipped when it is not installed.
+"""
+import argparse
+import random
+import sys
+from importlib.util import find_spec
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple
+
+from benchmarks.load_test import (
+    Request,
+    VirtualUser,
+    gunicorn,
+    load,
+    seed_users,
+    send,
+    serve,
+)
+from benchmarks.utils import fake, test_database
+
+Builder = Callable[[VirtualUser, str], Request]
+
+
+def list_request(user: VirtualUser, prefix: str) -> Request:
+    return 'GET', f'{prefix}?page={random.randint(1, 5)}', None
+
+
+def retrieve_request(user: VirtualUser, prefix: str) -> Request:
+    return 'GET', f'{prefix}{random.choice(user.task_ids)}/', None
+
+
+def create_request(user: VirtualUser, prefix: str) -> Request:
+    return 'POST', prefix, {
+        'title': fake.sentence(nb_words=4)[:64],
+        'description': fake.paragraph(nb_sentences=3),
+    }
+
+
+def update_request(user: VirtualUser, prefix: str) -> Request:
+    return 'PATCH', f'{prefix}{random.choice(user.task_ids)}/', {
+        'title': fake.sentence(nb_words=4)[:64],
+    }
+
+
+def mark_completed_request(user: VirtualUser, prefix: str) -> Request:
+    pk = random.choice(user.task_ids)
+    return 'POST', f'{prefix}{pk}/mark_completed/', None
+
+
+SCENARIOS: Dict[str, Builder] = {
+    'list': list_request,
+    'retrieve': retrieve_request,
+    'create': create_request,
+    'update': update_request,
+    'mark_completed': mark_completed_request,
+}
+
+
+def uvicorn(database: str, workers: int) -> ContextManager[int]:
+    """Serve the ASGI application from the database."""
+    return serve(database, lambda port: [
+        'uvicorn', 'mysite.asgi:application',
+        '--host', '127.0.0.1', '--port', str(port),
+        '--workers', str(workers), '--log-level', 'warning',
+    ])
+
+
+# name: (server, task API prefix)
+SETUPS: Dict[str, Tuple[Callable[[str, int], ContextManager[int]], str]] = {
+    'wsgi': (gunicorn, '/api/tasks/'),
+    'asgi': (uvicorn, '/api/tasks/'),
+    'asgi-async': (uvicorn, '/api/tasks/async/'),
+}
+
+
+def run_setup(
+    name: str,
+    database: str,
+    users: List[VirtualUser],
+    args: argparse.Namespace,
+) -> Dict[str, Dict[str, float]]:
+    server, prefix = SETUPS[name]
+    results = {}
+    with server(database, args.workers) as port:
+        for index in range(args.workers * 4):
+            user = users[index % len(users)]
+            send(port, user.token, list_request(user, prefix))
+        for scenario, build in SCENARIOS.items():
+            prepared: List[Tuple[Optional[str], Request]] = [
+                (users[index % len(users)].token,
+                 build(users[index % len(users)], prefix))
+                for index in range(args.requests)
+            ]
+            results[scenario] = load(port, prepared, args.concurrency)
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, Dict[str, float]]]) -> None:
+    print(f'{"scenario":>15}' + ''.join(
+        f' {name + " req/s":>17} {"p95 ms":>7}' for name in results
+    ))
+    for scenario in SCENARIOS:
+        print(f'{scenario:>15}' + ''.join(
+            f' {setup[scenario]["rps"]:>17.1f} {setup[scenario]["p95"]:>7.1f}'
+            for setup in results.values()
+        ))
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--setup', action='append', choices=SETUPS)
+    args = parser.parse_args(argv)
+    setups = args.setup or list(SETUPS)
+    if find_spec('uvicorn') is None:
+        print('uvicorn is not installed, skipping the ASGI setups')
+        setups = [name for name in setups if SETUPS[name][0] is not uvicorn]
+    with test_database() as database:
+        users, _ = seed_users(args.users, args.tasks)
+        virtual_users = [VirtualUser(user) for user in users]
+        results = {
+            name: run_setup(name, database, virtual_users, args)
+            for name in setups
+        }
+    print_results(results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
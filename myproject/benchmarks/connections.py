@@ -0,0 +1,112 @@
+"""
+Cost of opening a database connection per request.
+
+Usage: python -m benchmarks.connections [--users N] [--tasks M]
+           [--requests R] [--concurrency C] [--workers W] [--repeat K]
+
+Times opening a connection to PostgreSQL alone, then serves the task API
+with gunicorn on a fresh test database:
+
+- per-request: POSTGRES_CONN_MAX_AGE=0, a new connection for every request,
+- persistent: the default POSTGRES_CONN_MAX_AGE, with health checks,
+- pool: a psycopg 3 pool (POSTGRES_POOL_MAX_SIZE), skipped when psycopg 3
+  and psycopg_pool are not installed,
+
+and reports the latency and throughput of retrieving and listing tasks.
+Exits with an error when the persistent connections are not faster.
+"""
+import argparse
+import sys
+from importlib.util import find_spec
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.load_test import (
+    Request,
+    VirtualUser,
+    gunicorn,
+    list_request,
+    load,
+    seed_users,
+    send,
+)
+from benchmarks.utils import measure, test_database
+from django.db import connection
+
+
+def retrieve_request(user: VirtualUser) -> Request:
+    return 'GET', f'/api/tasks/{user.task_ids[0]}/', None
+
+
+# name: environment of the server
+SETUPS: Dict[str, Dict[str, str]] = {
+    'per-request': {'POSTGRES_CONN_MAX_AGE': '0'},
+    'persistent': {},
+    'pool': {'POSTGRES_POOL_MAX_SIZE': '4'},
+}
+
+
+def connect() -> None:
+    connection.close()
+    connection.ensure_connection()
+
+
+def run_setup(
+    name: str,
+    database: str,
+    users: List[VirtualUser],
+    args: argparse.Namespace,
+) -> Dict[str, Dict[str, float]]:
+    results = {}
+    with gunicorn(database, args.workers, **SETUPS[name]) as port:
+        for index in range(args.workers * 4):
+            send(port, users[0].token, retrieve_request(users[0]))
+        for scenario, build in [
+            ('retrieve', retrieve_request), ('list', list_request),
+        ]:
+            prepared: List[Tuple[Optional[str], Request]] = [
+                (users[index % len(users)].token,
+                 build(users[index % len(users)]))
+                for index in range(args.requests)
+            ]
+            results[scenario] = load(port, prepared, args.concurrency)
+    return results
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+    setups = list(SETUPS)
+    if find_spec('psycopg') is None or find_spec('psycopg_pool') is None:
+        print('psycopg 3 with psycopg_pool is not installed, skipping pool')
+        setups.remove('pool')
+    timings = measure(connect, repeat=args.repeat)
+    print(f'Opening a connection: {timings["median"]:.2f} ms median, '
+          f'{timings["best"]:.2f} ms best\n')
+    with test_database() as database:
+        users, _ = seed_users(args.users, args.tasks)
+        virtual_users = [VirtualUser(user) for user in users]
+        results = {
+            name: run_setup(name, database, virtual_users, args)
+            for name in setups
+        }
+    print(f'{"setup":>12} {"scenario":>9} {"p50 ms":>8} {"p95 ms":>8} '
+          f'{"req/s":>8}')
+    for name, setup in results.items():
+        for scenario, result in setup.items():
+            print(f'{name:>12} {scenario:>9} {result["p50"]:>8.1f} '
+                  f'{result["p95"]:>8.1f} {result["rps"]:>8.1f}')
+    return 0 if all(
+        results['persistent'][scenario]['p50']
+        < results['per-request'][scenario]['p50']
+        for scenario in results['persistent']
+    ) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
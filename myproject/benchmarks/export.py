@@ -0,0 +1,68 @@
+"""
+Memory and speed of the streaming task export.
+
+Usage: python -m benchmarks.export [--sizes N,M,...] [--format ndjson|csv]
+
+Grows the tasks of a fresh test database to each size and exports them all
+in-process, consuming the stream as a client would. Reports the time, the
+rows per second and the peak Python memory of every export, and exits with
+an error when the peak memory grows with the number of tasks.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from benchmarks.utils import User, seed_tasks, test_database
+from django.test import Client
+from tasks.models import Task
+from users.serializers import ClaimsTokenObtainPairSerializer
+
+# Allowed growth of the peak memory from the smallest to the largest export
+MEMORY_GROWTH_FACTOR = 2
+
+
+def run_export(client: Client, format: str) -> Dict[str, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    response: Any = client.get('/api/tasks/all/export/', {'format': format})
+    size = sum(len(chunk) for chunk in response.streaming_content)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': elapsed, 'bytes': size, 'peak': peak}
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--format', choices=['ndjson', 'csv'],
+                        default='ndjson')
+    args = parser.parse_args(argv)
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    results: Dict[int, Dict[str, float]] = {}
+    with test_database():
+        staff = User.objects.create_superuser(username='benchmark-staff')
+        token = ClaimsTokenObtainPairSerializer.get_token(staff)
+        client = Client(HTTP_HOST='127.0.0.1', headers={
+            'Authorization': f'Bearer {getattr(token, "access_token")}',
+        })
+        for size in sizes:
+            seed_tasks(staff, size - Task.objects.count())
+            run_export(client, args.format)  # warm up
+            results[size] = run_export(client, args.format)
+    print(f'{"tasks":>10} {"seconds":>8} {"rows/s":>9} {"MB sent":>8} '
+          f'{"peak MB":>8}')
+    for size, result in results.items():
+        print(f'{size:>10} {result["seconds"]:>8.2f} '
+              f'{size / result["seconds"]:>9.0f} '
+              f'{result["bytes"] / 2 ** 20:>8.1f} '
+              f'{result["peak"] / 2 ** 20:>8.1f}')
+    smallest, largest = results[sizes[0]], results[sizes[-1]]
+    return 0 if largest['peak'] <= smallest['peak'] * MEMORY_GROWTH_FACTOR \
+        else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,74 @@
+"""
+Throughput of the `import_tasks` command.
+
+Usage: python -m benchmarks.import_tasks [--rows N] [--workers W,...]
+
+Writes an NDJSON file of N tasks and imports it into a fresh test database
+with COPY and with bulk_create(), for every number of worker processes.
+Reports the rows per second of every run.
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from typing import List
+
+from benchmarks.utils import User, fake, test_database
+from django.core.management import call_command
+from django.test import override_settings
+from tasks.models import Task
+
+
+def write_file(path: Path, rows: int, user_ids: List[int]) -> None:
+    sentences = [fake.sentence(nb_words=4)[:64] for _ in range(100)]
+    paragraphs = [fake.paragraph(nb_sentences=3) for _ in range(100)]
+    with path.open('w') as file:
+        for index in range(rows):
+            file.write(json.dumps({
+                'title': sentences[index % 100],
+                'description': paragraphs[index % 97],
+                'status': ['new', 'in_progress', 'completed'][index % 3],
+                'user': user_ids[index % len(user_ids)],
+            }) + '\n')
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--workers', default='1,2')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args(argv)
+    print(f'{"method":>8} {"workers":>8} {"seconds":>8} {"rows/s":>9}')
+    with test_database(), tempfile.TemporaryDirectory() as directory, \
+            override_settings(CACHES={'default': {
+                # the command refuses the cache local to the process
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': Path(directory) / 'cache',
+            }}):
+        users = User.objects.bulk_create(
+            User(username=f'importer{index}') for index in range(10)
+        )
+        path = Path(directory) / 'tasks.ndjson'
+        write_file(path, args.rows, [user.pk for user in users])
+        for method in ['copy', 'bulk']:
+            for workers in map(int, args.workers.split(',')):
+                start = time.perf_counter()
+                call_command(
+                    'import_tasks', str(path), method=method,
+                    workers=workers, chunk_size=args.chunk_size,
+                    stdout=StringIO(),
+                )
+                elapsed = time.perf_counter() - start
+                assert Task.objects.count() == args.rows
+                Task.objects.all().delete()
+                print(f'{method:>8} {workers:>8} {elapsed:>8.2f} '
+                      f'{args.rows / elapsed:>9.0f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
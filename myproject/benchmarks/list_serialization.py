@@ -0,0 +1,81 @@
+"""
+Compare TaskSerializer with the TaskRowSerializer fast path of the lists.
+
+Usage: python -m benchmarks.list_serialization [--repeat N]
+
+For page sizes of 10, 100 and 1000 tasks it times the serialization alone
+and the whole list path (query and serialization), and exits with an error
+when the fast path is not faster.
+"""
+import argparse
+import sys
+from typing import Any, Dict, List
+
+from benchmarks.utils import User, measure, seed_tasks, test_database
+from tasks.models import Task
+from tasks.serializers import TaskRowSerializer, TaskSerializer
+
+PAGE_SIZES = [10, 100, 1000]
+
+
+def serializer_path(size: int) -> Any:
+    tasks = Task.objects.select_related('user').order_by('-pk')[:size]
+    return TaskSerializer(tasks, many=True).data
+
+
+def fast_path(size: int) -> Any:
+    serializer = TaskRowSerializer()
+    rows = serializer.get_rows(Task.objects.order_by('-pk'))[:size]
+    return serializer.serialize(rows)
+
+
+def benchmark_page(size: int, repeat: int) -> Dict[str, float]:
+    tasks = list(
+        Task.objects.select_related('user').order_by('-pk')[:size]
+    )
+    row_serializer = TaskRowSerializer()
+    rows = list(row_serializer.get_rows(Task.objects.order_by('-pk'))[:size])
+    assert list(TaskSerializer(tasks, many=True).data) \
+        == row_serializer.serialize(rows), 'The outputs differ'
+    return {
+        'serialize': measure(
+            lambda: TaskSerializer(tasks, many=True).data, repeat,
+        )['median'],
+        'serialize_fast': measure(
+            lambda: row_serializer.serialize(rows), repeat,
+        )['median'],
+        'list': measure(lambda: serializer_path(size), repeat)['median'],
+        'list_fast': measure(lambda: fast_path(size), repeat)['median'],
+    }
+
+
+def print_results(results: Dict[int, Dict[str, float]]) -> bool:
+    print(f'{"page":>6} {"step":>10} {"serializer ms":>14} '
+          f'{"fast path ms":>13} {"speedup":>8}')
+    faster = True
+    for size, timings in results.items():
+        for step in ('serialize', 'list'):
+            slow, fast = timings[step], timings[f'{step}_fast']
+            faster = faster and fast < slow
+            print(f'{size:>6} {step:>10} {slow:>14.3f} {fast:>13.3f} '
+                  f'{slow / fast:>7.1f}x')
+    return faster
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+    with test_database():
+        user = User.objects.create_user(
+            username='benchmark', first_name='Bench', last_name='Mark',
+        )
+        seed_tasks(user, max(PAGE_SIZES))
+        results = {
+            size: benchmark_page(size, args.repeat) for size in PAGE_SIZES
+        }
+    return 0 if print_results(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
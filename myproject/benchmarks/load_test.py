@@ -0,0 +1,342 @@
+"""
+Load test of the task API served by gunicorn.
+
+Usage: python -m benchmarks.load_test [--users N] [--tasks M]
+           [--requests R] [--concurrency C] [--workers W]
+           [--baseline PATH] [--save-baseline] [--tolerance PCT]
+
+Seeds N users with M tasks each and a staff user in a fresh test database,
+starts gunicorn on it and sends R requests per scenario from C concurrent
+clients. Reports the p50/p95/p99 latency, the requests per second and the
+database queries per request of every scenario, then compares them with
+the saved baseline and exits with an error on a regression.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.client import HTTPConnection
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from benchmarks.utils import User, fake, seed_tasks, test_database
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from tasks.models import Task
+from users.models import User as UserType
+from users.serializers import ClaimsTokenObtainPairSerializer
+
+PASSWORD = 'benchmark-password'
+BASELINE_PATH = Path(__file__).parent / 'baselines' / 'load_test.json'
+
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+class VirtualUser:
+    """User of the load test with its access token and task ids."""
+
+    def __init__(self, user: UserType) -> None:
+        self.username = user.username
+        token = ClaimsTokenObtainPairSerializer.get_token(user)
+        self.token = str(getattr(token, 'access_token'))
+        self.task_ids = list(
+            Task.objects.filter(user=user).values_list('pk', flat=True)
+        )
+
+
+def token_request(user: VirtualUser) -> Request:
+    return 'POST', '/api/token/', {
+        'username': user.username, 'password': PASSWORD,
+    }
+
+
+def list_request(user: VirtualUser) -> Request:
+    return 'GET', f'/api/tasks/?page={random.randint(1, 5)}', None
+
+
+def filter_request(user: VirtualUser) -> Request:
+    status = random.choice(['new', 'in_progress', 'completed'])
+    return 'GET', f'/api/tasks/?status={status}', None
+
+
+def create_request(user: VirtualUser) -> Request:
+    return 'POST', '/api/tasks/', {
+        'title': fake.sentence(nb_words=4)[:64],
+        'description': fake.paragraph(nb_sentences=3),
+    }
+
+
+def update_request(user: VirtualUser) -> Request:
+    pk = random.choice(user.task_ids)
+    return 'PATCH', f'/api/tasks/{pk}/', {
+        'title': fake.sentence(nb_words=4)[:64],
+    }
+
+
+def mark_completed_request(user: VirtualUser) -> Request:
+    pk = random.choice(user.task_ids)
+    return 'POST', f'/api/tasks/{pk}/mark_completed/', None
+
+
+def all_tasks_request(user: VirtualUser) -> Request:
+    return 'GET', f'/api/tasks/all/?page={random.randint(1, 5)}', None
+
+
+# name: (request builder, sent by the staff user)
+SCENARIOS: Dict[str, Tuple[Callable[[VirtualUser], Request], bool]] = {
+    'token': (token_request, False),
+    'list': (list_request, False),
+    'filter': (filter_request, False),
+    'create': (create_request, False),
+    'update': (update_request, False),
+    'mark_completed': (mark_completed_request, False),
+    'all_tasks': (all_tasks_request, True),
+}
+
+
+def seed_users(count: int, tasks: int) -> Tuple[List[UserType], UserType]:
+    """Create the users with their tasks and the staff user."""
+    password = make_password(PASSWORD)
+    users = User.objects.bulk_create(
+        User(
+            username=f'{fake.user_name()}{index}',
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            password=password,
+        )
+        for index in range(count)
+    )
+    for user in users:
+        seed_tasks(user, tasks)
+    staff = User.objects.create_superuser(
+        username='benchmark-staff', password=PASSWORD,
+    )
+    return users, staff
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+@contextmanager
+def serve(
+    database: str, command: Callable[[int], List[str]], **env: str,
+) -> Iterator[int]:
+    """Run the server command on the database, yielding its port."""
+    port = free_port()
+    env = {
+        **os.environ, 'POSTGRES_NAME': database, 'DJANGO_DEBUG': 'False',
+        **env,
+    }
+    process = subprocess.Popen(
+        [sys.executable, '-m', *command(port)],
+        cwd=settings.BASE_DIR,
+        env=env,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), 1).close()
+                break
+            except OSError:
+                if process.poll() is not None \
+                        or time.monotonic() > deadline:
+                    raise RuntimeError(f'{command(port)[0]} did not start')
+                time.sleep(0.2)
+        yield port
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def gunicorn(
+    database: str, workers: int, **env: str,
+) -> ContextManager[int]:
+    """Serve the WSGI application from the database, as the Dockerfile."""
+    return serve(database, lambda port: [
+        'gunicorn', 'mysite.wsgi:application',
+        '-b', f'127.0.0.1:{port}', '-w', str(workers),
+        '--log-level', 'warning',
+    ], **env)
+
+
+def send(port: int, token: Optional[str], request: Request) -> float:
+    """Send the request and return its latency in milliseconds."""
+    method, path, body = request
+    headers = {'Content-Type': 'application/json'}
+    if token is not None:
+        headers['Authorization'] = f'Bearer {token}'
+    start = time.perf_counter()
+    http = HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        http.request(
+            method, path, json.dumps(body) if body else None, headers,
+        )
+        response = http.getresponse()
+        response.read()
+    finally:
+        http.close()
+    latency = (time.perf_counter() - start) * 1000
+    if response.status >= 400:
+        raise RuntimeError(f'{method} {path}: HTTP {response.status}')
+    return latency
+
+
+def count_queries(token: Optional[str], request: Request) -> int:
+    """Return the number of queries of the request, served in-process."""
+    method, path, body = request
+    headers = {} if token is None else {'Authorization': f'Bearer {token}'}
+    client = Client(HTTP_HOST='127.0.0.1')
+    with CaptureQueriesContext(connection) as context:
+        client.generic(
+            method, path, json.dumps(body) if body else '',
+            content_type='application/json', headers=headers,
+        )
+    return len(context.captured_queries)
+
+
+def warm_up(port: int, users: List[VirtualUser], count: int) -> None:
+    """Let every worker load the application before the timed requests."""
+    for index in range(count):
+        user = users[index % len(users)]
+        send(port, user.token, list_request(user))
+
+
+def load(
+    port: int,
+    prepared: List[Tuple[Optional[str], Request]],
+    concurrency: int,
+) -> Dict[str, float]:
+    """Send the (token, request) pairs concurrently, return the stats."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(lambda item: send(port, *item), prepared))
+    elapsed = time.perf_counter() - start
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        'p50': cuts[49],
+        'p95': cuts[94],
+        'p99': cuts[98],
+        'rps': len(prepared) / elapsed,
+    }
+
+
+def run_scenario(
+    name: str,
+    users: List[VirtualUser],
+    staff: VirtualUser,
+    port: int,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    build, staff_only = SCENARIOS[name]
+    senders = [staff] if staff_only else users
+    prepared = [
+        (
+            None if name == 'token' else senders[index % len(senders)].token,
+            build(senders[index % len(senders)]),
+        )
+        for index in range(requests)
+    ]
+    queries = count_queries(*prepared[0])
+    return {**load(port, prepared, concurrency), 'queries': queries}
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> bool:
+    """Print the changes against the baseline, return False on regression."""
+    ok = True
+    print(f'\n{"scenario":>15} {"p95 change":>11} {"queries":>9}')
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        change = (result['p95'] / before['p95'] - 1) * 100
+        regressed = change > tolerance or result['queries'] > before['queries']
+        ok = ok and not regressed
+        print(f'{name:>15} {change:>+10.1f}% '
+              f'{before["queries"]:>4.0f}->{result["queries"]:<3.0f}'
+              f'{"  REGRESSION" if regressed else ""}')
+    return ok
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+    print(f'{"scenario":>15} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+          f'{"req/s":>8} {"queries":>8}')
+    for name, result in results.items():
+        print(f'{name:>15} {result["p50"]:>8.1f} {result["p95"]:>8.1f} '
+              f'{result["p99"]:>8.1f} {result["rps"]:>8.1f} '
+              f'{result["queries"]:>8.0f}')
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument(
+        '--tolerance', type=float, default=25,
+        help='Allowed p95 latency increase over the baseline, in percent.',
+    )
+    args = parser.parse_args(argv)
+    with test_database() as database:
+        users, staff = seed_users(args.users, args.tasks)
+        virtual_users = [VirtualUser(user) for user in users]
+        virtual_staff = VirtualUser(staff)
+        with gunicorn(database, args.workers) as port:
+            warm_up(port, virtual_users, args.workers * 4)
+            results = {
+                name: run_scenario(
+                    name, virtual_users, virtual_staff, port,
+                    args.requests, args.concurrency,
+                )
+                for name in args.scenario or SCENARIOS
+            }
+    print_results(results)
+    if args.save_baseline:
+        args.baseline.parent.mkdir(exist_ok=True)
+        rounded = {
+            name: {key: round(value, 2) for key, value in result.items()}
+            for name, result in results.items()
+        }
+        args.baseline.write_text(json.dumps(rounded, indent=2) + '\n')
+        return 0
+    if not args.baseline.exists():
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    return 0 if compare(results, baseline, args.tolerance) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
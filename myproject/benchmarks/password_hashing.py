@@ -0,0 +1,104 @@
+"""
+Task API latency during a burst of logins, by password hashing setup.
+
+Usage: python -m benchmarks.password_hashing [--users N] [--tasks M]
+           [--logins L] [--login-concurrency C] [--requests R]
+           [--workers W]
+
+Serves the API with gunicorn on a fresh test database:
+
+- inline: PASSWORD_HASHING_WORKERS=0, the passwords are hashed on the
+  request thread, like the other requests,
+- pooled: the default hashing pool of lower priority processes,
+
+and sends L logins from C clients while it lists tasks from one client,
+then lists the tasks again without logins. Reports the login throughput and
+the list latency with and without the logins. Exits with an error when the
+logins slow the task list down more inline than pooled.
+"""
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.load_test import (
+    Request,
+    VirtualUser,
+    gunicorn,
+    list_request,
+    load,
+    seed_users,
+    token_request,
+    warm_up,
+)
+from benchmarks.utils import test_database
+
+# name: environment of the server
+SETUPS: Dict[str, Dict[str, str]] = {
+    'inline': {'PASSWORD_HASHING_WORKERS': '0'},
+    'pooled': {},
+}
+
+
+def run_setup(
+    name: str,
+    database: str,
+    users: List[VirtualUser],
+    args: argparse.Namespace,
+) -> Dict[str, float]:
+    logins: List[Tuple[Optional[str], Request]] = [
+        (None, token_request(users[index % len(users)]))
+        for index in range(args.logins)
+    ]
+    lists: List[Tuple[Optional[str], Request]] = [
+        (users[index % len(users)].token,
+         list_request(users[index % len(users)]))
+        for index in range(args.requests)
+    ]
+    with gunicorn(database, args.workers, **SETUPS[name]) as port:
+        warm_up(port, users, args.workers * 4)
+        load(port, logins[:args.workers * 2], args.login_concurrency)
+        idle = load(port, lists, 1)
+        with ThreadPoolExecutor(1) as pool:
+            burst = pool.submit(load, port, logins, args.login_concurrency)
+            busy = load(port, lists, 1)
+            login = burst.result()
+    return {
+        'logins/s': login['rps'],
+        'idle p50': idle['p50'],
+        'busy p50': busy['p50'],
+        'busy p95': busy['p95'],
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=50)
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--login-concurrency', type=int, default=2)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args(argv)
+    with test_database() as database:
+        users, _ = seed_users(args.users, args.tasks)
+        virtual_users = [VirtualUser(user) for user in users]
+        results = {
+            name: run_setup(name, database, virtual_users, args)
+            for name in SETUPS
+        }
+    columns = list(results['inline'])
+    print(f'{"setup":>8}' + ''.join(f' {name:>10}' for name in columns))
+    for name, result in results.items():
+        print(f'{name:>8}' + ''.join(
+            f' {result[column]:>10.1f}' for column in columns
+        ))
+    slowdown = {
+        name: result['busy p50'] / result['idle p50']
+        for name, result in results.items()
+    }
+    return 0 if slowdown['pooled'] < slowdown['inline'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
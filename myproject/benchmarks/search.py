@@ -0,0 +1,99 @@
+"""
+Latency of the task search by number of tasks.
+
+Usage: python -m benchmarks.search [--sizes N,M,...] [--repeat K]
+
+Grows the tasks of a fresh test database to each size, plus a few tasks
+with a rare word, and times the first page of `/api/tasks/all/?search=`
+for a rare word, a prefix of it, the most common word of the titles and two
+common words. For reference it times the same page filtered with
+`ILIKE '%word%'` on the title and the description, i.e. without the search
+index. Exits with an error when the
+search of the rare word slows down with the number of tasks.
+"""
+import argparse
+import sys
+from collections import Counter
+from typing import Any, Dict, List
+
+from benchmarks.utils import User, measure, seed_tasks, test_database
+from django.conf import settings
+from django.db.models import Q
+from django.test import Client
+from tasks.models import Task
+from users.serializers import ClaimsTokenObtainPairSerializer
+
+RARE_WORD = 'zeppelin'
+# Allowed growth of the rare word search time over the range of sizes
+TIME_GROWTH_FACTOR = 3
+
+
+def search(client: Client, query: str) -> None:
+    response: Any = client.get('/api/tasks/all/', {'search': query})
+    assert response.status_code == 200, response.content
+
+
+def scan(word: str) -> None:
+    """The first page of the tasks containing the word, without index."""
+    queryset = Task.objects.filter(
+        Q(title__icontains=word) | Q(description__icontains=word),
+    ).order_by('-pk')
+    queryset.count()
+    list(queryset.values()[:settings.REST_FRAMEWORK['PAGE_SIZE']])
+
+
+def get_searches() -> Dict[str, str]:
+    """Return the queries by name, the common words taken from the tasks."""
+    words = Counter(
+        word.lower().strip('.')
+        for title in Task.objects.values_list('title', flat=True)[:1000]
+        for word in title.split()
+    )
+    common, second = [word for word, _ in words.most_common(2)]
+    return {
+        'rare word': RARE_WORD,
+        'prefix': RARE_WORD[:4],
+        'common word': common,
+        'two words': f'{common} {second}',
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    results: Dict[int, Dict[str, float]] = {}
+    with test_database():
+        staff = User.objects.create_superuser(username='benchmark-staff')
+        token = ClaimsTokenObtainPairSerializer.get_token(staff)
+        client = Client(HTTP_HOST='127.0.0.1', headers={
+            'Authorization': f'Bearer {getattr(token, "access_token")}',
+        })
+        for size in sizes:
+            seed_tasks(staff, size - Task.objects.count())
+            Task.objects.bulk_create(
+                Task(user=staff, title=f'{RARE_WORD} {number}')
+                for number in range(5)
+            )
+            results[size] = {
+                name: measure(
+                    lambda: search(client, query), repeat=args.repeat,
+                )['median']
+                for name, query in get_searches().items()
+            }
+            results[size]['ILIKE rare word'] = measure(
+                lambda: scan(RARE_WORD), repeat=args.repeat,
+            )['median']
+    print(f'{"tasks":>10} {"search":>16} {"median ms":>10}')
+    for size, timings in results.items():
+        for name, median in timings.items():
+            print(f'{size:>10} {name:>16} {median:>10.1f}')
+    smallest, largest = results[sizes[0]], results[sizes[-1]]
+    return 0 if largest['rare word'] \
+        <= smallest['rare word'] * TIME_GROWTH_FACTOR else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
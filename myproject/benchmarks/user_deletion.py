@@ -0,0 +1,131 @@
+"""
+Memory and lock time of the deletion of a user with many tasks.
+
+Usage: python -m benchmarks.user_deletion [--sizes N,M,...] [--chunk-size C]
+
+Deletes a user with N tasks from a fresh test database in two ways:
+
+- cascade: `User.delete()`, Django deleting the tasks in one transaction,
+- chunked: `tasks.deletion.delete_user()`, a transaction per chunk of tasks,
+
+while a writer keeps creating tasks for that user. Reports the time and the
+peak Python memory of every deletion, and the longest wait of the writer
+for the locks of the deletion, and its deadlocks. The cascade may fail,
+when a task created meanwhile references the user at its commit. Exits
+with an error when the chunked deletion fails, deadlocks or makes the
+writer wait longer than a successful cascade.
+"""
+import argparse
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks.utils import User, test_database
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection
+from tasks.deletion import delete_user
+from tasks.models import Task
+
+METHODS: Dict[str, Callable[[int], Any]] = {
+    'cascade': lambda user_id: User.objects.get(pk=user_id).delete(),
+    'chunked': delete_user,
+}
+
+
+class Writer(threading.Thread):
+    """Creates tasks for the user, recording the time of every write."""
+
+    def __init__(self, user_id: int) -> None:
+        super().__init__()
+        self.user_id = user_id
+        self.stopping = threading.Event()
+        self.waits: List[float] = [0.0]
+        self.deadlocks = 0
+
+    def run(self) -> None:
+        try:
+            while not self.stopping.is_set():
+                start = time.perf_counter()
+                try:
+                    Task.objects.create(user_id=self.user_id, title='write')
+                except IntegrityError:
+                    pass  # the user is deleted
+                except OperationalError:
+                    self.deadlocks += 1
+                self.waits.append(time.perf_counter() - start)
+                self.stopping.wait(0.01)
+        finally:
+            connection.close()
+
+
+def seed(user_id: int, size: int) -> None:
+    """Insert the tasks in a single statement, much faster than Faker."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {Task._meta.db_table} '
+            f'(user_id, title, description, status, updated_at) '
+            f"SELECT %s, 'task ' || n, repeat('description ', 10), "
+            f"(ARRAY['new', 'in_progress', 'completed'])[n %% 3 + 1], now() "
+            f'FROM generate_series(1, %s) AS n',
+            [user_id, size],
+        )
+        # up to date statistics, like autovacuum keeps them, for the plans
+        cursor.execute(f'ANALYZE {Task._meta.db_table}')
+
+
+def run_method(name: str, size: int) -> Dict[str, float]:
+    user = User.objects.create(username=f'{name}-{size}')
+    seed(user.pk, size)
+    writer = Writer(user.pk)
+    writer.start()
+    time.sleep(0.1)
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        METHODS[name](user.pk)
+        failed = False
+    except (IntegrityError, OperationalError):
+        failed = True  # a task created meanwhile references the user
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        writer.stopping.set()
+        writer.join()
+    return {
+        'seconds': elapsed, 'peak': peak, 'wait': max(writer.waits),
+        'deadlocks': writer.deadlocks, 'failed': failed,
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default='100000,1000000')
+    parser.add_argument('--chunk-size', type=int,
+                        default=settings.TASKS_JOB_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    settings.TASKS_JOB_CHUNK_SIZE = args.chunk_size
+    settings.DEBUG = False  # the log of the queries would grow every chunk
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    results: Dict[str, Dict[int, Dict[str, float]]] = {}
+    with test_database():
+        for name in METHODS:
+            results[name] = {size: run_method(name, size) for size in sizes}
+    print(f'{"method":>8} {"tasks":>9} {"seconds":>8} {"peak MB":>8} '
+          f'{"max wait s":>10} {"deadlocks":>9}')
+    for name, by_size in results.items():
+        for size, result in by_size.items():
+            print(f'{name:>8} {size:>9} {result["seconds"]:>8.2f} '
+                  f'{result["peak"] / 2 ** 20:>8.1f} {result["wait"]:>10.3f} '
+                  f'{result["deadlocks"]:>9}'
+                  + (' failed' if result['failed'] else ''))
+    cascade, chunked = (results[name][sizes[-1]] for name in METHODS)
+    if chunked['failed'] or chunked['deadlocks']:
+        return 1
+    return 0 if cascade['failed'] or chunked['wait'] < cascade['wait'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,62 @@
+import os
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from faker import Faker  # noqa: E402
+from tasks.models import Task  # noqa: E402
+from users.models import User as UserType  # noqa: E402
+
+User = get_user_model()
+fake = Faker()
+
+
+@contextmanager
+def test_database() -> Iterator[str]:
+    """Create a fresh test database for the benchmark and drop it after."""
+    old_name = connection.settings_dict['NAME']
+    test_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield test_name
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def seed_tasks(
+    user: UserType, count: int, batch_size: int = 5000,
+) -> None:
+    """Create `count` tasks for the user the way the test fixtures do."""
+    statuses = ['new', 'in_progress', 'completed']
+    for start in range(0, count, batch_size):
+        Task.objects.bulk_create(
+            Task(
+                user=user,
+                title=fake.sentence(nb_words=4)[:64],
+                description=fake.paragraph(nb_sentences=3),
+                status=random.choice(statuses),
+            )
+            for _ in range(min(batch_size, count - start))
+        )
+
+
+def measure(
+    func: Callable[[], Any], repeat: int = 20, warmup: int = 2,
+) -> Dict[str, float]:
+    """Return the median and the best run time of `func` in milliseconds."""
+    for _ in range(warmup):
+        func()
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {'median': statistics.median(timings), 'best': min(timings)}
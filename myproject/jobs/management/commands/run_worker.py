@@ -0,0 +1,35 @@
+import signal
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from jobs.worker import Worker
+from tasks.cache import task_list_cache
+
+
+class Command(BaseCommand):
+    help = 'Run the queued background jobs, one at a time.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Exit when no job is due instead of waiting for more.',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=settings.JOBS_POLL_INTERVAL,
+            help='Seconds to wait before polling again when no job is due.',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        # the jobs invalidate the cached task lists of the server processes
+        task_list_cache.check_shared('The job workers')
+        worker = Worker(options['sleep'])
+        signals = [signal.SIGINT, signal.SIGTERM]
+        previous = {number: signal.signal(number, worker.stop)
+                    for number in signals}
+        try:
+            ran = worker.run(burst=options['burst'])
+        finally:
+            for number, handler in previous.items():
+                signal.signal(number, handler)
+        self.stdout.write(self.style.SUCCESS(f'Ran {ran} jobs.'))
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from users.models import User
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+STATUS_CHOICES = [
+    (QUEUED, 'Queued'),
+    (RUNNING, 'Running'),
+    (SUCCEEDED, 'Succeeded'),
+    (FAILED, 'Failed'),
+]
+
+
+class Job(models.Model):
+    """
+    Operation run in the background by `manage.py run_worker`.
+
+    A job is taken by a single worker at a time, retried with a growing
+    delay after an error up to `max_attempts` times, and reports its
+    progress as `done` out of `total` items.
+    """
+
+    name = models.CharField(max_length=64)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+', db_index=False,
+    )
+    params = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    done = models.BigIntegerField(default=0)
+    total = models.BigIntegerField(null=True)
+    result = models.JSONField(null=True)
+    error = models.TextField(blank=True)
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='job_user_id_idx'),
+            models.Index(
+                fields=['run_at'],
+                name='job_queued_run_at_idx',
+                condition=models.Q(status=QUEUED),
+            ),
+            models.Index(
+                fields=['updated_at'],
+                name='job_running_updated_at_idx',
+                condition=models.Q(status=RUNNING),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Job #{self.pk} {self.name} is {self.status}'
+
+    @staticmethod
+    def enqueue(name: str, user_id: Any, **params: Any) -> 'Job':
+        """Queue the job for the next free worker."""
+
+        return Job.objects.create(
+            name=name, user_id=user_id, params=params,
+            max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        )
+
+    def set_progress(self, done: int, total: Optional[int] = None) -> None:
+        """Save the progress, which also tells the job is still running."""
+
+        self.done = done
+        if total is not None:
+            self.total = total
+        self.save(update_fields=['done', 'total', 'updated_at'])
+
+    def succeed(self, result: Any) -> None:
+        self.status = SUCCEEDED
+        self.result = result
+        self.error = ''
+        self.finished_at = timezone.now()
+        self.save(update_fields=[
+            'status', 'result', 'error', 'finished_at', 'updated_at',
+        ])
+
+    def fail(self, error: str, retry: bool = True) -> None:
+        """Queue the job again after a delay, or fail it for good."""
+
+        self.error = error
+        if retry and self.attempts < self.max_attempts:
+            delay = settings.JOBS_RETRY_DELAY * 2 ** (self.attempts - 1)
+            self.status = QUEUED
+            self.run_at = timezone.now() + timedelta(seconds=delay)
+        else:
+            self.status = FAILED
+            self.finished_at = timezone.now()
+        self.save(update_fields=[
+            'status', 'error', 'run_at', 'finished_at', 'updated_at',
+        ])
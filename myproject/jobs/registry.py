@@ -0,0 +1,23 @@
+from typing import Any, Callable, Dict
+
+from .models import Job
+
+Handler = Callable[[Job], Any]
+
+handlers: Dict[str, Handler] = {}
+
+
+def register(name: str) -> Callable[[Handler], Handler]:
+    """
+    Register the decorated function as the handler of the jobs `name`.
+
+    The handler returns the JSON result of the job. It may run again after
+    an error or a lost worker, so it must resume where it stopped, e.g. by
+    working in committed chunks.
+    """
+
+    def decorator(handler: Handler) -> Handler:
+        handlers[name] = handler
+        return handler
+
+    return decorator
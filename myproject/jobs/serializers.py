@@ -0,0 +1,23 @@
+from typing import Any, Dict
+
+from mysite.metrics import timed_serialization
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer[Job]):
+    """State and progress of a background job."""
+
+    class Meta:
+        model = Job
+        fields = [
+            'pk', 'name', 'params', 'status', 'attempts', 'max_attempts',
+            'done', 'total', 'result', 'error', 'run_at', 'created_at',
+            'updated_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    @timed_serialization
+    def to_representation(self, instance: Job) -> Dict[str, Any]:
+        return super().to_representation(instance)
@@ -0,0 +1,12 @@
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from .views import JobsApiViewSet
+
+router = DefaultRouter()
+router.register('', JobsApiViewSet, basename='job')
+
+app_name = 'jobs'
+urlpatterns = [
+    path('', include(router.urls)),
+]
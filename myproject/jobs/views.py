@@ -0,0 +1,62 @@
+import os
+from typing import Optional
+
+from django.core.files.storage import default_storage
+from django.db.models import QuerySet
+from django.http import FileResponse, Http404
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.viewsets import ReadOnlyModelViewSet
+
+from .models import SUCCEEDED, Job
+from .serializers import JobSerializer
+
+
+def job_accepted(request: Request, job: Job) -> Response:
+    """Answer 202 with the queued job and the URL to follow it."""
+
+    return Response(
+        JobSerializer(job).data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': reverse(
+            'jobs:job-detail', args=[job.pk], request=request,
+        )},
+    )
+
+
+class JobsApiViewSet(ReadOnlyModelViewSet[Job]):
+    """Background jobs of the authenticated user, newest first."""
+
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self) -> QuerySet[Job]:
+        user = self.request.user
+        if getattr(self, 'swagger_fake_view', False) \
+                or not user.is_authenticated:
+            return Job.objects.none()  # safe fake queryset
+        return Job.objects.filter(user_id=user.pk).order_by('-pk')
+
+    @extend_schema(responses={(200, '*/*'): OpenApiTypes.BINARY})
+    @action(detail=True, methods=['get'])
+    def download(
+        self, request: Request, pk: Optional[int] = None,
+    ) -> FileResponse:
+        """Download the file written by the job, e.g. an export."""
+
+        job = self.get_object()
+        name = job.result.get('file') if job.status == SUCCEEDED \
+            and isinstance(job.result, dict) else None
+        if not name or not default_storage.exists(name):
+            raise Http404('The job has no file.')
+        return FileResponse(
+            default_storage.open(name),
+            as_attachment=True,
+            filename=os.path.basename(name),
+        )
@@ -0,0 +1,89 @@
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import QUEUED, RUNNING, Job
+from .registry import handlers
+
+logger = logging.getLogger(__name__)
+
+
+def claim_job() -> Optional[Job]:
+    """
+    Take the next due job, or a running job whose worker went silent.
+
+    The workers skip the jobs locked by each other, so each job is taken
+    by a single worker.
+    """
+    now = timezone.now()
+    due = Job.objects.filter(status=QUEUED, run_at__lte=now) \
+        .order_by('run_at')
+    lost = Job.objects.filter(
+        status=RUNNING,
+        updated_at__lt=now - timedelta(seconds=settings.JOBS_TIMEOUT),
+    ).order_by('updated_at')
+    with transaction.atomic():
+        job = due.select_for_update(skip_locked=True).first() \
+            or lost.select_for_update(skip_locked=True).first()
+        if job is not None:
+            job.status = RUNNING
+            job.attempts += 1
+            job.save(update_fields=['status', 'attempts', 'updated_at'])
+    return job
+
+
+def run_job(job: Job) -> None:
+    """Run the handler of the claimed job and record the outcome."""
+
+    handler = handlers.get(job.name)
+    if handler is None:
+        job.fail(f'Unknown job `{job.name}`.', retry=False)
+        return
+    if job.attempts > job.max_attempts:
+        # the worker stopped during the last attempt
+        job.fail('The job was interrupted.', retry=False)
+        return
+    try:
+        result = handler(job)
+    except Exception as error:
+        logger.exception('Job #%s %s failed', job.pk, job.name)
+        job.fail(f'{type(error).__name__}: {error}')
+    else:
+        job.succeed(result)
+
+
+class Worker:
+    """Runs the due jobs one after the other until stopped."""
+
+    def __init__(self, sleep: float) -> None:
+        self.sleep = sleep
+        self.stopping = False
+
+    def stop(self, *args: Any) -> None:
+        """Stop once the current job is over, e.g. on SIGTERM."""
+
+        self.stopping = True
+
+    def run(self, burst: bool = False) -> int:
+        """
+        Run the jobs, until none is due in burst mode.
+
+        Return the number of jobs run.
+        """
+        ran = 0
+        while not self.stopping:
+            job = claim_job()
+            if job is not None:
+                run_job(job)
+                ran += 1
+            elif burst:
+                break
+            else:
+                close_old_connections()
+                time.sleep(self.sleep)
+        return ran
@@ -0,0 +1,22 @@
+"""
+Gunicorn settings of the Docker image: `gunicorn -c python:mysite.gunicorn`.
+"""
+import os
+from typing import Any
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+# threaded workers, so the admission limits of each process apply
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+
+
+def post_worker_init(worker: Any) -> None:
+    """Refuse to boot workers that would each keep their own cache."""
+    from django.db import router
+    from tasks.cache import task_list_cache
+
+    # the replica router checks the cache of its pins when created
+    router.routers
+    if worker.cfg.workers > 1:
+        task_list_cache.check_shared(f'{worker.cfg.workers} gunicorn workers')
@@ -0,0 +1,257 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class RequestStats:
+    """Measurements of a single request, filled by the middleware."""
+
+    def __init__(self, sampled: bool) -> None:
+        self.sampled = sampled
+        self.view = 'unmatched'
+        self.method = ''
+        self.start = 0.0
+        self.status = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_duration = 0.0
+        self.view_start = 0.0
+        self.view_duration = 0.0
+        self.serialize_duration = 0.0
+        self.serializing = False
+        self.render_duration = 0.0
+        self.cache: Optional[str] = None
+
+
+# Stats of the request being served, set by the middleware
+current_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    'current_stats', default=None,
+)
+
+Method = TypeVar('Method', bound=Callable[..., Any])
+
+
+def timed_serialization(method: Method) -> Method:
+    """
+    Add the time of the method to the serializer time of the sampled request.
+
+    Only the outermost serializer call of nested ones is timed, without the
+    database queries it makes, e.g. of a lazy queryset.
+    """
+
+    @wraps(method)
+    def timed(*args: Any, **kwargs: Any) -> Any:
+        stats = current_stats.get()
+        if stats is None or not stats.sampled or stats.serializing:
+            return method(*args, **kwargs)
+        stats.serializing = True
+        start, db_duration = time.perf_counter(), stats.db_duration
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stats.serializing = False
+            stats.serialize_duration += time.perf_counter() - start \
+                - (stats.db_duration - db_duration)
+
+    return cast(Method, timed)
+
+
+LabelValues = Tuple[str, ...]
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    pairs = ','.join(
+        f'{name}="{value}"' for name, value in zip(names, values)
+    )
+    return f'{{{pairs}}}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(
+        self, name: str, description: str, labels: Sequence[str],
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues, value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def iter_samples(self) -> Iterator[str]:
+        for labels, value in sorted(self.values.items()):
+            yield f'{self.name}{format_labels(self.labels, labels)} {value:g}'
+
+    def iter_lines(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} {self.kind}'
+        yield from self.iter_samples()
+
+
+class Histogram(Counter):
+    kind = 'histogram'
+
+    def __init__(
+        self, name: str, description: str, labels: Sequence[str],
+    ) -> None:
+        super().__init__(name, description, labels)
+        self.buckets: Dict[LabelValues, List[int]] = {}
+        self.counts: Dict[LabelValues, int] = {}
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        buckets = self.buckets.setdefault(labels, [0] * len(DURATION_BUCKETS))
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                buckets[index] += 1
+        self.counts[labels] = self.counts.get(labels, 0) + 1
+        self.inc(labels, value)
+
+    def iter_samples(self) -> Iterator[str]:
+        names = [*self.labels, 'le']
+        for labels, buckets in sorted(self.buckets.items()):
+            for bound, value in [
+                *zip(map(str, DURATION_BUCKETS), buckets),
+                ('+Inf', self.counts[labels]),
+            ]:
+                yield f'{self.name}_bucket' \
+                      f'{format_labels(names, (*labels, bound))} {value}'
+            series = format_labels(self.labels, labels)
+            yield f'{self.name}_sum{series} {self.values[labels]:g}'
+            yield f'{self.name}_count{series} {self.counts[labels]}'
+
+
+class MetricsRegistry:
+    """
+    Request metrics of the worker process in the Prometheus text format.
+
+    Every request is counted and timed; the view, database, serializer and
+    render times are only known for the sampled requests, so they are
+    exported with the number of samples they were collected from. Each
+    worker process keeps its own registry: they are not added up.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        # functions returning the counters kept by the apps, see `register()`
+        self.collectors: List[Callable[[], Counter]] = []
+        self.reset()
+
+    def register(self, collector: Callable[[], Counter]) -> None:
+        """Export the counter returned by `collector` at every scrape."""
+
+        self.collectors.append(collector)
+
+    def reset(self) -> None:
+        view = ('view',)
+        self.requests = Counter(
+            'http_requests_total', 'Requests by view, method and status.',
+            ('view', 'method', 'status'),
+        )
+        self.durations = Histogram(
+            'http_request_duration_seconds', 'Request time by view.', view,
+        )
+        self.samples = Counter(
+            'http_sampled_requests_total',
+            'Requests with measured view, database, serializer and render '
+            'time.', view,
+        )
+        self.view_seconds = Counter(
+            'view_duration_seconds_total',
+            'View time of the sampled requests, queries and serializers '
+            'included.', view,
+        )
+        self.queries = Counter(
+            'db_queries_total', 'Database queries of the sampled requests.',
+            view,
+        )
+        self.db_seconds = Counter(
+            'db_duration_seconds_total',
+            'Database time of the sampled requests.', view,
+        )
+        self.serialize_seconds = Counter(
+            'serialize_duration_seconds_total',
+            'Serializer time of the sampled requests, queries excluded.', view,
+        )
+        self.render_seconds = Counter(
+            'render_duration_seconds_total',
+            'Response rendering time of the sampled requests.', view,
+        )
+        self.cache = Counter(
+            'http_cache_requests_total', 'Cached responses by result.',
+            ('view', 'result'),
+        )
+        self.admission = Counter(
+            'http_admission_requests_total',
+            'Requests admitted or shed by route class.', ('route', 'result'),
+        )
+
+    def observe(self, stats: RequestStats) -> None:
+        view = (stats.view,)
+        with self._lock:
+            self.requests.inc((stats.view, stats.method, str(stats.status)))
+            self.durations.observe(view, stats.duration)
+            if stats.cache:
+                self.cache.inc((stats.view, stats.cache.lower()))
+            if stats.sampled:
+                self.samples.inc(view)
+                self.view_seconds.inc(view, stats.view_duration)
+                self.queries.inc(view, stats.queries)
+                self.db_seconds.inc(view, stats.db_duration)
+                self.serialize_seconds.inc(view, stats.serialize_duration)
+                self.render_seconds.inc(view, stats.render_duration)
+
+    def observe_admission(self, route: str, admitted: bool) -> None:
+        with self._lock:
+            self.admission.inc((route, 'admitted' if admitted else 'shed'))
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                line for counter in [
+                    self.requests, self.durations, self.samples,
+                    self.view_seconds, self.queries, self.db_seconds,
+                    self.serialize_seconds, self.render_seconds,
+                    self.cache, self.admission,
+                    *(collector() for collector in self.collectors),
+                ]
+                for line in counter.iter_lines()
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Serve the metrics of this worker to the local scrapers only.
+
+    With several worker processes, a scrape gets the metrics of the worker
+    that happens to serve it.
+    """
+
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404()
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4',
+    )
@@ -0,0 +1,263 @@
+import random
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    DefaultDict,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Tuple,
+)
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, JsonResponse
+from django.http.response import HttpResponseBase
+from django.template.response import SimpleTemplateResponse
+
+from .metrics import RequestStats, current_stats, metrics
+
+STATS_ATTRIBUTE = '_performance_stats'
+
+
+def get_view_name(view_func: Callable[..., Any], method: str) -> str:
+    """Return the view class and the viewset action serving the request."""
+
+    view_class = getattr(view_func, 'cls', None)
+    name = getattr(view_class or view_func, '__name__', 'unknown')
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    return f'{name}.{action}' if action else name
+
+
+class PerformanceMiddleware:
+    """
+    Measures where the time of the requests goes.
+
+    Every request is counted and timed. A `PERF_SAMPLE_RATE` share of them
+    also has its view, database queries, serializers and response rendering
+    timed, reported in the `Server-Timing` header. The metrics of the worker
+    process are served on `/metrics`. Works in front of both the sync and
+    the async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = self.start(request)
+        with self.time_queries(stats):
+            response = self.get_response(request)
+        return self.finish(stats, response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        stats = self.start(request)
+        with self.time_queries(stats):
+            response = await self.get_response(request)
+        return self.finish(stats, response)
+
+    def start(self, request: HttpRequest) -> RequestStats:
+        stats = RequestStats(random.random() < settings.PERF_SAMPLE_RATE)
+        stats.method = request.method or ''
+        stats.start = time.perf_counter()
+        setattr(request, STATS_ATTRIBUTE, stats)
+        current_stats.set(stats)
+        return stats
+
+    @contextmanager
+    def time_queries(self, stats: RequestStats) -> Iterator[None]:
+        with ExitStack() as stack:
+            if stats.sampled:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(
+                        lambda *args: self.time_query(stats, *args),
+                    ))
+            yield
+
+    def finish(
+        self, stats: RequestStats, response: HttpResponseBase,
+    ) -> HttpResponseBase:
+        now = time.perf_counter()
+        stats.duration = now - stats.start
+        stats.status = response.status_code
+        stats.cache = response.get('X-Cache')
+        if stats.view_start and not stats.view_duration:
+            stats.view_duration = now - stats.view_start
+        if stats.sampled:
+            response['Server-Timing'] = self.get_server_timing(stats)
+        metrics.observe(stats)
+        current_stats.set(None)
+        return response
+
+    def process_view(
+        self,
+        request: HttpRequest,
+        view_func: Callable[..., Any],
+        view_args: Tuple[Any, ...],
+        view_kwargs: Dict[str, Any],
+    ) -> None:
+        stats: RequestStats = getattr(request, STATS_ATTRIBUTE)
+        stats.view = get_view_name(view_func, stats.method)
+        stats.view_start = time.perf_counter()
+
+    def process_template_response(
+        self, request: HttpRequest, response: SimpleTemplateResponse,
+    ) -> SimpleTemplateResponse:
+        stats: RequestStats = getattr(request, STATS_ATTRIBUTE)
+        # called once the view returned, before the response is rendered
+        start = time.perf_counter()
+        stats.view_duration = start - stats.view_start
+        if stats.sampled:
+
+            def rendered(response: SimpleTemplateResponse) -> None:
+                stats.render_duration = time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def time_query(
+        stats: RequestStats, execute: Callable[..., Any], *args: Any,
+    ) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(*args)
+        finally:
+            stats.queries += 1
+            stats.db_duration += time.perf_counter() - start
+
+    @staticmethod
+    def get_server_timing(stats: RequestStats) -> str:
+        timings: List[str] = [
+            f'total;dur={stats.duration * 1000:.1f}',
+            f'view;dur={stats.view_duration * 1000:.1f}',
+            f'db;dur={stats.db_duration * 1000:.1f};'
+            f'desc="{stats.queries} queries"',
+            f'serialize;dur={stats.serialize_duration * 1000:.1f}',
+            f'render;dur={stats.render_duration * 1000:.1f}',
+        ]
+        if stats.cache:
+            timings.append(f'cache;desc={stats.cache}')
+        return ', '.join(timings)
+
+
+class AdmissionControlMiddleware:
+    """
+    Sheds the requests over the concurrency limit of their route class.
+
+    The requests in flight in the process are counted by route class, e.g.
+    the logins or the task reads. A request over the limit of its class in
+    `ADMISSION_LIMITS` is answered `503 Service Unavailable` with a
+    `Retry-After` header at once, before the token is decoded or any query
+    is made, so a spike of one class can't queue up the others.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    # (route class, path pattern, methods or None for all), first match wins
+    route_classes: List[Tuple[str, Pattern[str], Optional[Collection[str]]]] = [
+        ('auth', re.compile(r'/api/(token|users/register)/'), None),
+        ('staff', re.compile(r'/api/tasks/all/'), None),
+        ('schema', re.compile(r'/api/schema/'), None),
+        ('task_reads', re.compile(r'/api/tasks/'), ('GET', 'HEAD', 'OPTIONS')),
+        ('task_writes', re.compile(r'/api/tasks/'), None),
+    ]
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        self.lock = Lock()
+        self.in_flight: DefaultDict[str, int] = defaultdict(int)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        route = self.get_route_class(request)
+        if route is None:
+            return self.get_response(request)
+        if not self.admit(route):
+            return self.shed()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self.release(route)
+            raise
+        return self.release_after(response, route)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        route = self.get_route_class(request)
+        if route is None:
+            response: HttpResponseBase = await self.get_response(request)
+            return response
+        if not self.admit(route):
+            return self.shed()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            self.release(route)
+            raise
+        return self.release_after(response, route)
+
+    def get_route_class(self, request: HttpRequest) -> Optional[str]:
+        for route, pattern, methods in self.route_classes:
+            if pattern.match(request.path_info) \
+                    and (methods is None or request.method in methods):
+                return route
+        return None
+
+    def admit(self, route: str) -> bool:
+        """Count the request in flight unless its class is at its limit."""
+
+        limit = settings.ADMISSION_LIMITS.get(route, 0)
+        with self.lock:
+            admitted = not limit or self.in_flight[route] < limit
+            if admitted:
+                self.in_flight[route] += 1
+        metrics.observe_admission(route, admitted)
+        return admitted
+
+    def release(self, route: str) -> None:
+        with self.lock:
+            self.in_flight[route] -= 1
+
+    def release_after(
+        self, response: HttpResponseBase, route: str,
+    ) -> HttpResponseBase:
+        """
+        Release the request once its response is sent.
+
+        A streaming response is still being generated after the view has
+        returned: its request stays in flight until the server closes it.
+        """
+        if response.streaming:
+            # the hook of `close()` that Django closes the files with
+            closers = response._resource_closers  # type: ignore[attr-defined]
+            closers.append(partial(self.release, route))
+        else:
+            self.release(route)
+        return response
+
+    def shed(self) -> JsonResponse:
+        response = JsonResponse(
+            {'detail': 'The server is busy, retry later.'}, status=503,
+        )
+        response['Retry-After'] = str(settings.ADMISSION_RETRY_AFTER)
+        return response
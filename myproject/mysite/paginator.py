@@ -0,0 +1,42 @@
+import json
+from typing import TYPE_CHECKING, Any, Optional
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+if TYPE_CHECKING:
+    PaginatorClass = Paginator[Any]
+else:
+    PaginatorClass = Paginator
+
+
+class EstimatedCountPaginator(PaginatorClass):
+    """
+    Counts the big querysets from the PostgreSQL planner statistics.
+
+    An exact `COUNT(*)` reads every matching row, which takes seconds on
+    tens of millions of rows. Over `exact_count_limit` rows the planner
+    estimate of the `EXPLAIN` of the queryset is used instead, filters
+    included: the last page links can then be a few pages off.
+    """
+
+    exact_count_limit = 100_000
+
+    def get_estimate(self) -> Optional[int]:
+        """Return the planner estimate of the rows, None when unknown."""
+
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) \
+                or connections[queryset.db].vendor != 'postgresql':
+            return None
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @cached_property
+    def count(self) -> int:
+        estimate = self.get_estimate()
+        if estimate is None or estimate < self.exact_count_limit:
+            return super().count
+        return estimate
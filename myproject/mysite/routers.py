@@ -0,0 +1,107 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional, Type
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model
+
+_replica_reads: ContextVar[bool] = ContextVar('replica_reads', default=False)
+
+
+def get_pin_key(session: Any) -> str:
+    return f'db:primary:{session}'
+
+
+def pin_primary(session: Any) -> None:
+    """
+    Keep the reads of the session on the primary while replicas lag.
+
+    The pin is kept in the `default` cache, shared by the server processes
+    and the job worker, so a read served by another process sees it.
+    """
+
+    if settings.DATABASE_REPLICAS:
+        cache.set(
+            get_pin_key(session), True,
+            timeout=settings.DATABASE_REPLICA_LAG,
+        )
+
+
+async def apin_primary(session: Any) -> None:
+    if settings.DATABASE_REPLICAS:
+        await cache.aset(
+            get_pin_key(session), True,
+            timeout=settings.DATABASE_REPLICA_LAG,
+        )
+
+
+@contextmanager
+def replica_reads(session: Any) -> Iterator[None]:
+    """
+    Send the reads of the block to a read replica.
+
+    The reads stay on the primary when the session wrote within the last
+    `DATABASE_REPLICA_LAG` seconds, and from the first write of the block.
+    """
+
+    enabled = bool(settings.DATABASE_REPLICAS) \
+        and not cache.get(get_pin_key(session))
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Routes the reads of the `replica_reads()` blocks to the replicas.
+
+    Everything else, the writes and the migrations go to the primary. With
+    replicas, the pins of `pin_primary()` need a cache shared by the
+    processes: a cache local to each one is refused.
+    """
+
+    def __init__(self) -> None:
+        if settings.DATABASE_REPLICAS \
+                and isinstance(caches['default'], LocMemCache):
+            raise ImproperlyConfigured(
+                'The read replicas need a cache shared by the processes for '
+                'the pins of the primary, the `default` cache is local to '
+                'each one: set DJANGO_CACHE_BACKEND and DJANGO_CACHE_LOCATION.'
+            )
+
+    def get_replica(self) -> str:
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_read(
+        self, model: Type[Model], **hints: Any,
+    ) -> Optional[str]:
+        if _replica_reads.get():
+            return self.get_replica()
+        return None
+
+    def db_for_write(self, model: Type[Model], **hints: Any) -> str:
+        # read your own writes for the rest of the block
+        _replica_reads.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(
+        self, obj1: Model, obj2: Model, **hints: Any,
+    ) -> Optional[bool]:
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(
+        self, db: str, app_label: str, **hints: Any,
+    ) -> Optional[bool]:
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from datetime import timedelta
 from pathlib import Path
+from typing import List
 
 from dotenv import load_dotenv
 
@@ -50,9 +51,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'tasks.apps.TasksConfig',
     'users.apps.UsersConfig',
+    'jobs.apps.JobsConfig',
 
     'django_filters',
     'drf_spectacular',
@@ -61,6 +64,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mysite.middleware.PerformanceMiddleware',
+    'mysite.middleware.AdmissionControlMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -93,14 +98,63 @@ WSGI_APPLICATION = 'mysite.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Size of the psycopg 3 connection pool of every process, 0 disables it
+POSTGRES_POOL_MAX_SIZE = int(os.getenv('POSTGRES_POOL_MAX_SIZE', '0'))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('', 'myproject_db'),
+        'NAME': os.getenv('POSTGRES_NAME', 'myproject_db'),
         'USER': os.getenv('POSTGRES_USER', 'pg_admin'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'pg_password'),
         'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
-        'PORT': os.getenv('POSTGRES_PORT', '5432')
+        'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        # Seconds a connection is reused for, the pool manages its own
+        'CONN_MAX_AGE': 0 if POSTGRES_POOL_MAX_SIZE else int(
+            os.getenv('POSTGRES_CONN_MAX_AGE', '60')),
+        # Check a reused connection before the request, not on its failure
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'POSTGRES_CONN_HEALTH_CHECKS', 'True').title() != 'False',
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('POSTGRES_POOL_MIN_SIZE', '1')),
+                'max_size': POSTGRES_POOL_MAX_SIZE,
+                'timeout': float(os.getenv('POSTGRES_POOL_TIMEOUT', '10')),
+            },
+        } if POSTGRES_POOL_MAX_SIZE else {},
+    }
+}
+
+# Read replicas: comma separated `host[:port]`, with the primary credentials
+DATABASE_REPLICAS: List[str] = []
+for index, address in enumerate(
+        filter(None, os.getenv('POSTGRES_REPLICAS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['mysite.routers.ReplicaRouter']
+
+# Seconds the reads of a user stay on the primary after their writes, so
+# that they are not served from a lagging replica
+DATABASE_REPLICA_LAG = float(os.getenv('POSTGRES_REPLICA_LAG', '5'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'DJANGO_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', ''),
     }
 }
 
@@ -110,6 +164,26 @@ DATABASES = {
 
 AUTH_USER_MODEL = 'users.User'
 
+# The first hasher hashes the new passwords, the others check the existing
+# ones, which are rehashed with the first on the next login. `scrypt` and
+# `argon2` (needs `argon2-cffi`) are memory-hard.
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'users.hashers.PooledPBKDF2PasswordHasher',
+    'scrypt': 'users.hashers.PooledScryptPasswordHasher',
+    'argon2': 'users.hashers.PooledArgon2PasswordHasher',
+}
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[PASSWORD_HASHER],
+    *(path for name, path in PASSWORD_HASHER_CLASSES.items()
+      if name != PASSWORD_HASHER),
+]
+
+# Processes hashing the passwords in every server process, at a lower
+# priority than the requests (0 hashes them on the request thread)
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', '1'))
+PASSWORD_HASHING_NICE = int(os.getenv('PASSWORD_HASHING_NICE', '10'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation'
@@ -141,7 +215,7 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -154,14 +228,91 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '0.1.0',
     'SERVE_INCLUDE_SCHEMA': False,
     # 'ENABLE_DJANGO_FILTER_EXTENSION': True,
+    'ENUM_NAME_OVERRIDES': {
+        'StatusEnum': 'tasks.models.STATUS_CHOICES',
+        'JobStatusEnum': 'jobs.models.STATUS_CHOICES',
+    },
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=6),
     'REFRESH_TOKEN_LIFETIME': timedelta(weeks=1),
+    # The user is built from the token claims without a database query
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.'
+                               'ClaimsTokenObtainPairSerializer',
+    'TOKEN_USER_CLASS': 'users.authentication.ClaimsUser',
 }
 
 
+# Instrumentation
+
+# Share of the requests whose database and render time is measured
+PERF_SAMPLE_RATE = float(os.getenv('PERF_SAMPLE_RATE', '0.1'))
+
+# Addresses allowed to scrape the `/metrics` endpoint
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv(
+    'METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+
+
+# Admission control
+
+# Requests in flight per server process by route class, over which the
+# requests are answered `503` at once (0: no limit), e.g.
+# ADMISSION_LIMIT_TASK_READS=8. The gunicorn workers serve GUNICORN_THREADS
+# requests each: a limit at or above it never sheds anything.
+ADMISSION_LIMITS = {
+    route: int(os.getenv(f'ADMISSION_LIMIT_{route.upper()}', default))
+    for route, default in [
+        ('auth', '4'),
+        ('task_reads', '12'),
+        ('task_writes', '8'),
+        ('staff', '4'),
+        ('schema', '2'),
+    ]
+}
+# Seconds after which the shed requests may be retried
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+
+
+# Background jobs, run by `manage.py run_worker`
+
+# Attempts of a failing job, retried after JOBS_RETRY_DELAY seconds, doubled
+# at every attempt
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', '3'))
+JOBS_RETRY_DELAY = float(os.getenv('JOBS_RETRY_DELAY', '10'))
+
+# Seconds without progress after which a running job is taken over by
+# another worker, its worker being considered lost
+JOBS_TIMEOUT = int(os.getenv('JOBS_TIMEOUT', '600'))
+
+# Seconds the workers wait before polling again when no job is due
+JOBS_POLL_INTERVAL = float(os.getenv('JOBS_POLL_INTERVAL', '1'))
+
+
+# Tasks
+
+# Maximum number of items in a single batch request
+TASKS_BULK_MAX_SIZE = int(os.getenv('TASKS_BULK_MAX_SIZE', '100'))
+
+# Lifetime of the cached task list pages, in seconds
+TASKS_CACHE_TIMEOUT = int(os.getenv('TASKS_CACHE_TIMEOUT', '300'))
+
+# Rows fetched at a time from the server-side cursor of the task export
+TASKS_EXPORT_CHUNK_SIZE = int(os.getenv('TASKS_EXPORT_CHUNK_SIZE', '2000'))
+
+# Tasks changed or deleted per transaction by the background jobs
+TASKS_JOB_CHUNK_SIZE = int(os.getenv('TASKS_JOB_CHUNK_SIZE', '1000'))
+
+# Maximum number of changes returned by a single delta sync request
+TASKS_SYNC_MAX_SIZE = int(os.getenv('TASKS_SYNC_MAX_SIZE', '500'))
+
+# Days the tombstones of the deleted tasks are kept for the delta sync, and
+# the change tokens stay valid, before `prune_tombstones` deletes them
+TASKS_TOMBSTONE_RETENTION = int(
+    os.getenv('TASKS_TOMBSTONE_RETENTION', '30'),
+)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -180,6 +331,9 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Files written by the background jobs, e.g. the task exports
+MEDIA_ROOT = os.getenv('DJANGO_MEDIA_ROOT', BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
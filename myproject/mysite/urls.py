@@ -28,14 +28,18 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/tasks/', include('tasks.urls')),
     path('api/users/', include('users.urls')),
+    path('api/jobs/', include('jobs.urls')),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path(
         'api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh',
     ),
+    path('metrics/', metrics_view, name='metrics'),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path(
         'api/schema/swagger/',
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self) -> None:
+        from mysite.metrics import metrics
+
+        from .cache import task_list_cache
+
+        # the lookups of the task list cache go with the request metrics
+        metrics.register(task_list_cache.get_counter)
@@ -0,0 +1,208 @@
+import json
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List, cast
+
+from django.http import HttpRequest, JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    MethodNotAllowed,
+    NotAuthenticated,
+    NotFound,
+    ParseError,
+    ValidationError,
+)
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.authentication import (
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.models import TokenUser
+from users.authentication import ClaimsUser
+
+from .cache import task_list_cache
+from .models import STATUS_CHOICES, Task
+from .permissions import is_owner
+from .serializers import TaskRowSerializer, TaskSerializer
+
+Handler = Callable[..., Awaitable[JsonResponse]]
+
+
+def async_api_view(
+        methods: List[str],
+) -> Callable[[Handler], Callable[..., Any]]:
+    """
+    Turn a coroutine into a JWT protected JSON view.
+
+    The user is built from the token claims, so neither the authentication
+    nor the permission checks of the reads touch the database and the view
+    runs on the event loop without thread hops. The writes load the user
+    first, rejecting a deleted or deactivated one. API errors are rendered
+    as in DRF.
+    """
+
+    def decorator(handler: Handler) -> Callable[..., Any]:
+        @csrf_exempt
+        @wraps(handler)
+        async def view(
+            request: HttpRequest, *args: Any, **kwargs: Any,
+        ) -> JsonResponse:
+            try:
+                if request.method not in methods:
+                    raise MethodNotAllowed(request.method or '')
+                user = await authenticate(request)
+                return await handler(request, user, *args, **kwargs)
+            except APIException as exc:
+                detail = exc.detail if isinstance(exc.detail, (dict, list)) \
+                    else {'detail': exc.detail}
+                return JsonResponse(
+                    detail, status=exc.status_code, safe=False,
+                )
+
+        return view
+
+    return decorator
+
+
+async def authenticate(request: HttpRequest) -> TokenUser:
+    """
+    Return the user of the access token, built from its claims, after
+    loading its row for the writes.
+    """
+
+    result = JWTStatelessUserAuthentication().authenticate(Request(request))
+    if result is None:
+        raise NotAuthenticated()
+    user = cast(TokenUser, result[0])
+    if request.method not in SAFE_METHODS and isinstance(user, ClaimsUser):
+        await user.ainstance()
+    return user
+
+
+def get_data(request: HttpRequest) -> Dict[str, Any]:
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError as exc:
+        raise ParseError(f'JSON parse error - {exc}')
+    if not isinstance(data, dict):
+        raise ParseError('Expected a JSON object.')
+    return data
+
+
+async def get_task(user: TokenUser, pk: int) -> Task:
+    """Return the user's task with its owner, as the viewset does."""
+
+    queryset = Task.objects.filter(user_id=user.pk).select_related('user')
+    try:
+        task = await queryset.aget(pk=pk)
+    except Task.DoesNotExist:
+        raise NotFound('No Task matches the given query.')
+    if not is_owner(user, task.user_id):
+        raise NotFound('No Task matches the given query.')
+    return task
+
+
+async def render_task(user: TokenUser, pk: int) -> Dict[str, Any]:
+    """Return the user's task as rendered by TaskSerializer."""
+
+    serializer = TaskRowSerializer()
+    queryset = Task.objects.filter(user_id=user.pk, pk=pk)
+    try:
+        row = await serializer.get_rows(queryset).aget()
+    except Task.DoesNotExist:
+        raise NotFound('No Task matches the given query.')
+    if not is_owner(user, row['user_id']):
+        raise NotFound('No Task matches the given query.')
+    return serializer.to_representation(row)
+
+
+async def list_tasks(request: HttpRequest, user: TokenUser) -> JsonResponse:
+    queryset = Task.objects.filter(user_id=user.pk).order_by('-pk')
+    status_filter = request.GET.get('status')
+    if status_filter:
+        if status_filter not in dict(STATUS_CHOICES):
+            raise ValidationError({'status': [
+                f'Select a valid choice. {status_filter} is not one of the '
+                f'available choices.',
+            ]})
+        queryset = queryset.filter(status=status_filter)
+    page_size = api_settings.PAGE_SIZE or 10
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        raise NotFound('Invalid page.')
+    count = await queryset.acount()
+    if page < 1 or (page - 1) * page_size >= max(count, 1):
+        raise NotFound('Invalid page.')
+    serializer = TaskRowSerializer()
+    offset = (page - 1) * page_size
+    rows = serializer.get_rows(queryset)[offset:offset + page_size]
+    url = request.build_absolute_uri()
+    return JsonResponse({
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1)
+        if offset + page_size < count else None,
+        'previous': None if page == 1
+        else remove_query_param(url, 'page') if page == 2
+        else replace_query_param(url, 'page', page - 1),
+        'results': serializer.serialize([row async for row in rows]),
+    })
+
+
+async def create_task(request: HttpRequest, user: TokenUser) -> JsonResponse:
+    serializer = TaskSerializer(data=get_data(request))
+    serializer.is_valid(raise_exception=True)
+    task = await Task.objects.acreate(
+        user_id=user.pk, **serializer.validated_data,
+    )
+    await task_list_cache.ainvalidate(user.pk)
+    return JsonResponse(
+        await render_task(user, task.pk), status=status.HTTP_201_CREATED,
+    )
+
+
+@async_api_view(['GET', 'POST'])
+async def tasks_view(request: HttpRequest, user: TokenUser) -> JsonResponse:
+    """List the tasks of the user or create a task."""
+
+    if request.method == 'POST':
+        return await create_task(request, user)
+    return await list_tasks(request, user)
+
+
+@async_api_view(['GET', 'PUT', 'PATCH'])
+async def task_view(
+    request: HttpRequest, user: TokenUser, pk: int,
+) -> JsonResponse:
+    """Retrieve or update a task of the user."""
+
+    if request.method == 'GET':
+        return JsonResponse(await render_task(user, pk))
+    task = await get_task(user, pk)
+    serializer = TaskSerializer(
+        task, data=get_data(request), partial=request.method == 'PATCH',
+    )
+    serializer.is_valid(raise_exception=True)
+    for attr, value in serializer.validated_data.items():
+        setattr(task, attr, value)
+    await task.asave(update_fields=[*serializer.validated_data, 'updated_at'])
+    await task_list_cache.ainvalidate(user.pk)
+    return JsonResponse(TaskSerializer(task).data)
+
+
+@async_api_view(['POST'])
+async def task_mark_completed_view(
+    request: HttpRequest, user: TokenUser, pk: int,
+) -> JsonResponse:
+    """Mark the task as completed."""
+
+    updated = await Task.objects.filter(user_id=user.pk, pk=pk) \
+        .aupdate(status='completed', updated_at=timezone.now())
+    if not updated:
+        raise NotFound('No Task matches the given query.')
+    await task_list_cache.ainvalidate(user.pk)
+    return JsonResponse(await render_task(user, pk))
@@ -0,0 +1,125 @@
+import time
+from hashlib import md5
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.http import urlencode
+from mysite.metrics import Counter
+from mysite.routers import apin_primary, pin_primary
+from rest_framework.request import Request
+
+
+class TaskListCache:
+    """
+    Cache of the task list responses per user, filter and page.
+
+    The keys embed a per-user version number, so a write invalidates all
+    cached pages of its owner with a single increment; the stale entries
+    simply expire. A missing version starts from the current time, so an
+    evicted counter never brings old entries back.
+
+    The invalidations only reach the processes sharing the cache: several
+    server processes, or a job worker, need a shared backend like Redis.
+    """
+
+    key_prefix = 'tasks:list'
+
+    def __init__(self, alias: str = 'default') -> None:
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[self.alias]
+
+    def check_shared(self, processes: str) -> None:
+        """
+        Raise ImproperlyConfigured when the cache is local to the process,
+        where the invalidations of the other `processes` would be missed.
+        """
+
+        if isinstance(self.cache, LocMemCache):
+            raise ImproperlyConfigured(
+                f'{processes} need a cache shared by the processes, the '
+                f'`{self.alias}` cache is local to each one: set '
+                f'DJANGO_CACHE_BACKEND and DJANGO_CACHE_LOCATION.'
+            )
+
+    def get_version_key(self, user_id: Any) -> str:
+        return f'{self.key_prefix}:version:{user_id}'
+
+    def get_version(self, user_id: Any) -> int:
+        key = self.get_version_key(user_id)
+        version: Optional[int] = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, time.time_ns(), timeout=None)
+            version = self.cache.get(key, 0)
+        return int(version or 0)
+
+    def get_key(self, request: Request) -> str:
+        """Return the key of the list page requested by the user."""
+
+        user_id = request.user.pk
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        url = request.build_absolute_uri(request.path)
+        digest = md5(
+            f'{url}?{query}'.encode(), usedforsecurity=False,
+        ).hexdigest()
+        return f'{self.key_prefix}:{user_id}:' \
+               f'{self.get_version(user_id)}:{digest}'
+
+    def get(self, key: str) -> Any:
+        data = self.cache.get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def set(self, key: str, data: Any) -> None:
+        self.cache.set(key, data, timeout=settings.TASKS_CACHE_TIMEOUT)
+
+    def invalidate(self, user_id: Any) -> None:
+        """
+        Drop every cached list page of the user.
+
+        The reads of the user are pinned to the primary for the replication
+        lag too, so a stale replica can't fill the cache again.
+        """
+
+        pin_primary(user_id)
+        try:
+            self.cache.incr(self.get_version_key(user_id))
+        except ValueError:
+            pass  # no version yet, so nothing is cached for the user
+
+    async def ainvalidate(self, user_id: Any) -> None:
+        await apin_primary(user_id)
+        try:
+            await self.cache.aincr(self.get_version_key(user_id))
+        except ValueError:
+            pass
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def get_counter(self) -> Counter:
+        """Return the lookups as a counter of the metrics."""
+
+        counter = Counter(
+            'task_list_cache_requests_total', 'Task list cache lookups.',
+            ('result',),
+        )
+        for result, value in self.get_stats().items():
+            counter.inc((result,), value)
+        return counter
+
+
+task_list_cache = TaskListCache()
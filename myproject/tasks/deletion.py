@@ -0,0 +1,75 @@
+from typing import Any, Callable, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from users.models import User
+
+from .cache import task_list_cache
+from .models import Task, TaskStatusCounter, TaskTombstone
+
+# called with the number of tasks deleted so far and their total
+Progress = Callable[[int, int], None]
+
+
+def iter_delete(
+    queryset: QuerySet[Any],
+    chunk_size: int,
+    before: Optional[Callable[[List[Any]], Any]] = None,
+) -> Iterator[int]:
+    """
+    Delete the rows of the queryset a chunk per transaction, yielding the
+    number of rows deleted by every chunk.
+
+    Only the ids are read, in keyset order: the rows of a model without
+    delete signals nor cascades go in a single `DELETE` per chunk. Each
+    transaction locks a chunk only, so the concurrent writes never wait
+    for the whole deletion. `before` is called with the ids of every
+    chunk, locked, in the transaction deleting them.
+    """
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    last = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(pks.filter(pk__gt=last).select_for_update()[
+                :chunk_size
+            ])
+            if not chunk:
+                return
+            if before is not None:
+                before(chunk)
+            deleted, _ = queryset.filter(pk__in=chunk).delete()
+        last = chunk[-1]
+        yield deleted
+
+
+def delete_user(user_id: int, progress: Optional[Progress] = None) -> int:
+    """
+    Delete the user after its tasks and their tombstones, deleted in
+    chunks of `TASKS_JOB_CHUNK_SIZE` rows.
+
+    The final delete of the user only cascades to its small tables and to
+    the tasks created meanwhile. Return the number of tasks deleted.
+    """
+    chunk_size = settings.TASKS_JOB_CHUNK_SIZE
+    total = TaskStatusCounter.get_stats(user_id)['total']
+    tasks = Task.objects.filter(user_id=user_id)
+    done = 0
+    for deleted in iter_delete(tasks, chunk_size):
+        done += deleted
+        if progress is not None:
+            progress(done, max(done, total))
+    tombstones = TaskTombstone.objects.filter(user_id=user_id)
+    for _ in iter_delete(tombstones, chunk_size):
+        pass
+    with transaction.atomic():
+        # lock like the writers of tasks, the counters then the user at the
+        # deferred foreign key check: the tasks created meanwhile either
+        # commit before the cascade or fail after it, without a deadlock
+        counters = TaskStatusCounter.objects.filter(user_id=user_id)
+        list(counters.select_for_update().values_list('pk', flat=True))
+        users = User.objects.filter(pk=user_id)
+        list(users.select_for_update().values_list('pk', flat=True))
+        users.delete()
+    task_list_cache.invalidate(user_id)
+    return done
@@ -0,0 +1,64 @@
+import re
+from typing import Any, Dict, List, TypeVar
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Model, QuerySet
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from .models import SEARCH_CONFIG
+
+WORD_RE = re.compile(r'\w+')
+
+_Model = TypeVar('_Model', bound=Model)
+_Row = TypeVar('_Row')
+
+
+class TaskSearchFilter(BaseFilterBackend):
+    """
+    Full-text search of the task titles and descriptions, best first.
+
+    The query is parsed like a web search: `"exact phrase"`, `or`, `-word`.
+    A single word also matches the words it starts, so short queries such
+    as `proj` find `Project plan`. Both modes are served by the GIN index
+    of `Task.search_vector`; the title weighs more than the description in
+    the ranking.
+    """
+
+    search_param = 'search'
+    search_description = 'Search the title and description of the tasks, ' \
+                         'e.g. `report -draft` or `"weekly report"`. ' \
+                         'The best matches come first.'
+
+    def get_search_query(self, terms: str) -> SearchQuery:
+        if WORD_RE.fullmatch(terms):
+            return SearchQuery(
+                f'{terms}:*', config=SEARCH_CONFIG, search_type='raw',
+            )
+        return SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+
+    def filter_queryset(
+        self,
+        request: Request,
+        queryset: QuerySet[_Model, _Row],
+        view: APIView,
+    ) -> QuerySet[_Model, _Row]:
+        terms = request.query_params.get(self.search_param, '').strip()
+        if not terms:
+            return queryset
+        query = self.get_search_query(terms)
+        return queryset.filter(search_vector=query).order_by(
+            SearchRank(F('search_vector'), query).desc(), '-pk',
+        )
+
+    def get_schema_operation_parameters(
+            self, view: APIView,
+    ) -> List[Dict[str, Any]]:
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': self.search_description,
+            'schema': {'type': 'string'},
+        }]
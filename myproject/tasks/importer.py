@@ -0,0 +1,262 @@
+import csv
+import json
+from concurrent import futures
+from io import StringIO
+from itertools import islice
+from multiprocessing import get_context
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    cast,
+)
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import Field
+from django.utils import timezone
+
+from .models import Task
+from .renderers import flatten
+
+User = get_user_model()
+
+# (line number, raw row): a parsed CSV row or an unparsed NDJSON line
+Record = Tuple[int, Any]
+# (line number, errors by field)
+Rejected = Tuple[int, Dict[str, List[str]]]
+# (line number, values of the task)
+Valid = Tuple[int, Dict[str, Any]]
+
+FORMATS = ['csv', 'ndjson']
+
+
+class ChunkResult:
+    """Outcome of the import of a chunk of records."""
+
+    def __init__(
+        self,
+        imported: int = 0,
+        rejected: Optional[List[Rejected]] = None,
+        user_ids: Optional[Set[int]] = None,
+    ) -> None:
+        self.imported = imported
+        self.rejected = rejected or []
+        self.user_ids = user_ids or set()
+
+
+def iter_records(file: IO[str], format: str) -> Iterator[Record]:
+    """Yield the records of the file with their line numbers."""
+    if format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for number, line in enumerate(file, 1):
+            if line.strip():
+                yield number, line
+
+
+def iter_chunks(records: Iterable[Record], size: int) -> Iterator[List[Record]]:
+    iterator = iter(records)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class TaskImporter:
+    """
+    Validates records of tasks and inserts them by chunks.
+
+    The fields are checked with the constraints of the Task model fields,
+    the owners with a single query per chunk. The valid rows of a chunk are
+    inserted in one transaction, with `COPY` or `bulk_create()`. When the
+    database refuses the chunk, its rows are inserted one by one and the
+    failing ones rejected, instead of failing the import.
+    """
+
+    fields = ['title', 'description', 'status']
+    user_keys = ['user.pk', 'user', 'user_id']
+    methods = ['copy', 'bulk']
+
+    def __init__(
+        self, user_id: Optional[int] = None, method: str = 'copy',
+    ) -> None:
+        self.user_id = user_id
+        self.method = method
+
+    def parse(self, raw: Any) -> Dict[str, Any]:
+        """Return the record as a flat dict, e.g. with a `user.pk` key."""
+
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except ValueError as exc:
+                raise ValidationError(f'Invalid JSON: {exc}.')
+        if not isinstance(raw, dict):
+            raise ValidationError('Expected a JSON object.')
+        return flatten(raw)
+
+    def get_user_id(self, row: Dict[str, Any]) -> int:
+        value: Any = self.user_id or next(
+            (row[key] for key in self.user_keys
+             if row.get(key) not in (None, '')),
+            None,
+        )
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValidationError('A valid user id is required.')
+
+    def clean_field(self, name: str, row: Dict[str, Any]) -> Any:
+        if name == 'user':
+            return self.get_user_id(row)
+        field = cast('Field[Any, Any]', Task._meta.get_field(name))
+        value = row.get(name)
+        if value in (None, ''):  # e.g. an empty CSV column
+            value = field.get_default()
+        return field.clean(value, None)
+
+    def clean(self, raw: Any) -> Dict[str, Any]:
+        """Return the values of the task, raise ValidationError if invalid."""
+
+        row = self.parse(raw)
+        values: Dict[str, Any] = {}
+        errors: Dict[str, List[str]] = {}
+        for name in [*self.fields, 'user']:
+            try:
+                values[name] = self.clean_field(name, row)
+            except ValidationError as exc:
+                errors[name] = exc.messages
+        if errors:
+            raise ValidationError(errors)
+        values['user_id'] = values.pop('user')
+        return values
+
+    def clean_records(
+        self, records: List[Record], result: ChunkResult,
+    ) -> List[Valid]:
+        """Return the valid records, adding the others to the rejected."""
+
+        valid = []
+        for number, raw in records:
+            try:
+                valid.append((number, self.clean(raw)))
+            except ValidationError as exc:
+                errors = exc.message_dict if hasattr(exc, 'error_dict') \
+                    else {'row': exc.messages}
+                result.rejected.append((number, errors))
+        return valid
+
+    def check_users(
+        self, valid: List[Valid], result: ChunkResult,
+    ) -> List[Valid]:
+        """Return the tasks of existing users, rejecting the others."""
+
+        existing = set(User.objects.filter(
+            pk__in={values['user_id'] for _, values in valid},
+        ).values_list('pk', flat=True))
+        tasks = []
+        for number, values in valid:
+            if values['user_id'] in existing:
+                tasks.append((number, values))
+            else:
+                result.rejected.append((number, {'user': [
+                    f'User {values["user_id"]} does not exist.',
+                ]}))
+        return tasks
+
+    def import_chunk(self, records: List[Record]) -> ChunkResult:
+        result = ChunkResult()
+        tasks = self.check_users(self.clean_records(records, result), result)
+        try:
+            self.insert(tasks)
+        except (DatabaseError, ValueError):
+            tasks = self.insert_each(tasks, result)
+        result.imported = len(tasks)
+        result.user_ids = {values['user_id'] for _, values in tasks}
+        return result
+
+    def insert(self, tasks: List[Valid]) -> None:
+        with transaction.atomic():
+            getattr(self, f'insert_{self.method}')(
+                [values for _, values in tasks],
+            )
+
+    def insert_each(
+        self, tasks: List[Valid], result: ChunkResult,
+    ) -> List[Valid]:
+        """Insert the tasks one by one, rejecting the ones that fail."""
+
+        inserted = []
+        for task in tasks:
+            try:
+                self.insert([task])
+            except (DatabaseError, ValueError) as exc:
+                message = str(exc).strip().partition('\n')[0]
+                result.rejected.append((task[0], {'row': [message]}))
+            else:
+                inserted.append(task)
+        return inserted
+
+    def insert_bulk(self, tasks: List[Dict[str, Any]]) -> None:
+        Task.objects.bulk_create(Task(**values) for values in tasks)
+
+    def insert_copy(self, tasks: List[Dict[str, Any]]) -> None:
+        """Insert the tasks with a single `COPY ... FROM STDIN`."""
+
+        if not tasks:
+            return
+        columns = ['user_id', *self.fields, 'updated_at']
+        data = StringIO()
+        writer = csv.writer(data)
+        now = timezone.now().isoformat()
+        writer.writerows(
+            [*(values[name] for name in columns[:-1]), now]
+            for values in tasks
+        )
+        data.seek(0)
+        # empty strings are NULL in the CSV format of COPY otherwise
+        sql = f'COPY {Task._meta.db_table} ({", ".join(columns)}) ' \
+              f'FROM STDIN WITH (FORMAT csv, ' \
+              f'FORCE_NOT_NULL ({", ".join(self.fields)}))'
+        with connection.cursor() as cursor, connection.wrap_database_errors:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):  # psycopg2
+                raw.copy_expert(sql, data)
+            else:
+                with raw.copy(sql) as copy:
+                    copy.write(data.getvalue())
+
+
+def run_import(
+    importer: TaskImporter, chunks: Iterable[List[Record]], workers: int = 1,
+) -> Iterator[ChunkResult]:
+    """
+    Import the chunks, in that many forked processes for `workers` > 1.
+
+    At most two chunks per worker are read ahead, so the memory stays
+    bounded whatever the size of the file.
+    """
+    if workers == 1:
+        yield from map(importer.import_chunk, chunks)
+        return
+    connections.close_all()  # the workers must open their own
+    with futures.ProcessPoolExecutor(
+            workers, mp_context=get_context('fork'),
+    ) as pool:
+        pending: Set[futures.Future[ChunkResult]] = set()
+        for chunk in chunks:
+            if len(pending) >= workers * 2:
+                done, pending = futures.wait(
+                    pending, return_when=futures.FIRST_COMPLETED,
+                )
+                yield from (future.result() for future in done)
+            pending.add(pool.submit(importer.import_chunk, chunk))
+        yield from (future.result() for future in futures.wait(pending).done)
@@ -0,0 +1,117 @@
+from functools import partial
+from tempfile import TemporaryFile
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from jobs.models import Job
+from jobs.registry import register
+
+from .cache import task_list_cache
+from .deletion import iter_delete
+from .models import Task, TaskTombstone
+from .renderers import CSVRenderer, NDJSONRenderer, StreamingRenderer
+from .serializers import TaskRowSerializer
+
+EXPORT_RENDERERS = {
+    renderer.format: renderer for renderer in [NDJSONRenderer, CSVRenderer]
+}
+
+
+def run_in_chunks(
+    job: Job,
+    user_id: int,
+    tasks: QuerySet[Task],
+    process: Callable[[List[int]], Any],
+) -> int:
+    """
+    Call `process` with the ids of the user's tasks, a chunk at a time.
+
+    Every chunk is processed in its own transaction and must leave the
+    queryset, so that a retried job resumes after the committed chunks.
+    Return the number of tasks processed over all attempts.
+    """
+    job.set_progress(job.done, job.done + tasks.count())
+    pks = tasks.order_by('pk').values_list('pk', flat=True)
+    while True:
+        with transaction.atomic():
+            chunk = list(pks.select_for_update()[
+                :settings.TASKS_JOB_CHUNK_SIZE
+            ])
+            if not chunk:
+                return job.done
+            process(chunk)
+        task_list_cache.invalidate(user_id)
+        job.set_progress(job.done + len(chunk))
+
+
+@register('tasks.mark_completed')
+def mark_completed(job: Job) -> Dict[str, int]:
+    """Mark the user's tasks with the `status` as completed."""
+
+    tasks = Task.objects.filter(
+        user_id=job.user_id, status=job.params['status'],
+    ).exclude(status='completed')
+
+    def complete(pks: List[int]) -> None:
+        Task.objects.filter(pk__in=pks) \
+            .update(status='completed', updated_at=timezone.now())
+
+    return {'updated': run_in_chunks(job, job.user_id, tasks, complete)}
+
+
+@register('tasks.purge')
+def purge(job: Job) -> Dict[str, int]:
+    """Delete all tasks of the `user`, keeping tombstones for their sync."""
+
+    user_id = job.params['user']
+    tasks = Task.objects.filter(user_id=user_id)
+    job.set_progress(job.done, job.done + tasks.count())
+    for deleted in iter_delete(
+        tasks, settings.TASKS_JOB_CHUNK_SIZE,
+        partial(TaskTombstone.record, user_id),
+    ):
+        task_list_cache.invalidate(user_id)
+        job.set_progress(job.done + deleted)
+    return {'deleted': job.done}
+
+
+def iter_progress(job: Job, rows: Iterable[Any]) -> Iterator[Any]:
+    """Yield the rows, saving the progress of the job every chunk."""
+
+    done = 0
+    for done, row in enumerate(rows, 1):
+        if done % settings.TASKS_EXPORT_CHUNK_SIZE == 0:
+            job.set_progress(done)
+        yield row
+    job.set_progress(done)
+
+
+@register('tasks.export')
+def export(job: Job) -> Dict[str, Any]:
+    """
+    Write the tasks with the `filters` to a file of the storage, in the
+    `format` of the export endpoint, with the `fields` (all by default).
+    """
+    renderer: StreamingRenderer = EXPORT_RENDERERS[job.params['format']]()
+    serializer = TaskRowSerializer(job.params.get('fields'))
+    tasks = Task.objects.filter(**job.params['filters']).order_by('pk')
+    job.set_progress(0, tasks.count())
+    rows = serializer.get_rows(tasks).iterator(
+        chunk_size=settings.TASKS_EXPORT_CHUNK_SIZE,
+    )
+    with TemporaryFile() as file:
+        for chunk in renderer.iter_render(
+            map(serializer.to_representation, iter_progress(job, rows)),
+            serializer.get_flat_fields(),
+        ):
+            file.write(chunk)
+        file.seek(0)
+        name = default_storage.save(
+            f'exports/tasks-{job.pk}.{renderer.format}', File(file),
+        )
+    return {'file': name, 'rows': job.done}
@@ -0,0 +1,44 @@
+import time
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from tasks.deletion import delete_user
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Delete users with their tasks, deleted in chunks of ' \
+           'TASKS_JOB_CHUNK_SIZE tasks per transaction.'
+
+    # seconds between the progress lines
+    progress_interval = 5.0
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('usernames', nargs='+', metavar='username')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        usernames = options['usernames']
+        users = dict(User.objects.filter(username__in=usernames)
+                     .values_list('username', 'pk'))
+        missing = [name for name in usernames if name not in users]
+        if missing:
+            raise CommandError(f'Unknown user(s): {", ".join(missing)}.')
+        for username, pk in users.items():
+            start = time.monotonic()
+            reported = start
+
+            def progress(done: int, total: int) -> None:
+                nonlocal reported
+                if time.monotonic() - reported >= self.progress_interval:
+                    reported = time.monotonic()
+                    self.stdout.write(
+                        f'{username}: {done} of {total} tasks deleted...',
+                    )
+
+            deleted = delete_user(pk, progress)
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {username} and {deleted} tasks '
+                f'in {time.monotonic() - start:.1f}s.'
+            ))
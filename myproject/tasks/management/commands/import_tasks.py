@@ -0,0 +1,119 @@
+import sys
+import time
+from argparse import ArgumentTypeError
+from contextlib import nullcontext
+from pathlib import Path
+from typing import IO, Any, ContextManager, Dict, List, Set
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from tasks.cache import task_list_cache
+from tasks.importer import (
+    FORMATS,
+    TaskImporter,
+    iter_chunks,
+    iter_records,
+    run_import,
+)
+
+User = get_user_model()
+
+EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+
+def positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise ArgumentTypeError(f'{value!r} is not a positive integer.')
+    return number
+
+
+class Command(BaseCommand):
+    help = 'Import tasks from a CSV or NDJSON file, e.g. a task export.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            'path', help='File to import, `-` for the standard input.',
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Format of the file, guessed from its extension by default.',
+        )
+        parser.add_argument(
+            '--user',
+            help='Username of the owner of all the tasks, instead of the '
+                 '`user`, `user.pk` or `user_id` column.',
+        )
+        parser.add_argument(
+            '--method', choices=TaskImporter.methods, default='copy',
+            help='Insert with COPY (default) or bulk_create().',
+        )
+        parser.add_argument(
+            '--chunk-size', type=positive_int, default=5000,
+            help='Number of rows validated and inserted at a time.',
+        )
+        parser.add_argument(
+            '--workers', type=positive_int, default=1,
+            help='Number of processes validating and inserting the chunks.',
+        )
+
+    def get_format(self, path: str, format: Any) -> str:
+        format = format or EXTENSIONS.get(Path(path).suffix.lower())
+        if format is None:
+            raise CommandError('Unknown file format, use --format.')
+        return str(format)
+
+    def get_user_id(self, username: Any) -> Any:
+        if username is None:
+            return None
+        user_id = User.objects.filter(username=username) \
+            .values_list('pk', flat=True).first()
+        if user_id is None:
+            raise CommandError(f'User `{username}` does not exist.')
+        return user_id
+
+    def open(self, path: str) -> ContextManager[IO[str]]:
+        if path == '-':
+            return nullcontext(sys.stdin)
+        try:
+            return open(path, newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc.strerror}.')
+
+    def report(self, number: int, errors: Dict[str, List[str]]) -> None:
+        self.stderr.write(f'Line {number}: ' + '; '.join(
+            f'{field}: {" ".join(messages)}'
+            for field, messages in errors.items()
+        ))
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        # the imported tasks invalidate the cached task lists of the server
+        # processes
+        task_list_cache.check_shared('The imports')
+        format = self.get_format(options['path'], options['format'])
+        importer = TaskImporter(
+            self.get_user_id(options['user']), options['method'],
+        )
+        start = time.monotonic()
+        imported = rejected = 0
+        user_ids: Set[int] = set()
+        with self.open(options['path']) as file:
+            chunks = iter_chunks(
+                iter_records(file, format), options['chunk_size'],
+            )
+            for result in run_import(importer, chunks, options['workers']):
+                imported += result.imported
+                rejected += len(result.rejected)
+                user_ids.update(result.user_ids)
+                for number, errors in result.rejected:
+                    self.report(number, errors)
+        for user_id in user_ids:
+            task_list_cache.invalidate(user_id)
+        style = self.style.WARNING if rejected else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Imported {imported} tasks, rejected {rejected} rows '
+            f'in {time.monotonic() - start:.1f}s.'
+        ))
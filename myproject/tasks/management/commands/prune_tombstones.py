@@ -0,0 +1,27 @@
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.deletion import iter_delete
+from tasks.models import TaskTombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete the tombstones of the tasks deleted more than ' \
+           'TASKS_TOMBSTONE_RETENTION days ago, in chunks of ' \
+           'TASKS_JOB_CHUNK_SIZE tombstones per transaction. The change ' \
+           'tokens of the delta sync expire with them.'
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        days = settings.TASKS_TOMBSTONE_RETENTION
+        tombstones = TaskTombstone.objects.filter(
+            deleted_at__lt=timezone.now() - timedelta(days=days),
+        )
+        deleted = sum(
+            iter_delete(tombstones, settings.TASKS_JOB_CHUNK_SIZE),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} tombstones older than {days} days.'
+        ))
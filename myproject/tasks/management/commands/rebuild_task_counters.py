@@ -0,0 +1,39 @@
+import time
+from typing import Any, Optional
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from tasks.models import TaskStatusCounter
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recount the tasks by user and status behind the task stats.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--user', action='append', dest='usernames',
+            help='Username whose counters to rebuild, all users by default. '
+                 'Repeat for several users.',
+        )
+
+    def get_user_ids(self, usernames: Any) -> Optional[Any]:
+        if not usernames:
+            return None
+        users = dict(User.objects.filter(username__in=usernames)
+                     .values_list('username', 'pk'))
+        missing = [name for name in usernames if name not in users]
+        if missing:
+            raise CommandError(f'Unknown user(s): {", ".join(missing)}.')
+        return list(users.values())
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        user_ids = self.get_user_ids(options['usernames'])
+        start = time.monotonic()
+        wrong = TaskStatusCounter.rebuild(user_ids)
+        style = self.style.WARNING if wrong else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Fixed {wrong} wrong counters '
+            f'in {time.monotonic() - start:.1f}s.'
+        ))
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The counters are updated once per statement from its transition tables,
+# so a bulk update or a COPY costs a grouped upsert, not a trigger per row.
+# The decrements are plain updates: the counters of a deleted user may be
+# deleted before the tasks. The existing tasks are counted by a separate
+# migration, in batches of users.
+COUNTER_TRIGGERS = """
+CREATE FUNCTION tasks_count_inserted() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO tasks_taskstatuscounter (user_id, status, count)
+    SELECT user_id, status, count(*) FROM new_rows
+    GROUP BY user_id, status ORDER BY user_id, status
+    ON CONFLICT (user_id, status) DO UPDATE
+    SET count = tasks_taskstatuscounter.count + excluded.count;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION tasks_count_deleted() RETURNS trigger AS $$
+BEGIN
+    UPDATE tasks_taskstatuscounter AS counter
+    SET count = counter.count - deleted.count
+    FROM (
+        SELECT user_id, status, count(*) AS count FROM old_rows
+        GROUP BY user_id, status
+    ) AS deleted
+    WHERE counter.user_id = deleted.user_id
+    AND counter.status = deleted.status;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION tasks_count_updated() RETURNS trigger AS $$
+BEGIN
+    UPDATE tasks_taskstatuscounter AS counter
+    SET count = counter.count - moved.count
+    FROM (
+        SELECT old_rows.user_id, old_rows.status, count(*) AS count
+        FROM old_rows JOIN new_rows USING (id)
+        WHERE (old_rows.user_id, old_rows.status)
+            <> (new_rows.user_id, new_rows.status)
+        GROUP BY old_rows.user_id, old_rows.status
+    ) AS moved
+    WHERE counter.user_id = moved.user_id AND counter.status = moved.status;
+    INSERT INTO tasks_taskstatuscounter (user_id, status, count)
+    SELECT new_rows.user_id, new_rows.status, count(*)
+    FROM old_rows JOIN new_rows USING (id)
+    WHERE (old_rows.user_id, old_rows.status)
+        <> (new_rows.user_id, new_rows.status)
+    GROUP BY new_rows.user_id, new_rows.status
+    ORDER BY new_rows.user_id, new_rows.status
+    ON CONFLICT (user_id, status) DO UPDATE
+    SET count = tasks_taskstatuscounter.count + excluded.count;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tasks_count_inserted AFTER INSERT ON tasks_task
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION tasks_count_inserted();
+
+CREATE TRIGGER tasks_count_deleted AFTER DELETE ON tasks_task
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION tasks_count_deleted();
+
+CREATE TRIGGER tasks_count_updated AFTER UPDATE ON tasks_task
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION tasks_count_updated();
+
+"""
+
+DROP_COUNTER_TRIGGERS = """
+DROP TRIGGER tasks_count_inserted ON tasks_task;
+DROP TRIGGER tasks_count_deleted ON tasks_task;
+DROP TRIGGER tasks_count_updated ON tasks_task;
+DROP FUNCTION tasks_count_inserted();
+DROP FUNCTION tasks_count_deleted();
+DROP FUNCTION tasks_count_updated();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_changes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('new', 'New'), ('in_progress', 'In progress'), ('completed', 'Completed')], max_length=20)),
+                ('count', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'status'), name='task_counter_user_status_uniq')],
+            },
+        ),
+        migrations.RunSQL(COUNTER_TRIGGERS, DROP_COUNTER_TRIGGERS),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:28
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+# A stored generated column would rewrite the table under an ACCESS
+# EXCLUSIVE lock. The vector is a nullable column instead, kept up to date
+# by a trigger on the writes of the title and the description, and the
+# existing rows are backfilled in batches of their own transactions.
+SEARCH_VECTOR = """
+setweight(to_tsvector('english', coalesce({row}title, '')), 'A')
+|| setweight(to_tsvector('english', coalesce({row}description, '')), 'B')
+"""
+
+SEARCH_VECTOR_TRIGGER = f"""
+CREATE FUNCTION tasks_update_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR.format(row='NEW.')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tasks_update_search_vector
+BEFORE INSERT OR UPDATE OF title, description ON tasks_task
+FOR EACH ROW EXECUTE FUNCTION tasks_update_search_vector();
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER tasks_update_search_vector ON tasks_task;
+DROP FUNCTION tasks_update_search_vector();
+"""
+
+BACKFILL_BATCH = f"""
+WITH batch AS (
+    UPDATE tasks_task SET search_vector = {SEARCH_VECTOR.format(row='')}
+    WHERE id IN (
+        SELECT id FROM tasks_task WHERE id > %s ORDER BY id LIMIT %s
+    )
+    RETURNING id
+)
+SELECT max(id) FROM batch
+"""
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_search_vector(apps, schema_editor):
+    last_id = 0
+    with schema_editor.connection.cursor() as cursor:
+        while last_id is not None:
+            cursor.execute(BACKFILL_BATCH, [last_id, BACKFILL_BATCH_SIZE])
+            last_id, = cursor.fetchone()
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0006_task_status_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+        migrations.RunPython(
+            backfill_search_vector, migrations.RunPython.noop,
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+        ),
+    ]
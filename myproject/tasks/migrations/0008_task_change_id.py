@@ -0,0 +1,90 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:37
+
+from django.conf import settings
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+
+# The change id is the 64-bit id of the writing transaction. The delta sync
+# only serves the changes below the oldest transaction still running, so a
+# late commit never lands behind a token already handed out. The columns
+# are added with a constant default, which does not rewrite the tables: the
+# existing rows come first in the feed.
+CHANGE_ID_TRIGGERS = """
+CREATE FUNCTION tasks_set_change_id() RETURNS trigger AS $$
+BEGIN
+    NEW.change_id := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION tasks_record_moved() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO tasks_tasktombstone (user_id, task_id, deleted_at)
+    SELECT old_rows.user_id, old_rows.id, now()
+    FROM old_rows JOIN new_rows USING (id)
+    WHERE old_rows.user_id <> new_rows.user_id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tasks_set_change_id BEFORE INSERT OR UPDATE ON tasks_task
+FOR EACH ROW EXECUTE FUNCTION tasks_set_change_id();
+
+CREATE TRIGGER tasks_set_change_id BEFORE INSERT ON tasks_tasktombstone
+FOR EACH ROW EXECUTE FUNCTION tasks_set_change_id();
+
+CREATE TRIGGER tasks_record_moved AFTER UPDATE ON tasks_task
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION tasks_record_moved();
+"""
+
+DROP_CHANGE_ID_TRIGGERS = """
+DROP TRIGGER tasks_record_moved ON tasks_task;
+DROP TRIGGER tasks_set_change_id ON tasks_tasktombstone;
+DROP TRIGGER tasks_set_change_id ON tasks_task;
+DROP FUNCTION tasks_record_moved();
+DROP FUNCTION tasks_set_change_id();
+"""
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0007_task_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='change_id',
+            field=models.BigIntegerField(db_default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tasktombstone',
+            name='change_id',
+            field=models.BigIntegerField(db_default=0, editable=False),
+        ),
+        migrations.RunSQL(CHANGE_ID_TRIGGERS, DROP_CHANGE_ID_TRIGGERS),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['user', 'change_id', 'id'], name='task_user_change_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='tasktombstone',
+            index=models.Index(fields=['user', 'change_id', 'task_id'], name='tombstone_user_change_id_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='task',
+            name='task_user_updated_at_id_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='tasktombstone',
+            name='tombstone_user_deleted_idx',
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import migrations, transaction
+
+# The triggers of 0006 count the writes since, the existing tasks are counted
+# here one batch of users at a time, each in its own transaction. The lock
+# keeps the writes from moving the counts while a batch is recounted, and is
+# only held for the tasks of the batch, read from the user index.
+BACKFILL_BATCH = """
+LOCK TABLE tasks_task IN SHARE MODE;
+DELETE FROM tasks_taskstatuscounter WHERE user_id = ANY(%(user_ids)s);
+INSERT INTO tasks_taskstatuscounter (user_id, status, count)
+SELECT user_id, status, count(*) FROM tasks_task
+WHERE user_id = ANY(%(user_ids)s) GROUP BY user_id, status;
+"""
+
+BACKFILL_BATCH_SIZE = 100
+
+
+def backfill_task_status_counters(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    connection = schema_editor.connection
+    user_ids = list(User.objects.using(connection.alias)
+                    .order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(user_ids), BACKFILL_BATCH_SIZE):
+        batch = user_ids[start:start + BACKFILL_BATCH_SIZE]
+        with transaction.atomic(using=connection.alias), \
+                connection.cursor() as cursor:
+            cursor.execute(BACKFILL_BATCH, {'user_ids': batch})
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0008_task_change_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_task_status_counters, migrations.RunPython.noop,
+        ),
+    ]
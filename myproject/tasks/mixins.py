@@ -0,0 +1,212 @@
+from hashlib import md5
+from typing import Any, List, Optional
+
+from django.db.models import QuerySet
+from django.utils.cache import get_conditional_response
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+
+from .cache import task_list_cache
+from .models import Task
+from .serializers import TaskRowSerializer, TaskSerializer
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        name='fields',
+        description='Comma separated task fields to return, '
+                    'e.g. `pk,title,status`. All fields by default.',
+    ),
+    OpenApiParameter(
+        name='expand',
+        description='Comma separated relations to add to `fields`: `user`.',
+    ),
+]
+
+
+def split_query_param(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def make_etag(*parts: Any) -> str:
+    """Return a strong ETag built from the parts of a representation."""
+    digest = md5(
+        ':'.join(map(str, parts)).encode(), usedforsecurity=False,
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The task has been modified since it was fetched.'
+    default_code = 'precondition_failed'
+
+
+class SparseFieldsetMixin(GenericAPIView[Task]):
+    """
+    Lets clients ask only for the task fields they need.
+
+    `?fields=pk,title` limits the response to the listed fields and
+    `?expand=user` adds the nested owner to them. The queryset is narrowed
+    to the matching columns, and the user join is skipped when the owner
+    is not requested.
+    """
+
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    expandable_fields = ['user']
+
+    def get_sparse_fields(self) -> Optional[List[str]]:
+        """Return the requested fields or None when all are requested."""
+
+        query_params = self.request.query_params
+        fields = split_query_param(query_params.get(self.fields_query_param))
+        if self.request.method not in SAFE_METHODS or not fields:
+            return None
+        expand = split_query_param(query_params.get(self.expand_query_param))
+        errors = {}
+        unknown = set(fields).difference(TaskSerializer.Meta.fields)
+        if unknown:
+            errors[self.fields_query_param] = [
+                f'Unknown field(s): {", ".join(sorted(unknown))}.',
+            ]
+        unknown = set(expand).difference(self.expandable_fields)
+        if unknown:
+            errors[self.expand_query_param] = [
+                f'Unknown relation(s): {", ".join(sorted(unknown))}.',
+            ]
+        if errors:
+            raise ValidationError(errors)
+        return [*fields, *set(expand).difference(fields)]
+
+    def select_fields(self, queryset: QuerySet[Task]) -> QuerySet[Task]:
+        """Narrow the queryset to the columns of the requested fields."""
+
+        if self.request.method not in SAFE_METHODS:
+            return queryset.select_related('user')
+        fields = self.get_sparse_fields() or TaskSerializer.Meta.fields
+        columns = [name for name in fields if name not in ('pk', 'user')]
+        if 'user' in fields:
+            queryset = queryset.select_related('user')
+            columns.extend(
+                f'user__{name}' for name in TaskRowSerializer.user_fields
+            )
+        # `user` stays loaded as the owner id for the permission checks
+        # and `updated_at` for the ETag
+        return queryset.only('user', 'updated_at', *columns)
+
+    def get_serializer(
+            self, *args: Any, **kwargs: Any,
+    ) -> BaseSerializer[Task]:
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class FastListMixin(SparseFieldsetMixin):
+    """
+    Lists tasks through TaskRowSerializer instead of TaskSerializer.
+
+    Rows are read with `QuerySet.values()` and rendered into plain dicts,
+    which keeps the JSON of the list unchanged at a fraction of the cost.
+    The paginators count the tasks of `get_count_queryset()` instead of the
+    rows, without the join of the user columns.
+    """
+
+    def get_count_queryset(self) -> QuerySet[Task]:
+        return self.filter_queryset(self.get_queryset())
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        serializer = TaskRowSerializer(self.get_sparse_fields())
+        queryset = self.filter_queryset(self.get_queryset())
+        # the cursor paginator reads its position from `pk`, selected even
+        # when it is not among the requested fields
+        rows = serializer.get_rows(queryset, 'pk')
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(rows))
+
+
+class ConditionalRequestMixin(SparseFieldsetMixin):
+    """
+    ETags and conditional requests for the task resources.
+
+    The ETag of a task is derived from its `updated_at`, so a `304 Not
+    Modified` is answered without serializing anything. `If-Match` on the
+    writes protects against lost updates with `412`, evaluated by the views
+    on the locked row.
+    """
+
+    etag: Optional[str] = None
+
+    def get_object_etag(self, task: Task) -> str:
+        fields = self.get_sparse_fields() or []
+        return make_etag(task.pk, task.updated_at.isoformat(), *fields)
+
+    def evaluate_preconditions(self, etag: str) -> Optional[Response]:
+        """Return `304 Not Modified` or raise `412` for a matching request."""
+
+        self.etag = etag
+        response = get_conditional_response(self.request._request, etag=etag)
+        if response is None:
+            return None
+        if response.status_code == status.HTTP_412_PRECONDITION_FAILED:
+            raise PreconditionFailed()
+        return Response(status=response.status_code, headers={'ETag': etag})
+
+    def finalize_response(
+        self,
+        request: Request,
+        response: Response,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Response:
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.etag and response.status_code == status.HTTP_200_OK:
+            response.headers.setdefault('ETag', self.etag)
+        return response
+
+    def retrieve(
+        self, request: Request, *args: Any, **kwargs: Any,
+    ) -> Response:
+        instance = self.get_object()
+        not_modified = self.evaluate_preconditions(
+            self.get_object_etag(instance),
+        )
+        if not_modified is not None:
+            return not_modified
+        return Response(self.get_serializer(instance).data)
+
+
+class CachedListMixin(ConditionalRequestMixin, FastListMixin):
+    """
+    Serves the list of the user's tasks from the per-user cache.
+
+    The views must call `task_list_cache.invalidate()` after every write
+    to the tasks of the user. The list ETag is derived from the cache key,
+    which holds the per-user version bumped by these writes, so conditional
+    requests never touch the database. The `X-Cache` header tells hits from
+    misses.
+    """
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        key = task_list_cache.get_key(request)
+        cached = task_list_cache.get(key)
+        hit = cached is not None
+        if not hit:
+            cached = {'etag': make_etag(key), 'data': None}
+        response = self.evaluate_preconditions(cached['etag'])
+        if response is None:
+            if cached['data'] is None:
+                cached['data'] = super().list(request, *args, **kwargs).data
+                task_list_cache.set(key, cached)
+            response = Response(cached['data'])
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
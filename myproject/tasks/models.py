@@ -1,26 +1,171 @@
+from typing import Any, Dict, Iterable, Optional
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connection, models, transaction
+from django.utils import timezone
 
 User = get_user_model()
 
+STATUS_CHOICES = [
+    ('new', 'New'),
+    ('in_progress', 'In progress'),
+    ('completed', 'Completed'),
+]
+
+# Text search configuration of the search vectors and queries of the tasks
+SEARCH_CONFIG = 'english'
+
 
 class Task(models.Model):
     """Task model for the database."""
 
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='tasks',
+        db_index=False,  # covered by the composite indexes below
     )
     title = models.CharField(max_length=64)
     description = models.TextField(blank=True)
     status = models.CharField(
         max_length=20,
         default='new',
-        choices=[
-            ('new', 'New'),
-            ('in_progress', 'In progress'),
-            ('completed', 'Completed'),
-        ],
+        choices=STATUS_CHOICES,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title and description, set by a trigger on their writes
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Transaction id of the last write, set by a trigger: the position of
+    # the task in the change feed of the delta sync
+    change_id = models.BigIntegerField(db_default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='task_user_id_idx'),
+            models.Index(
+                fields=['user', 'status', '-id'],
+                name='task_user_status_id_idx',
+            ),
+            models.Index(fields=['status', '-id'], name='task_status_id_idx'),
+            models.Index(
+                fields=['user', 'change_id', 'id'],
+                name='task_user_change_id_idx',
+            ),
+            GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'Task `{self.title}` is {self.status}'
+
+
+class TaskTombstone(models.Model):
+    """
+    Deleted task, kept for the delta sync of its owner.
+
+    A trigger records one as well for the previous owner of a task moved
+    to another user. Tombstones older than `TASKS_TOMBSTONE_RETENTION` days
+    are deleted by the `prune_tombstones` command.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+', db_index=False,
+    )
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    # Transaction id of the deletion, set by a trigger like `Task.change_id`
+    change_id = models.BigIntegerField(db_default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'change_id', 'task_id'],
+                name='tombstone_user_change_id_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Task #{self.task_id} deleted at {self.deleted_at}'
+
+    @staticmethod
+    def record(user_id: Any, task_ids: Iterable[int]) -> None:
+        """Record the deletion of the user's tasks."""
+
+        deleted_at = timezone.now()
+        TaskTombstone.objects.bulk_create(
+            TaskTombstone(
+                user_id=user_id, task_id=task_id, deleted_at=deleted_at,
+            )
+            for task_id in task_ids
+        )
+
+
+class TaskStatusCounter(models.Model):
+    """
+    Number of tasks of a user with a status.
+
+    Kept up to date by the statement triggers of the tasks table, in the
+    transaction of every insert, update and delete, including the bulk
+    updates and `COPY`, so the stats never count the tasks themselves.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+', db_index=False,
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'status'], name='task_counter_user_status_uniq',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.count} {self.status} tasks of user #{self.user_id}'
+
+    @staticmethod
+    def get_stats(user_id: Optional[int] = None) -> Dict[str, int]:
+        """Return the number of tasks by status of the user or of all."""
+
+        counters = TaskStatusCounter.objects.all()
+        if user_id is not None:
+            counters = counters.filter(user_id=user_id)
+        counts = dict(counters.values_list('status').annotate(
+            models.Sum('count'),
+        ).order_by())
+        stats = {status: counts.get(status, 0) for status, _ in STATUS_CHOICES}
+        stats['total'] = sum(stats.values())
+        return stats
+
+    @staticmethod
+    def rebuild(user_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Recount the tasks of the users, all by default.
+
+        The writes to the tasks wait for the end of the rebuild. Return the
+        number of counters that were wrong.
+        """
+
+        counters = TaskStatusCounter.objects.all()
+        tasks = Task.objects.all()
+        if user_ids is not None:
+            counters = counters.filter(user_id__in=list(user_ids))
+            tasks = tasks.filter(user_id__in=list(user_ids))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'LOCK TABLE {Task._meta.db_table} IN SHARE MODE',
+            )
+            old = {(user_id, status): count for user_id, status, count
+                   in counters.values_list('user_id', 'status', 'count')}
+            new = {(row['user_id'], row['status']): row['count']
+                   for row in tasks.values('user_id', 'status')
+                   .annotate(count=models.Count('pk')).order_by()}
+            counters.delete()
+            TaskStatusCounter.objects.bulk_create(
+                (TaskStatusCounter(user_id=user_id, status=status, count=count)
+                 for (user_id, status), count in new.items()),
+                batch_size=1000,
+            )
+        return sum(old.get(key, 0) != new.get(key, 0)
+                   for key in old.keys() | new.keys())
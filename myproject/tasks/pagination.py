@@ -0,0 +1,181 @@
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
+
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from mysite.paginator import PaginatorClass
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination,
+)
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+Results = Union[QuerySet[Any, Any], Sequence[Any]]
+
+
+def count_results(queryset: Any, view: Optional[APIView]) -> int:
+    """
+    Count the results, from the `get_count_queryset()` of the view if any.
+
+    The views listing rows with the columns of the user count the tasks
+    without that join.
+    """
+
+    get_count_queryset = getattr(view, 'get_count_queryset', None)
+    if get_count_queryset is not None:
+        queryset = get_count_queryset()
+    if isinstance(queryset, Sequence):
+        return len(queryset)
+    count: int = queryset.count()
+    return count
+
+
+class TaskPaginator(PaginatorClass):
+    """Paginator counting its results with `count_results()`."""
+
+    view: Optional[APIView] = None
+
+    @classmethod
+    def for_view(cls, view: Optional[APIView]) -> Type['TaskPaginator']:
+        """Return the paginator class counting the results of the view."""
+
+        return type(cls.__name__, (cls,), {'view': view})
+
+    @cached_property
+    def count(self) -> int:
+        return count_results(self.object_list, self.view)
+
+
+class TaskPageNumberPagination(PageNumberPagination):
+    """Page number pagination counting the results with `TaskPaginator`."""
+
+    django_paginator_class = TaskPaginator
+
+    def paginate_queryset(
+        self,
+        queryset: Results,
+        request: Request,
+        view: Optional[APIView] = None,
+    ) -> Optional[List[Any]]:
+        self.django_paginator_class = TaskPaginator.for_view(view)
+        return super().paginate_queryset(queryset, request, view)
+
+
+class TaskCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the `-pk` ordering of the tasks.
+
+    Every page is a `WHERE id < <cursor> ORDER BY id DESC LIMIT n` query,
+    so deep pages cost the same as the first one. The total count is only
+    calculated when the client asks for it with `?with_count=true`.
+    """
+
+    ordering = '-pk'
+    count_query_param = 'with_count'
+    count_query_description = 'Include the total number of results.'
+
+    view: Optional[APIView] = None
+
+    def get_count(self, queryset: Any) -> int:
+        return count_results(queryset, self.view)
+
+    def paginate_queryset(
+        self,
+        queryset: Results,
+        request: Request,
+        view: Optional[APIView] = None,
+    ) -> Optional[List[Any]]:
+        self.view = view
+        self.count: Optional[int] = None
+        if request.query_params.get(
+                self.count_query_param, '').lower() in TRUE_VALUES:
+            self.count = self.get_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data: Any) -> Response:
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = {'count': self.count, **response.data}
+        return response
+
+    def get_schema_operation_parameters(
+            self, view: APIView,
+    ) -> List[Dict[str, Any]]:
+        parameters: List[Dict[str, Any]] = \
+            super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.count_query_param,
+            'required': False,
+            'in': 'query',
+            'description': self.count_query_description,
+            'schema': {'type': 'boolean'},
+        })
+        return parameters
+
+
+class TaskPagination(BasePagination):
+    """
+    Page number pagination by default, keyset pagination on request.
+
+    The cursor mode is selected with `?pagination=cursor` or by the
+    presence of the `cursor` parameter, so its `next`/`previous` links
+    stay in the same mode.
+    """
+
+    mode_query_param = 'pagination'
+    mode_query_description = 'Pagination mode: `page` (default) or `cursor`.'
+    page_number_class = TaskPageNumberPagination
+    cursor_class = TaskCursorPagination
+
+    def __init__(self) -> None:
+        self.paginator: BasePagination = self.page_number_class()
+
+    def get_paginator(self, request: Request) -> BasePagination:
+        """Return the paginator for the mode requested by the client."""
+
+        cursor_query_param = self.cursor_class.cursor_query_param
+        if request.query_params.get(self.mode_query_param) == 'cursor' \
+                or cursor_query_param in request.query_params:
+            return self.cursor_class()
+        return self.page_number_class()
+
+    def paginate_queryset(
+        self,
+        queryset: Results,
+        request: Request,
+        view: Optional[APIView] = None,
+    ) -> Optional[List[Any]]:
+        self.paginator = self.get_paginator(request)
+        page = self.paginator.paginate_queryset(queryset, request, view)
+        self.display_page_controls = self.paginator.display_page_controls
+        return page
+
+    def get_paginated_response(self, data: Any) -> Response:
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(
+            self, schema: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        return self.page_number_class().get_paginated_response_schema(schema)
+
+    def to_html(self) -> str:
+        return self.paginator.to_html()
+
+    def get_schema_operation_parameters(
+            self, view: APIView,
+    ) -> List[Dict[str, Any]]:
+        return [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': self.mode_query_description,
+                'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+            },
+            *self.page_number_class().get_schema_operation_parameters(view),
+            *self.cursor_class().get_schema_operation_parameters(view),
+        ]
@@ -1,22 +1,46 @@
+from typing import Any
+
 from rest_framework import permissions
 from rest_framework.request import Request
 from rest_framework.views import APIView
+from users.authentication import get_instance
 
 from .models import Task
 
 
+def is_staff(user: Any) -> bool:
+    """Return whether the user is staff, from its loaded flags only."""
+
+    return bool(user.is_superuser or user.is_staff)
+
+
+def is_owner(user: Any, owner_id: Any) -> bool:
+    """Return whether the user may access a task of the owner."""
+
+    return is_staff(user) or owner_id == user.pk
+
+
 class IsOwner(permissions.BasePermission):
     """Permission class that grants access to the task owner."""
 
     def has_object_permission(
             self, request: Request, view: APIView, obj: Task,
     ) -> bool:
-        return request.user.is_superuser or request.user.is_staff \
-            or obj.user == request.user
+        return is_owner(request.user, obj.user_id)
 
 
 class IsStaff(permissions.BasePermission):
     """Permission class that grants access to the staff."""
 
     def has_permission(self, request: Request, view: APIView) -> bool:
-        return request.user.is_superuser or request.user.is_staff
+        return is_staff(request.user)
+
+
+class IsActiveStaff(permissions.BasePermission):
+    """
+    Permission class that grants access to the staff, checked on the user
+    row instead of the token claims.
+    """
+
+    def has_permission(self, request: Request, view: APIView) -> bool:
+        return is_staff(get_instance(request.user))
@@ -0,0 +1,109 @@
+import csv
+from abc import ABC, abstractmethod
+from io import StringIO
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+Row = Mapping[str, Any]
+
+
+def flatten(row: Row, prefix: str = '') -> Dict[str, Any]:
+    """Flatten the nested objects of the row into `parent.child` keys."""
+    flat: Dict[str, Any] = {}
+    for key, value in row.items():
+        if isinstance(value, Mapping):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+class StreamingRenderer(BaseRenderer, ABC):
+    """
+    Renders rows one by one, for a StreamingHttpResponse.
+
+    The lines are sent in chunks of about `buffer_size` characters, so a
+    large export neither sits in memory nor costs a write per row. The
+    subclasses implement `iter_lines()` for their format.
+    """
+
+    charset = 'utf-8'
+    buffer_size = 64 * 1024
+
+    @abstractmethod
+    def iter_lines(
+        self, rows: Iterable[Row], header: Optional[List[str]],
+    ) -> Iterator[str]:
+        """Yield the lines of the rows, after the header if any."""
+
+    def iter_render(
+        self, rows: Iterable[Row], header: Optional[List[str]] = None,
+    ) -> Iterator[bytes]:
+        buffer: List[str] = []
+        size = 0
+        for line in self.iter_lines(rows, header):
+            buffer.append(line)
+            size += len(line)
+            if size >= self.buffer_size:
+                yield ''.join(buffer).encode(self.charset)
+                buffer.clear()
+                size = 0
+        if buffer:
+            yield ''.join(buffer).encode(self.charset)
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        if data is None:
+            return b''
+        return b''.join(
+            self.iter_render(data if isinstance(data, list) else [data])
+        )
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """Newline delimited JSON: a JSON object per line."""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def iter_lines(
+        self, rows: Iterable[Row], header: Optional[List[str]],
+    ) -> Iterator[str]:
+        encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        for row in rows:
+            yield encoder.encode(row) + '\n'
+
+
+class CSVRenderer(StreamingRenderer):
+    """CSV with a header line, nested objects flattened to `a.b` columns."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def iter_lines(
+        self, rows: Iterable[Row], header: Optional[List[str]],
+    ) -> Iterator[str]:
+        output = StringIO()
+        writer = csv.writer(output)
+
+        def write(values: Iterable[Any]) -> str:
+            writer.writerow(values)
+            line = output.getvalue()
+            output.seek(0)
+            output.truncate()
+            return line
+
+        if header is not None:
+            yield write(header)
+        for row in rows:
+            flat = flatten(row)
+            if header is None:
+                header = list(flat)
+                yield write(header)
+            yield write(flat.get(name) for name in header)
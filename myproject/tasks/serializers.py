@@ -1,12 +1,45 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
+from mysite.metrics import timed_serialization
 from rest_framework import serializers
 from users.serializers import UserSerializer
 
-from .models import Task
+from .models import STATUS_CHOICES, Task
+from .renderers import CSVRenderer, NDJSONRenderer
 
 User = get_user_model()
 
 
+class TaskListSerializer(serializers.ListSerializer[List[Task]]):
+    """Writes a batch of tasks with a single query."""
+
+    def create(self, validated_data: List[Dict[str, Any]]) -> List[Task]:
+        return Task.objects.bulk_create(
+            Task(**attrs) for attrs in validated_data
+        )
+
+    def update(
+        self, instance: List[Task], validated_data: List[Dict[str, Any]],
+    ) -> List[Task]:
+        fields = {'updated_at'}
+        updated_at = timezone.now()
+        for task, attrs in zip(instance, validated_data):
+            for attr, value in attrs.items():
+                setattr(task, attr, value)
+            task.updated_at = updated_at
+            fields.update(attrs)
+        Task.objects.bulk_update(instance, fields)
+        return instance
+
+
 class TaskSerializer(serializers.ModelSerializer[Task]):
     """Сериализатор данных сущности задачи."""
 
@@ -15,3 +48,216 @@ class TaskSerializer(serializers.ModelSerializer[Task]):
     class Meta:
         model = Task
         fields = ['pk', 'title', 'description', 'status', 'user']
+        list_serializer_class = TaskListSerializer
+
+    def __init__(
+        self, *args: Any, fields: Optional[Iterable[str]] = None, **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
+
+    @timed_serialization
+    def to_representation(self, instance: Task) -> Dict[str, Any]:
+        return super().to_representation(instance)
+
+
+class TaskRowSerializer:
+    """
+    Read-only serializer building task rows from `QuerySet.values()`.
+
+    Renders the same JSON as TaskSerializer for the list endpoints, but
+    skips model instances and the per-field machinery of DRF.
+    """
+
+    user_fields = ['username', 'first_name', 'last_name']
+
+    def __init__(self, fields: Optional[Iterable[str]] = None) -> None:
+        selected = TaskSerializer.Meta.fields if fields is None else fields
+        self.fields = [
+            name for name in TaskSerializer.Meta.fields if name in selected
+        ]
+
+    def get_rows(
+            self, queryset: QuerySet[Task], *extra: str,
+    ) -> QuerySet[Task, Any]:
+        """Return the queryset of rows with the columns to render."""
+
+        columns = [name for name in self.fields if name != 'user']
+        if 'user' in self.fields:
+            columns.append('user_id')
+            columns.extend(f'user__{name}' for name in self.user_fields)
+        columns.extend(name for name in extra if name not in columns)
+        rows: QuerySet[Task, Any] = queryset.values(*columns)
+        return rows
+
+    def get_flat_fields(self) -> List[str]:
+        """Return the fields with the nested user as `user.<name>` columns."""
+
+        return [
+            column for name in self.fields
+            for column in (
+                [f'user.{field}' for field in ['pk', *self.user_fields]]
+                if name == 'user' else [name]
+            )
+        ]
+
+    def get_user(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        user = {'pk': row['user_id']}
+        user.update((name, row[f'user__{name}']) for name in self.user_fields)
+        return user
+
+    def to_representation(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            name: self.get_user(row) if name == 'user' else row[name]
+            for name in self.fields
+        }
+
+    @timed_serialization
+    def serialize(
+            self, rows: Iterable[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        return [self.to_representation(row) for row in rows]
+
+
+class TaskIdsSerializer(serializers.Serializer[Dict[str, Any]]):
+    """Primary keys of the tasks for the batch actions."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False,
+    )
+
+    def validate_ids(self, value: List[int]) -> List[int]:
+        max_size = settings.TASKS_BULK_MAX_SIZE
+        if len(value) > max_size:
+            raise serializers.ValidationError(
+                f'Ensure this field has no more than {max_size} elements.'
+            )
+        return value
+
+
+class TaskCompleteSerializer(TaskIdsSerializer):
+    """Tasks to mark as completed: listed by ids and/or by status."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        required=False,
+    )
+    status = serializers.ChoiceField(
+        choices=STATUS_CHOICES, required=False,
+    )
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        if not attrs:
+            raise serializers.ValidationError(
+                'Either `ids` or `status` is required.'
+            )
+        return attrs
+
+
+class TaskExportJobSerializer(serializers.Serializer[Dict[str, Any]]):
+    """Export of all users' tasks to run in the background."""
+
+    format = serializers.ChoiceField(
+        choices=[NDJSONRenderer.format, CSVRenderer.format],
+        default=NDJSONRenderer.format,
+    )
+    status = serializers.ChoiceField(choices=STATUS_CHOICES, required=False)
+    user = serializers.IntegerField(min_value=1, required=False)
+
+    def get_fields(self) -> Dict[str, Any]:
+        fields = super().get_fields()
+        # declared here, an attribute would hide `Serializer.fields`
+        fields['fields'] = serializers.ListField(
+            child=serializers.ChoiceField(choices=TaskSerializer.Meta.fields),
+            allow_empty=False,
+            required=False,
+            help_text='Fields to export, all by default.',
+        )
+        return fields
+
+
+class TaskPurgeSerializer(serializers.Serializer[Dict[str, Any]]):
+    """User whose tasks to delete."""
+
+    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+
+
+class TaskStatsSerializer(serializers.Serializer[Dict[str, int]]):
+    """Number of tasks by status."""
+
+    new = serializers.IntegerField()
+    in_progress = serializers.IntegerField()
+    completed = serializers.IntegerField()
+    total = serializers.IntegerField()
+
+
+# change id and pk of the last change returned by a sync
+ChangeToken = Tuple[int, int]
+
+
+@extend_schema_field(OpenApiTypes.STR)
+class ChangeTokenField(serializers.Field):  # type: ignore[type-arg]
+    """
+    Opaque position in the change feed of the user's tasks.
+
+    The token holds the time it was issued at: it expires once the
+    tombstones it may miss are pruned, after `TASKS_TOMBSTONE_RETENTION`
+    days.
+    """
+
+    default_error_messages = {
+        'invalid': 'Invalid change token.',
+        'expired': 'Expired change token, sync again without `since`.',
+    }
+
+    def to_internal_value(self, data: Any) -> ChangeToken:
+        try:
+            change_id, pk, issued = map(
+                int, urlsafe_b64decode(str(data)).decode().split('|'),
+            )
+        except ValueError:
+            self.fail('invalid')
+        retention = timedelta(days=settings.TASKS_TOMBSTONE_RETENTION)
+        if issued < (timezone.now() - retention).timestamp():
+            self.fail('expired')
+        return change_id, pk
+
+    def to_representation(self, value: ChangeToken) -> str:
+        change_id, pk = value
+        issued = int(timezone.now().timestamp())
+        return urlsafe_b64encode(f'{change_id}|{pk}|{issued}'.encode()) \
+            .decode()
+
+
+class TaskChangesQuerySerializer(serializers.Serializer[Dict[str, Any]]):
+    """Query parameters of the delta sync."""
+
+    since = ChangeTokenField(
+        required=False,
+        help_text='`since` of the previous sync. All tasks when omitted.',
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        required=False,
+        help_text='Maximum number of changes to return.',
+    )
+
+    def validate_limit(self, value: int) -> int:
+        max_size = settings.TASKS_SYNC_MAX_SIZE
+        if value > max_size:
+            raise serializers.ValidationError(
+                f'Ensure this value is less than or equal to {max_size}.'
+            )
+        return value
+
+
+class TaskChangesSerializer(serializers.Serializer[Dict[str, Any]]):
+    """Tasks changed and deleted after the change token."""
+
+    changed = TaskSerializer(many=True)
+    deleted = serializers.ListField(child=serializers.IntegerField())
+    since = ChangeTokenField(allow_null=True)
+    has_more = serializers.BooleanField()
@@ -0,0 +1,102 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import BigIntegerField, Func, QuerySet
+
+from .models import Task, TaskTombstone
+from .serializers import ChangeToken, ChangeTokenField, TaskRowSerializer
+
+
+class ChangeHorizon(Func):
+    """
+    Oldest transaction id still running in the snapshot of the query.
+
+    Every transaction with a lower id has committed or rolled back, so the
+    changes below the horizon are all visible and no later commit can add
+    one among them.
+    """
+
+    template = 'pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+    output_field = BigIntegerField()
+
+
+def after(
+    queryset: QuerySet[Any], pk_field: str, since: Optional[ChangeToken],
+) -> QuerySet[Any]:
+    """Filter the rows positioned after the token in `(change_id, pk)`."""
+
+    queryset = queryset.filter(change_id__lt=ChangeHorizon())
+    if since is None:
+        return queryset
+    change_id, pk = since
+    return queryset.filter(change_id__gte=change_id) \
+        .exclude(change_id=change_id, **{f'{pk_field}__lte': pk})
+
+
+class TaskChanges:
+    """
+    Change feed of the user's tasks for the delta sync.
+
+    Tasks are ordered by `(change_id, id)` and tombstones of the deleted
+    tasks by `(change_id, task_id)`, both served by an index starting with
+    the user, so a sync reads only the rows changed after its token. The
+    change id is the id of the writing transaction: the changes of the
+    transactions still running, and of the later ones, are left for the
+    next sync.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet[Task],
+        user_id: Any,
+        fields: Optional[List[str]] = None,
+    ) -> None:
+        self.queryset = queryset
+        self.user_id = user_id
+        self.serializer = TaskRowSerializer(fields)
+
+    def get_changed(
+        self, since: Optional[ChangeToken], limit: int,
+    ) -> List[Tuple[ChangeToken, Dict[str, Any]]]:
+        queryset = after(self.queryset, 'pk', since) \
+            .order_by('change_id', 'pk')
+        rows = self.serializer.get_rows(queryset, 'change_id', 'pk')
+        return [
+            ((row['change_id'], row['pk']), row) for row in rows[:limit]
+        ]
+
+    def get_deleted(
+        self, since: Optional[ChangeToken], limit: int,
+    ) -> List[Tuple[ChangeToken, int]]:
+        queryset = TaskTombstone.objects.filter(user_id=self.user_id)
+        rows = after(queryset, 'task_id', since) \
+            .order_by('change_id', 'task_id') \
+            .values_list('change_id', 'task_id')
+        return [((change_id, pk), pk) for change_id, pk in rows[:limit]]
+
+    def get_changes(
+        self, since: Optional[ChangeToken], limit: int,
+    ) -> Dict[str, Any]:
+        """Return up to `limit` changes after the token and the next token."""
+
+        # a task moved away and back by a transaction has its tombstone
+        # applied before its row
+        changes: List[Tuple[ChangeToken, bool, Any]] = sorted(
+            [
+                *((token, False, row) for token, row
+                  in self.get_changed(since, limit + 1)),
+                *((token, True, pk) for token, pk
+                  in self.get_deleted(since, limit + 1)),
+            ],
+            key=lambda change: (change[0], not change[1]),
+        )
+        page = changes[:limit]
+        token = page[-1][0] if page else since
+        return {
+            'changed': self.serializer.serialize(
+                row for _, deleted, row in page if not deleted
+            ),
+            'deleted': [pk for _, deleted, pk in page if deleted],
+            'since': ChangeTokenField().to_representation(token)
+            if token else None,
+            'has_more': len(changes) > limit,
+        }
@@ -1,7 +1,15 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import TasksApiViewSet, TasksListApiView
+from .async_views import task_mark_completed_view, task_view, tasks_view
+from .views import (
+    TasksApiViewSet,
+    TasksExportApiView,
+    TasksExportJobApiView,
+    TasksListApiView,
+    TasksPurgeApiView,
+    TasksStatsApiView,
+)
 
 router = DefaultRouter()
 router.register('', TasksApiViewSet, basename='task')
@@ -9,5 +17,19 @@ router.register('', TasksApiViewSet, basename='task')
 app_name = 'tasks'
 urlpatterns = [
     path('all/', TasksListApiView.as_view(), name='all_tasks'),
+    path('all/export/', TasksExportApiView.as_view(), name='export_tasks'),
+    path(
+        'all/export/job/', TasksExportJobApiView.as_view(),
+        name='export_tasks_job',
+    ),
+    path('all/purge/', TasksPurgeApiView.as_view(), name='purge_tasks'),
+    path('all/stats/', TasksStatsApiView.as_view(), name='all_tasks_stats'),
+    path('async/', tasks_view, name='async_tasks'),
+    path('async/<int:pk>/', task_view, name='async_task'),
+    path(
+        'async/<int:pk>/mark_completed/',
+        task_mark_completed_view,
+        name='async_task_mark_completed',
+    ),
     path('', include(router.urls)),
 ]
@@ -1,43 +1,198 @@
-from typing import Any, Optional
+from typing import Any, Iterator, List, Optional, cast
 
-from django.contrib.auth.models import AnonymousUser
+from django.conf import settings
+from django.db import transaction
 from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     OpenApiParameter,
     extend_schema,
     extend_schema_view,
+    inline_serializer,
 )
-from rest_framework import status
+from jobs.models import Job
+from jobs.serializers import JobSerializer
+from jobs.views import job_accepted
+from mysite.routers import replica_reads
+from rest_framework import serializers, status
 from rest_framework.decorators import action
-from rest_framework.generics import ListAPIView
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import GenericAPIView, ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import BaseSerializer
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
+from users.authentication import get_instance
+from users.models import User as UserType
 
-from .models import Task
-from .permissions import IsOwner, IsStaff
-from .serializers import TaskSerializer
+from .cache import task_list_cache
+from .filters import TaskSearchFilter
+from .mixins import (
+    SPARSE_FIELDS_PARAMETERS,
+    CachedListMixin,
+    FastListMixin,
+    SparseFieldsetMixin,
+)
+from .models import Task, TaskStatusCounter, TaskTombstone
+from .pagination import TaskPagination
+from .permissions import IsActiveStaff, IsOwner, IsStaff
+from .renderers import CSVRenderer, NDJSONRenderer, StreamingRenderer
+from .serializers import (
+    TaskChangesQuerySerializer,
+    TaskChangesSerializer,
+    TaskCompleteSerializer,
+    TaskExportJobSerializer,
+    TaskIdsSerializer,
+    TaskPurgeSerializer,
+    TaskRowSerializer,
+    TaskSerializer,
+    TaskStatsSerializer,
+)
+from .sync import TaskChanges
 
 
-class TasksListApiView(ListAPIView[Task]):
+@extend_schema_view(get=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS))
+class TasksListApiView(FastListMixin, ListAPIView[Task]):
     """Retrieve a list of all users' tasks."""
 
     serializer_class = TaskSerializer
+    pagination_class = TaskPagination
     permission_classes = [IsStaff]
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter]
     filterset_fields = ['status']
 
     def get_queryset(self) -> QuerySet[Task]:
-        return Task.objects.select_related('user').order_by('-pk')
+        return self.select_fields(Task.objects.order_by('-pk'))
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        with replica_reads(request.user.pk):
+            return super().list(request, *args, **kwargs)
+
+
+class TasksStatsApiView(APIView):
+    """Count all users' tasks by status."""
+
+    permission_classes = [IsStaff]
+
+    @extend_schema(responses=TaskStatsSerializer)
+    def get(self, request: Request) -> Response:
+        with replica_reads(request.user.pk):
+            return Response(TaskStatusCounter.get_stats())
+
+
+@extend_schema_view(get=extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name='status', enum=['new', 'in_progress', 'completed'],
+        ),
+        OpenApiParameter(name='user', type=int),
+        *SPARSE_FIELDS_PARAMETERS,
+    ],
+    responses={
+        (200, NDJSONRenderer.media_type): OpenApiTypes.STR,
+        (200, CSVRenderer.media_type): OpenApiTypes.STR,
+    },
+))
+class TasksExportApiView(SparseFieldsetMixin, GenericAPIView[Task]):
+    """
+    Stream all users' tasks as NDJSON (default) or CSV (`?format=csv`).
+
+    The rows are read in chunks from a server-side cursor and sent as they
+    come, so the memory of the worker stays flat whatever the export size.
+    """
+
+    permission_classes = [IsActiveStaff]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    pagination_class = None
+    filterset_fields = ['status', 'user']
+
+    def get_queryset(self) -> QuerySet[Task]:
+        return Task.objects.order_by('pk')
+
+    def get(self, request: Request) -> StreamingHttpResponse:
+        renderer = cast(StreamingRenderer, request.accepted_renderer)
+        # the parameters are validated before the response starts
+        serializer = TaskRowSerializer(self.get_sparse_fields())
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            self.stream(renderer, serializer, queryset),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = \
+            f'attachment; filename="tasks.{renderer.format}"'
+        return response
+
+    def stream(
+        self,
+        renderer: StreamingRenderer,
+        serializer: TaskRowSerializer,
+        queryset: QuerySet[Task],
+    ) -> Iterator[bytes]:
+        # runs while the response is sent, after the view returned
+        with replica_reads(self.request.user.pk):
+            rows = serializer.get_rows(queryset).iterator(
+                chunk_size=settings.TASKS_EXPORT_CHUNK_SIZE,
+            )
+            yield from renderer.iter_render(
+                map(serializer.to_representation, rows),
+                serializer.get_flat_fields(),
+            )
+
+
+class TasksExportJobApiView(APIView):
+    """
+    Export all users' tasks in the background, for exports too big for a
+    request. The file is downloaded from the job once it succeeded.
+    """
+
+    permission_classes = [IsActiveStaff]
+
+    @extend_schema(
+        request=TaskExportJobSerializer, responses={202: JobSerializer},
+    )
+    def post(self, request: Request) -> Response:
+        serializer = TaskExportJobSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        job = Job.enqueue(
+            'tasks.export', request.user.pk,
+            format=data['format'],
+            fields=data.get('fields'),
+            filters={name: data[name] for name in ['status', 'user']
+                     if name in data},
+        )
+        return job_accepted(request, job)
+
+
+class TasksPurgeApiView(APIView):
+    """Delete all tasks of a user in the background."""
+
+    permission_classes = [IsActiveStaff]
+
+    @extend_schema(request=TaskPurgeSerializer, responses={202: JobSerializer})
+    def post(self, request: Request) -> Response:
+        serializer = TaskPurgeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = Job.enqueue(
+            'tasks.purge', request.user.pk,
+            user=serializer.validated_data['user'].pk,
+        )
+        return job_accepted(request, job)
 
 
 @extend_schema_view(
     retrieve=extend_schema(parameters=[
-        OpenApiParameter(name='id', type=int, location=OpenApiParameter.PATH)
+        OpenApiParameter(name='id', type=int, location=OpenApiParameter.PATH),
+        *SPARSE_FIELDS_PARAMETERS,
     ])
 )
-class TasksApiViewSet(ModelViewSet[Task]):
+class TasksApiViewSet(CachedListMixin, ModelViewSet[Task]):
     """
     ModelViewSet managing tasks of the authenticated user..
 
@@ -46,16 +201,28 @@ class TasksApiViewSet(ModelViewSet[Task]):
     """
 
     serializer_class = TaskSerializer
+    pagination_class = TaskPagination
     permission_classes = [IsAuthenticated, IsOwner]
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter]
     filterset_fields = ['status']
 
+    # the writes evaluating `If-Match`, on the row locked until they commit
+    locking_actions = ['update', 'partial_update', 'destroy']
+
     def get_queryset(self) -> QuerySet[Task]:
         user = self.request.user
         if getattr(self, 'swagger_fake_view', False) \
-                or isinstance(user, AnonymousUser):
+                or not user.is_authenticated:
             return Task.objects.none()  # safe fake queryset
-        return Task.objects.filter(user=user) \
-            .select_related('user').order_by('-pk')
+        queryset = Task.objects.filter(user_id=user.pk).order_by('-pk')
+        if self.action in self.locking_actions:
+            queryset = queryset.select_for_update(of=('self',))
+        return self.select_fields(queryset)
+
+    def get_user(self) -> UserType:
+        """Return the full row of the authenticated user."""
+
+        return cast(UserType, get_instance(self.request.user))
 
     @extend_schema(
         parameters=[
@@ -66,24 +233,52 @@ class TasksApiViewSet(ModelViewSet[Task]):
                             '- `completed` - Completed',
                 enum=['new', 'in_progress', 'completed'],
             ),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
     )
     def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
-        return super().list(request, *args, **kwargs)
+        with replica_reads(request.user.pk):
+            return super().list(request, *args, **kwargs)
+
+    def retrieve(
+        self, request: Request, *args: Any, **kwargs: Any,
+    ) -> Response:
+        with replica_reads(request.user.pk):
+            return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer: BaseSerializer[Task]) -> None:
-        serializer.save(user=self.request.user)
+        serializer.save(user=self.get_user())
+        task_list_cache.invalidate(self.request.user.pk)
+
+    def update(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        # two writers with the same `If-Match` can't both pass the check
+        with transaction.atomic():
+            response = super().update(request, *args, **kwargs)
+        task_list_cache.invalidate(request.user.pk)
+        return response
 
     def perform_update(self, serializer: BaseSerializer[Task]) -> None:
-        serializer.save()
+        if serializer.instance is not None:
+            self.evaluate_preconditions(
+                self.get_object_etag(serializer.instance),
+            )
+        task = serializer.save()
+        self.etag = self.get_object_etag(task)
+
+    def perform_destroy(self, instance: Task) -> None:
+        self.evaluate_preconditions(self.get_object_etag(instance))
+        TaskTombstone.record(instance.user_id, [instance.pk])
+        instance.delete()
 
     def destroy(
         self, request: Request, *args: Any, **kwargs: Any,
     ) -> Response:
-        instance = self.get_object()
-        if instance.user != request.user:
-            return Response(status=status.HTTP_403_FORBIDDEN)
-        self.perform_destroy(instance)
+        with transaction.atomic():
+            instance = self.get_object()
+            if instance.user_id != request.user.pk:
+                return Response(status=status.HTTP_403_FORBIDDEN)
+            self.perform_destroy(instance)
+        task_list_cache.invalidate(instance.user_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['post'])
@@ -93,9 +288,160 @@ class TasksApiViewSet(ModelViewSet[Task]):
         """Mark the task as completed."""
 
         task = self.get_object()
-        if task.user != request.user:
+        if task.user_id != request.user.pk:
             return Response(status=status.HTTP_403_FORBIDDEN)
         task.status = 'completed'
-        task.save()
+        task.save(update_fields=['status', 'updated_at'])
+        task_list_cache.invalidate(task.user_id)
         serializer = self.get_serializer(task)
         return Response(serializer.data)
+
+    @extend_schema(
+        operation_id='tasks_mark_completed_bulk',
+        request=TaskCompleteSerializer,
+        responses={
+            200: inline_serializer(
+                'TasksCompleted', {'updated': serializers.IntegerField()},
+            ),
+            202: JobSerializer,
+        },
+    )
+    @action(detail=False, methods=['post'], url_path='mark_completed')
+    def mark_completed_bulk(self, request: Request) -> Response:
+        """
+        Mark the listed tasks as completed, or queue a job completing all
+        the tasks with a status when no ids are listed.
+        """
+
+        serializer = TaskCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if 'ids' not in serializer.validated_data:
+            job = Job.enqueue(
+                'tasks.mark_completed', request.user.pk,
+                status=serializer.validated_data['status'],
+            )
+            return job_accepted(request, job)
+        filters = {'pk__in': serializer.validated_data['ids']}
+        if 'status' in serializer.validated_data:
+            filters['status'] = serializer.validated_data['status']
+        updated = self.get_queryset().filter(**filters) \
+            .exclude(status='completed') \
+            .update(status='completed', updated_at=timezone.now())
+        task_list_cache.invalidate(request.user.pk)
+        return Response({'updated': updated})
+
+    def get_bulk_data(self) -> List[Any]:
+        """Return the items of a batch request, checking the batch size."""
+
+        data = self.request.data
+        max_size = settings.TASKS_BULK_MAX_SIZE
+        if not isinstance(data, list):
+            message = 'Expected a list of items.'
+        elif len(data) > max_size:
+            message = f'Ensure this field has no more than {max_size} ' \
+                      f'elements.'
+        else:
+            return data
+        raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+
+    def get_bulk_objects(self, data: List[Any]) -> List[Task]:
+        """Return the user's tasks referenced by the `pk` of each item."""
+
+        pks = [item.get('pk') if isinstance(item, dict) else None
+               for item in data]
+        tasks = self.get_queryset().select_for_update(of=('self',)) \
+            .in_bulk([pk for pk in pks if isinstance(pk, int)])
+        errors = [
+            {} if pk in tasks else {'pk': ['No Task matches the given query.']}
+            for pk in pks
+        ]
+        if any(errors):
+            raise ValidationError(errors)
+        return [tasks[pk] for pk in pks]
+
+    @extend_schema(request=TaskSerializer(many=True))
+    @action(detail=False, methods=['post'])
+    def bulk(self, request: Request) -> Response:
+        """Create a batch of tasks in a single transaction."""
+
+        serializer = self.get_serializer(data=self.get_bulk_data(), many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save(user=self.get_user())
+        task_list_cache.invalidate(request.user.pk)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(request=TaskSerializer(many=True, partial=True))
+    @bulk.mapping.patch
+    def bulk_update(self, request: Request) -> Response:
+        """Partially update a batch of tasks referenced by their `pk`."""
+
+        data = self.get_bulk_data()
+        with transaction.atomic():
+            serializer = self.get_serializer(
+                self.get_bulk_objects(data), data=data, many=True, partial=True,
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        task_list_cache.invalidate(request.user.pk)
+        return Response(serializer.data)
+
+    @extend_schema(request=TaskIdsSerializer)
+    @bulk.mapping.delete
+    def bulk_destroy(self, request: Request) -> Response:
+        """Delete a batch of tasks, reporting the ids that were not found."""
+
+        serializer = TaskIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(pk__in=ids)
+            deleted = list(queryset.select_for_update()
+                           .values_list('pk', flat=True))
+            queryset.filter(pk__in=deleted).delete()
+            TaskTombstone.record(request.user.pk, deleted)
+        task_list_cache.invalidate(request.user.pk)
+        not_found = set(ids).difference(deleted)
+        return Response({
+            'deleted': deleted,
+            'not_found': [pk for pk in ids if pk in not_found],
+        })
+
+    @extend_schema(responses=TaskStatsSerializer)
+    @action(
+        detail=False, methods=['get'], filter_backends=[],
+        pagination_class=None,
+    )
+    def stats(self, request: Request) -> Response:
+        """Count the user's tasks by status."""
+
+        with replica_reads(request.user.pk):
+            return Response(TaskStatusCounter.get_stats(request.user.pk))
+
+    @extend_schema(
+        parameters=[TaskChangesQuerySerializer, *SPARSE_FIELDS_PARAMETERS],
+        responses=TaskChangesSerializer,
+    )
+    @action(
+        detail=False, methods=['get'], filter_backends=[],
+        pagination_class=None,
+    )
+    def changes(self, request: Request) -> Response:
+        """
+        Return the tasks created, updated or deleted after `since`.
+
+        Pass the returned `since` to the next sync; repeat at once while
+        `has_more` is true.
+        """
+
+        serializer = TaskChangesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        changes = TaskChanges(
+            self.get_queryset(), request.user.pk, self.get_sparse_fields(),
+        )
+        return Response(changes.get_changes(
+            serializer.validated_data.get('since'),
+            serializer.validated_data.get(
+                'limit', settings.TASKS_SYNC_MAX_SIZE,
+            ),
+        ))
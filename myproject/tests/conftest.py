@@ -1,11 +1,17 @@
 import random
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 import pytest
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.transaction import atomic
+from django.test import Client
 from faker import Faker
+from jobs.worker import Worker
+from mysite.metrics import metrics
+from mysite.routers import ReplicaRouter
 from rest_framework.test import APIClient
 from rest_framework.utils.serializer_helpers import ReturnDict
 from tasks.models import Task
@@ -16,6 +22,46 @@ User = get_user_model()
 fake = Faker()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache() -> Iterator[None]:
+    """Cached responses must not leak between the tests."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics() -> Iterator[None]:
+    """The metrics counted by a test must not leak into the next ones."""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings: Any, tmp_path: Path) -> Path:
+    """Keep the files written by the tests out of the project."""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def shared_cache(settings: Any, tmp_path: Path) -> None:
+    """A cache shared by the processes, required by the commands."""
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tmp_path / 'cache',
+        },
+    }
+
+
+@pytest.fixture
+def run_jobs(db: Any) -> Callable[[], int]:
+    """Return a function running the due jobs like `run_worker --burst`."""
+    return lambda: Worker(sleep=0).run(burst=True)
+
+
 @pytest.fixture
 def api_client() -> APIClient:
     return APIClient()
@@ -145,3 +191,29 @@ def superuser(db: Any) -> UserType:
 def superuser_client(superuser: UserType, api_client: APIClient) -> APIClient:
     api_client.force_authenticate(user=superuser)
     return api_client
+
+
+@pytest.fixture
+def admin_client(superuser: UserType) -> Client:
+    """A client logged into the admin site as the superuser."""
+    client = Client()
+    client.force_login(superuser)
+    return client
+
+
+@pytest.fixture
+def replica_reads_log(settings: Any, monkeypatch: Any) -> List[str]:
+    """
+    Record the reads sent to the replica.
+
+    The test database has no replica, so the `default` alias stands in.
+    """
+    settings.DATABASE_REPLICAS = ['default']
+    log: List[str] = []
+
+    def get_replica(self: ReplicaRouter) -> str:
+        log.append('replica')
+        return 'default'
+
+    monkeypatch.setattr(ReplicaRouter, 'get_replica', get_replica)
+    return log
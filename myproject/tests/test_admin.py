@@ -0,0 +1,110 @@
+from typing import Any, List
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from mysite.paginator import EstimatedCountPaginator
+from rest_framework import status
+from tasks.models import Task
+from users.models import User as UserType
+
+
+def count_queries(queries: List[str]) -> List[str]:
+    return [sql for sql in queries if 'COUNT(' in sql]
+
+
+@pytest.mark.django_db
+def test_count_is_exact_under_the_limit(tasks_list: List[Task]) -> None:
+    paginator = EstimatedCountPaginator(Task.objects.order_by('-pk'), 10)
+
+    assert paginator.count == len(tasks_list)
+    assert paginator.num_pages == 2
+
+
+@pytest.mark.django_db
+def test_count_is_estimated_over_the_limit(
+    tasks_list: List[Task], monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(EstimatedCountPaginator, 'exact_count_limit', 1)
+    paginator = EstimatedCountPaginator(
+        Task.objects.filter(status='new').order_by('-pk'), 10,
+    )
+
+    with CaptureQueriesContext(connection) as context:
+        count = paginator.count
+
+    queries = [query['sql'] for query in context.captured_queries]
+    assert len(queries) == 1
+    assert queries[0].startswith('EXPLAIN')
+    assert count >= 1
+
+
+def test_count_of_a_list() -> None:
+    assert EstimatedCountPaginator(list(range(5)), 2).count == 5
+
+
+@pytest.mark.django_db
+def test_changelist_truncates_descriptions_in_the_database(
+    admin_client: Client, tasks_list: List[Task],
+) -> None:
+    task = tasks_list[0]
+    task.description = 'a' * 100
+    task.save()
+
+    with CaptureQueriesContext(connection) as context:
+        response = admin_client.get('/admin/tasks/task/')
+
+    assert response.status_code == status.HTTP_200_OK
+    content = response.content.decode()
+    assert 'a' * 57 + '...' in content
+    assert 'a' * 58 not in content
+    queries = [query['sql'] for query in context.captured_queries]
+    rows = [
+        sql for sql in queries
+        if sql.startswith('SELECT') and 'FROM "tasks_task"' in sql
+        and 'COUNT(' not in sql
+    ]
+    assert len(rows) == 1
+    assert rows[0].count('"tasks_task"."description"') == 1
+    assert 'LEFT("tasks_task"."description", 61)' in rows[0]
+    assert '"search_vector"' not in rows[0]
+    # no count of the unfiltered list next to the filtered one
+    assert len(count_queries(queries)) == 1
+
+
+@pytest.mark.django_db
+def test_changelist_filters_by_user(
+    admin_client: Client, superuser: UserType, tasks_list: List[Task],
+) -> None:
+    Task.objects.create(user=superuser, title='admin task')
+
+    response = admin_client.get(
+        '/admin/tasks/task/', query_params={'user': superuser.pk},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    content = response.content.decode()
+    assert 'admin task' in content
+    assert tasks_list[0].title not in content
+    assert f'href="?user={superuser.pk}"' in content
+
+
+@pytest.mark.django_db
+def test_changelist_ignores_bad_user_filter(
+    admin_client: Client, tasks_list: List[Task],
+) -> None:
+    response = admin_client.get(
+        '/admin/tasks/task/', query_params={'user': 'nobody'},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert tasks_list[0].title in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_user_changelist(admin_client: Client, superuser: UserType) -> None:
+    response = admin_client.get('/admin/users/user/')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert superuser.username in response.content.decode()
@@ -0,0 +1,170 @@
+import json
+from typing import Any, Callable, List, Optional
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from mysite.middleware import AdmissionControlMiddleware
+from rest_framework import status
+from rest_framework.test import APIClient
+from tasks.models import Task
+
+factory = RequestFactory()
+
+
+@pytest.fixture
+def limits(settings: Any) -> None:
+    settings.ADMISSION_LIMITS = {
+        'auth': 1, 'task_reads': 1, 'task_writes': 2, 'staff': 1,
+        'schema': 0,
+    }
+    settings.ADMISSION_RETRY_AFTER = 3
+
+
+def nested(inner: Callable[[], HttpRequest]) -> AdmissionControlMiddleware:
+    """
+    Return a middleware sending the inner request while the outer is in
+    flight. The outer response carries the status of the inner one.
+    """
+    outer: List[HttpRequest] = []
+
+    def view(request: HttpRequest) -> HttpResponse:
+        if outer:
+            return HttpResponse('inner')
+        outer.append(request)
+        response = middleware(inner())
+        return HttpResponse(status=response.status_code)
+
+    middleware = AdmissionControlMiddleware(view)
+    return middleware
+
+
+@pytest.mark.parametrize(('method', 'path', 'route'), [
+    ('post', '/api/token/', 'auth'),
+    ('post', '/api/token/refresh/', 'auth'),
+    ('post', '/api/users/register/', 'auth'),
+    ('get', '/api/tasks/all/', 'staff'),
+    ('get', '/api/tasks/all/export/', 'staff'),
+    ('get', '/api/schema/swagger/', 'schema'),
+    ('get', '/api/tasks/', 'task_reads'),
+    ('head', '/api/tasks/1/', 'task_reads'),
+    ('post', '/api/tasks/', 'task_writes'),
+    ('delete', '/api/tasks/bulk/', 'task_writes'),
+    ('get', '/admin/', None),
+    ('get', '/metrics/', None),
+])
+def test_route_classes(method: str, path: str, route: Optional[str]) -> None:
+    middleware = AdmissionControlMiddleware(lambda request: HttpResponse())
+
+    assert middleware.get_route_class(
+        getattr(factory, method)(path),
+    ) == route
+
+
+def test_request_over_the_limit_is_shed(limits: None) -> None:
+    middleware = nested(lambda: factory.get('/api/tasks/'))
+
+    response = middleware(factory.get('/api/tasks/1/'))
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert middleware.in_flight['task_reads'] == 0
+    shed = middleware.shed()
+    assert shed['Retry-After'] == '3'
+    assert json.loads(shed.content) == {
+        'detail': 'The server is busy, retry later.',
+    }
+
+
+@pytest.mark.parametrize(('outer', 'inner'), [
+    ('/api/tasks/', '/api/tasks/all/'),
+    ('/api/tasks/all/', '/api/tasks/'),
+    ('/api/schema/', '/api/schema/'),  # no limit
+])
+def test_requests_under_the_limit_are_admitted(
+    limits: None, outer: str, inner: str,
+) -> None:
+    middleware = nested(lambda: factory.get(inner))
+
+    response = middleware(factory.get(outer))
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_limit_above_one(limits: None) -> None:
+    middleware = nested(lambda: factory.post('/api/tasks/'))
+
+    response = middleware(factory.post('/api/tasks/'))
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_in_flight_released_on_errors(limits: None) -> None:
+    def view(request: HttpRequest) -> HttpResponse:
+        raise ValueError
+
+    middleware = AdmissionControlMiddleware(view)
+
+    with pytest.raises(ValueError):
+        middleware(factory.get('/api/tasks/'))
+    assert middleware.in_flight['task_reads'] == 0
+
+
+@pytest.mark.django_db
+def test_streaming_response_holds_its_slot_until_closed(limits: None) -> None:
+    middleware = AdmissionControlMiddleware(
+        lambda request: StreamingHttpResponse(iter(['a', 'b'])),
+    )
+
+    response = middleware(factory.get('/api/tasks/all/export/'))
+
+    assert middleware.in_flight['staff'] == 1
+    assert middleware(factory.get('/api/tasks/all/')).status_code \
+        == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert b''.join(response) == b'ab'
+    response.close()
+    assert middleware.in_flight['staff'] == 0
+
+
+@pytest.mark.django_db
+def test_async_streaming_response_holds_its_slot_until_closed(
+    limits: None,
+) -> None:
+    async def view(request: HttpRequest) -> StreamingHttpResponse:
+        return StreamingHttpResponse(iter(['a']))
+
+    middleware = AdmissionControlMiddleware(view)
+
+    response = async_to_sync(middleware)(factory.get('/api/tasks/all/export/'))
+
+    assert middleware.in_flight['staff'] == 1
+    response.close()
+    assert middleware.in_flight['staff'] == 0
+
+
+def test_async_request_over_the_limit_is_shed(limits: None) -> None:
+    async def view(request: HttpRequest) -> HttpResponse:
+        response = await middleware(factory.get('/api/tasks/async/'))
+        return HttpResponse(status=response.status_code)
+
+    middleware = AdmissionControlMiddleware(view)
+
+    response = async_to_sync(middleware)(factory.get('/api/tasks/async/1/'))
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert middleware.in_flight['task_reads'] == 0
+
+
+@pytest.mark.django_db
+def test_admission_metrics(
+    auth_client: APIClient, tasks_list: List[Task], limits: None,
+) -> None:
+    auth_client.get('/api/tasks/')
+    nested(lambda: factory.get('/api/tasks/'))(factory.get('/api/tasks/'))
+
+    output = APIClient().get('/metrics/').content.decode()
+
+    assert 'http_admission_requests_total{route="task_reads",' \
+           'result="admitted"} 2' in output
+    assert 'http_admission_requests_total{route="task_reads",' \
+           'result="shed"} 1' in output
@@ -0,0 +1,194 @@
+from typing import Any, Callable, List
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from rest_framework import status
+from rest_framework.test import APIClient
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+from users.models import User as UserType
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'query', ['', '?page=2', '?status=new', '?status=completed&page=1'],
+)
+def test_async_list_matches_sync_list(
+    auth_client: APIClient, tasks_list: List[Task], query: str,
+) -> None:
+    expected = auth_client.get(f'/api/tasks/{query}').json()
+    response = auth_client.get(f'/api/tasks/async/{query}')
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data['count'] == expected['count']
+    assert data['results'] == expected['results']
+    assert bool(data['next']) == bool(expected['next'])
+    assert bool(data['previous']) == bool(expected['previous'])
+
+
+@pytest.mark.django_db
+def test_async_list_invalid_page_and_status(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    response = auth_client.get('/api/tasks/async/?page=9')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {'detail': 'Invalid page.'}
+    response = auth_client.get('/api/tasks/async/?status=unknown')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert list(response.json()) == ['status']
+
+
+@pytest.mark.django_db
+def test_async_retrieve(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    superuser: UserType,
+) -> None:
+    task = tasks_list[0]
+    response = auth_client.get(f'/api/tasks/async/{task.pk}/')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == TaskSerializer(task).data
+    foreign = Task.objects.create(user=superuser, title='foreign')
+    response = auth_client.get(f'/api/tasks/async/{foreign.pk}/')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_async_create(auth_client: APIClient, user: UserType) -> None:
+    response = auth_client.post(
+        '/api/tasks/async/',
+        data={'title': 'async task', 'status': 'in_progress'},
+        format='json',
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    task = Task.objects.get(pk=response.json()['pk'])
+    assert task.user_id == user.pk
+    assert response.json() == TaskSerializer(task).data
+    response = auth_client.post(
+        '/api/tasks/async/', data={'status': 'unknown'}, format='json',
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert set(response.json()) == {'title', 'status'}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('method', 'data'),
+    [
+        ('patch', {'title': 'changed'}),
+        ('put', {'title': 'changed', 'status': 'completed'}),
+    ],
+)
+def test_async_update(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    method: str,
+    data: Any,
+) -> None:
+    task = tasks_list[0]
+    response = getattr(auth_client, method)(
+        f'/api/tasks/async/{task.pk}/', data=data, format='json',
+    )
+    assert response.status_code == status.HTTP_200_OK
+    task.refresh_from_db()
+    assert task.title == 'changed'
+    assert response.json() == TaskSerializer(task).data
+
+
+@pytest.mark.django_db
+def test_async_update_invalidates_list_cache(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    auth_client.get('/api/tasks/')
+    auth_client.patch(
+        f'/api/tasks/async/{tasks_list[0].pk}/',
+        data={'title': 'changed'},
+        format='json',
+    )
+    response = auth_client.get('/api/tasks/')
+    assert response['X-Cache'] == 'MISS'
+    assert response.data['results'][0]['title'] == 'changed'
+
+
+@pytest.mark.django_db
+def test_async_mark_completed(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    task = tasks_list[0]
+    response = auth_client.post(f'/api/tasks/async/{task.pk}/mark_completed/')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['status'] == 'completed'
+    task.refresh_from_db()
+    assert task.status == 'completed'
+    response = auth_client.post('/api/tasks/async/0/mark_completed/')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_async_views_require_token(
+    api_client: APIClient, tasks_list: List[Task],
+) -> None:
+    response = api_client.get('/api/tasks/async/')
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+    response = api_client.get('/api/tasks/async/')
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_async_views_reject_other_methods(auth_client: APIClient) -> None:
+    response = auth_client.delete('/api/tasks/async/')
+    assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_served_by_asgi_handler(access_token: str) -> None:
+    client = AsyncClient()
+    headers = {'Authorization': f'Bearer {access_token}'}
+    response = async_to_sync(client.post)(
+        '/api/tasks/async/', data={'title': 'via asgi'},
+        content_type='application/json', headers=headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    response = async_to_sync(client.get)('/api/tasks/async/', headers=headers)
+    assert response.json()['results'][0]['title'] == 'via asgi'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(('method', 'url', 'data'), [
+    ('post', '/api/tasks/async/', {'title': 'new task'}),
+    ('patch', '/api/tasks/async/{pk}/', {'title': 'changed'}),
+    ('post', '/api/tasks/async/{pk}/mark_completed/', None),
+])
+@pytest.mark.parametrize(
+    ('change', 'detail'),
+    [
+        (lambda user: user.delete(), 'User not found'),
+        (lambda user: UserType.objects.filter(pk=user.pk).update(
+            is_active=False,
+        ), 'User is inactive'),
+    ],
+    ids=['deleted', 'deactivated'],
+)
+def test_async_writes_of_removed_user_rejected(
+    auth_client: APIClient,
+    user: UserType,
+    method: str,
+    url: str,
+    data: Any,
+    change: Callable[[UserType], object],
+    detail: str,
+) -> None:
+    task = Task.objects.create(user=user, title='task')
+    change(user)
+
+    response = getattr(auth_client, method)(
+        url.format(pk=task.pk), data=data, format='json',
+    )
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json() == {'detail': detail}
+    assert list(Task.objects.values_list('title', 'status')) in (
+        [], [('task', 'new')],
+    )
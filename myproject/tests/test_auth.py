@@ -1,10 +1,16 @@
-from typing import Dict
+from typing import Callable, Dict, List, Tuple
 
 import pytest
 from _pytest.fixtures import SubRequest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from jobs.models import Job
 from rest_framework import status
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from tasks.models import Task
+from users.models import User as UserType
 from users.serializers import UserSerializer
 
 User = get_user_model()
@@ -79,3 +85,171 @@ def test_register_user_failed_no_password(
     )
     assert response.status_code == status.HTTP_400_BAD_REQUEST
     assert 'This field is required.' in response.data['password']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'token_name',
+    ['access_token', 'access_token_refreshed'],
+)
+def test_token_carries_user_claims(
+    request: SubRequest, token_name: str, user: UserType,
+) -> None:
+    token = AccessToken(request.getfixturevalue(token_name))
+    assert token['user_id'] == user.pk
+    assert token['username'] == user.username
+    assert token['is_staff'] is False
+    assert token['is_superuser'] is False
+
+
+@pytest.mark.django_db
+def test_token_authentication_skips_user_query(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    with CaptureQueriesContext(connection) as context:
+        response = auth_client.get(
+            f'/api/tasks/{tasks_list[0].pk}/',
+            query_params={'fields': 'pk,title'},
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert not [q for q in context.captured_queries
+                if 'FROM "users_user"' in q['sql']]
+    assert len(context.captured_queries) == 1
+
+
+@pytest.mark.django_db
+def test_staff_claims_grant_access(
+    api_client: APIClient, superuser: UserType,
+) -> None:
+    response = api_client.post(
+        '/api/token/',
+        data={'username': 'admin', 'password': 'adminpass123'},
+    )
+    api_client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}',
+    )
+    response = api_client.get('/api/tasks/all/')
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_task_created_with_token_user(
+    auth_client: APIClient, user: UserType,
+) -> None:
+    response = auth_client.post(
+        '/api/tasks/', data={'title': 'new task'}, format='json',
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['user']['pk'] == user.pk
+    assert Task.objects.get(pk=response.data['pk']).user_id == user.pk
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('url', 'data'),
+    [
+        ('/api/tasks/', {'title': 'new task'}),
+        ('/api/tasks/bulk/', [{'title': 'new task'}]),
+    ],
+)
+@pytest.mark.parametrize(
+    ('change', 'detail'),
+    [
+        (lambda user: user.delete(), 'User not found'),
+        (lambda user: User.objects.filter(pk=user.pk).update(
+            is_active=False,
+        ), 'User is inactive'),
+    ],
+    ids=['deleted', 'deactivated'],
+)
+def test_token_of_removed_user_cannot_write(
+    auth_client: APIClient,
+    user: UserType,
+    url: str,
+    data: object,
+    change: Callable[[UserType], object],
+    detail: str,
+) -> None:
+    change(user)
+    response = auth_client.post(url, data=data, format='json')
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.data['detail'] == detail
+    assert not Task.objects.exists()
+
+
+@pytest.fixture
+def staff_token_client(superuser: UserType) -> APIClient:
+    """Client authenticated by the claims of a staff token."""
+    client = APIClient()
+    response = client.post('/api/token/', data={
+        'username': 'admin', 'password': 'adminpass123',
+    })
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+    return client
+
+
+# (method, url, data of the task and the other user)
+STAFF_WRITES: List[Tuple[str, str, Callable[[Task, UserType], object]]] = [
+    ('patch', '/api/tasks/{pk}/', lambda task, user: {'title': 'changed'}),
+    ('delete', '/api/tasks/{pk}/', lambda task, user: None),
+    ('post', '/api/tasks/{pk}/mark_completed/', lambda task, user: None),
+    ('post', '/api/tasks/mark_completed/',
+     lambda task, user: {'ids': [task.pk]}),
+    ('patch', '/api/tasks/bulk/',
+     lambda task, user: [{'pk': task.pk, 'title': 'changed'}]),
+    ('delete', '/api/tasks/bulk/', lambda task, user: {'ids': [task.pk]}),
+    ('post', '/api/tasks/all/purge/', lambda task, user: {'user': user.pk}),
+    ('post', '/api/tasks/all/export/job/',
+     lambda task, user: {'format': 'csv'}),
+]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(('method', 'url', 'data'), STAFF_WRITES)
+def test_token_of_deactivated_staff_cannot_write(
+    staff_token_client: APIClient,
+    superuser: UserType,
+    user: UserType,
+    method: str,
+    url: str,
+    data: Callable[[Task, UserType], object],
+) -> None:
+    task = Task.objects.create(user=superuser, title='task')
+    User.objects.filter(pk=superuser.pk).update(
+        is_active=False, is_staff=False, is_superuser=False,
+    )
+
+    response = getattr(staff_token_client, method)(
+        url.format(pk=task.pk), data=data(task, user), format='json',
+    )
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.data['detail'] == 'User is inactive'
+    assert list(Task.objects.values_list('title', 'status')) \
+        == [('task', 'new')]
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(('method', 'url'), [
+    ('post', '/api/tasks/all/purge/'),
+    ('post', '/api/tasks/all/export/job/'),
+    ('get', '/api/tasks/all/export/'),
+])
+def test_token_of_demoted_staff_has_no_staff_access(
+    staff_token_client: APIClient,
+    superuser: UserType,
+    user: UserType,
+    method: str,
+    url: str,
+) -> None:
+    User.objects.filter(pk=superuser.pk).update(
+        is_staff=False, is_superuser=False,
+    )
+
+    response = getattr(staff_token_client, method)(
+        url, data={'user': user.pk, 'format': 'csv'},
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert not Job.objects.exists()
@@ -0,0 +1,170 @@
+from io import StringIO
+from typing import Any, Callable, List, Tuple
+
+import pytest
+from django.contrib.auth.models import Permission
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import signals
+from django.db.models.deletion import Collector
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from jobs.models import SUCCEEDED, Job
+from rest_framework import status
+from tasks.deletion import delete_user
+from tasks.models import Task, TaskStatusCounter, TaskTombstone
+from users.models import User as UserType
+
+
+@pytest.mark.parametrize('model', [Task, TaskTombstone])
+def test_no_delete_signals(model: Any) -> None:
+    """
+    The chunks are deleted without loading the rows only while no signal
+    receivers need them.
+    """
+    for signal in [signals.pre_delete, signals.post_delete]:
+        assert not signal.has_listeners(model), \
+            f'{signal} receivers on {model.__name__}'
+    assert Collector('default').can_fast_delete(model.objects.all())
+
+
+@pytest.mark.django_db
+def test_delete_user_in_chunks(
+    user: UserType, tasks_list: List[Task], settings: Any,
+) -> None:
+    settings.TASKS_JOB_CHUNK_SIZE = 4
+    TaskTombstone.record(user.pk, range(1, 7))
+    calls: List[Tuple[int, int]] = []
+
+    with CaptureQueriesContext(connection) as context:
+        deleted = delete_user(user.pk, lambda *args: calls.append(args))
+
+    assert deleted == 15
+    assert calls == [(4, 15), (8, 15), (12, 15), (15, 15)]
+    table = f'"{Task._meta.db_table}"'
+    queries = [query['sql'] for query in context.captured_queries
+               if query['sql'].startswith(('SELECT', 'DELETE'))
+               and f'FROM {table}' in query['sql']]
+    deletes = [sql for sql in queries if sql.startswith('DELETE')]
+    assert len(deletes) == 5  # the 4 chunks and the final cascade
+    for sql in queries:
+        if sql.startswith('SELECT'):
+            columns = sql.split(' FROM ')[0]
+            assert columns.startswith(f'SELECT {table}."id"'), sql
+            assert ',' not in columns, sql
+    assert not UserType.objects.filter(pk=user.pk).exists()
+    assert not Task.objects.exists()
+    assert not TaskTombstone.objects.exists()
+    assert not TaskStatusCounter.objects.exists()
+
+
+@pytest.mark.django_db
+def test_delete_user_keeps_other_tasks(
+    user: UserType, superuser: UserType, tasks_list: List[Task],
+) -> None:
+    other = Task.objects.create(user=superuser, title='other')
+
+    assert delete_user(user.pk) == 15
+
+    assert list(Task.objects.all()) == [other]
+    assert TaskStatusCounter.get_stats(superuser.pk)['total'] == 1
+
+
+@pytest.mark.django_db
+def test_delete_user_command(user: UserType, tasks_list: List[Task]) -> None:
+    out = StringIO()
+
+    call_command('delete_user', 'testuser', stdout=out)
+
+    assert 'Deleted testuser and 15 tasks' in out.getvalue()
+    assert not Task.objects.exists()
+
+
+@pytest.mark.django_db
+def test_delete_user_command_unknown_user(user: UserType) -> None:
+    with pytest.raises(CommandError, match='Unknown user'):
+        call_command('delete_user', 'testuser', 'nobody')
+
+    assert UserType.objects.filter(pk=user.pk).exists()
+
+
+@pytest.mark.django_db
+def test_admin_delete_user(
+    superuser: UserType, user: UserType, tasks_list: List[Task],
+    run_jobs: Callable[[], int], settings: Any,
+) -> None:
+    settings.TASKS_JOB_CHUNK_SIZE = 4
+    client = Client()
+    client.force_login(superuser)
+    url = f'/admin/users/user/{user.pk}/delete/'
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert dict(response.context['model_count']) == {
+        'users': 1, 'tasks': 15, 'task status counters': 3,
+    }
+    assert not response.context['perms_lacking']
+    assert not response.context['protected']
+    assert not any(
+        query['sql'].startswith(f'SELECT "{Task._meta.db_table}"."id", ')
+        for query in context.captured_queries
+    )
+    response = client.post(url, {'post': 'yes'})
+    assert response.status_code == 302
+    user.refresh_from_db()
+    assert not user.is_active
+    assert Task.objects.count() == 15
+
+    assert run_jobs() == 1
+
+    job = Job.objects.get(name='users.delete')
+    assert (job.user_id, job.params) == (superuser.pk, {'user': user.pk})
+    assert (job.status, job.done, job.total) == (SUCCEEDED, 15, 15)
+    assert job.result == {'deleted': 15}
+    assert not UserType.objects.filter(pk=user.pk).exists()
+    assert not Task.objects.exists()
+
+
+@pytest.mark.django_db
+def test_admin_delete_selected_users(
+    superuser: UserType, user: UserType, tasks_list: List[Task],
+    run_jobs: Callable[[], int],
+) -> None:
+    client = Client()
+    client.force_login(superuser)
+
+    response = client.post('/admin/users/user/', {
+        'action': 'delete_selected', 'post': 'yes',
+        '_selected_action': [user.pk],
+    })
+
+    assert response.status_code == 302
+    assert run_jobs() == 1
+    assert list(UserType.objects.all()) == [superuser]
+    assert not Task.objects.exists()
+
+
+@pytest.mark.django_db
+def test_admin_delete_user_needs_the_cascaded_permissions(
+    user: UserType, tasks_list: List[Task],
+) -> None:
+    staff = UserType.objects.create_user('staff', is_staff=True)
+    staff.user_permissions.set(Permission.objects.filter(
+        codename__in=['delete_user', 'delete_task'],
+    ))
+    Job.enqueue('tasks.purge', user.pk, user=user.pk)
+    TaskTombstone.record(user.pk, [1])
+    client = Client()
+    client.force_login(staff)
+    url = f'/admin/users/user/{user.pk}/delete/'
+
+    response = client.get(url)
+
+    assert response.context['perms_lacking'] == {
+        'job', 'task status counter', 'task tombstone',
+    }
+    assert client.post(url, {'post': 'yes'}).status_code \
+        == status.HTTP_403_FORBIDDEN
+    assert not Job.objects.filter(name='users.delete').exists()
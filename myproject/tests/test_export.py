@@ -0,0 +1,145 @@
+import csv
+import json
+from io import StringIO
+from typing import Any, Dict, List
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+from tasks.models import Task
+from tasks.renderers import StreamingRenderer
+from tasks.serializers import TaskSerializer
+from users.models import User as UserType
+
+EXPORT_URL = '/api/tasks/all/export/'
+
+
+def read(response: Any) -> str:
+    """Consume the streamed response."""
+    assert response.streaming
+    return b''.join(response.streaming_content).decode()
+
+
+def export(client: APIClient, **params: Any) -> str:
+    response = client.get(EXPORT_URL, query_params=params)
+    assert response.status_code == status.HTTP_200_OK
+    return read(response)
+
+
+def expected_rows(**filters: Any) -> List[Dict[str, Any]]:
+    tasks = Task.objects.filter(**filters).order_by('pk')
+    return [dict(row) for row in TaskSerializer(tasks, many=True).data]
+
+
+@pytest.fixture
+def other_tasks(superuser: UserType) -> List[Task]:
+    return [
+        Task.objects.create(user=superuser, title=f'other {n}', status='new')
+        for n in range(3)
+    ]
+
+
+@pytest.mark.django_db
+def test_export_ndjson(
+    superuser_client: APIClient,
+    tasks_list: List[Task],
+    other_tasks: List[Task],
+) -> None:
+    response = superuser_client.get(EXPORT_URL)
+    assert response['Content-Type'] == 'application/x-ndjson; charset=utf-8'
+    assert response['Content-Disposition'] == \
+        'attachment; filename="tasks.ndjson"'
+    content = read(response)
+    lines = content.splitlines()
+    assert len(lines) == len(tasks_list) + len(other_tasks)
+    assert [json.loads(line) for line in lines] == expected_rows()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('select', ['format', 'accept'])
+def test_export_csv(
+    superuser_client: APIClient, tasks_list: List[Task], select: str,
+) -> None:
+    if select == 'format':
+        response = superuser_client.get(EXPORT_URL, {'format': 'csv'})
+    else:
+        response = superuser_client.get(EXPORT_URL, HTTP_ACCEPT='text/csv')
+    assert response['Content-Type'] == 'text/csv; charset=utf-8'
+    content = read(response)
+    reader = csv.DictReader(StringIO(content))
+    assert reader.fieldnames == [
+        'pk', 'title', 'description', 'status', 'user.pk', 'user.username',
+        'user.first_name', 'user.last_name',
+    ]
+    rows = list(reader)
+    assert [row['title'] for row in rows] == \
+        [task['title'] for task in expected_rows()]
+    assert rows[0]['user.username'] == tasks_list[0].user.username
+
+
+@pytest.mark.django_db
+def test_export_filters_and_fields(
+    superuser_client: APIClient,
+    tasks_list: List[Task],
+    other_tasks: List[Task],
+    superuser: UserType,
+) -> None:
+    lines = export(superuser_client, status='new', user=superuser.pk)
+    assert [json.loads(line)['pk'] for line in lines.splitlines()] == \
+        [task.pk for task in other_tasks]
+    content = export(superuser_client, format='csv', fields='pk,status')
+    assert content.splitlines()[0] == 'pk,status'
+    response = superuser_client.get(EXPORT_URL, {'status': 'unknown'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_empty_csv_export_has_header(superuser_client: APIClient) -> None:
+    assert export(superuser_client, format='csv').splitlines() == [
+        'pk,title,description,status,user.pk,user.username,'
+        'user.first_name,user.last_name',
+    ]
+
+
+@pytest.mark.django_db
+def test_export_in_chunks(
+    superuser_client: APIClient,
+    tasks_list: List[Task],
+    settings: Any,
+    monkeypatch: Any,
+) -> None:
+    settings.TASKS_EXPORT_CHUNK_SIZE = 4
+    monkeypatch.setattr(StreamingRenderer, 'buffer_size', 200)
+    response = superuser_client.get(EXPORT_URL)
+    chunks = list(getattr(response, 'streaming_content'))
+    assert len(chunks) > 1
+    lines = b''.join(chunks).decode().splitlines()
+    assert [json.loads(line) for line in lines] == expected_rows()
+
+
+@pytest.mark.django_db
+def test_export_reads_from_replica(
+    superuser_client: APIClient,
+    tasks_list: List[Task],
+    replica_reads_log: List[str],
+) -> None:
+    response = superuser_client.get(EXPORT_URL)
+    assert replica_reads_log == []
+    read(response)
+    assert replica_reads_log
+
+
+@pytest.mark.django_db
+def test_export_is_staff_only(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    response = auth_client.get(EXPORT_URL)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_streaming_renderer_needs_iter_lines() -> None:
+    class IncompleteRenderer(StreamingRenderer):
+        media_type = 'text/plain'
+
+    with pytest.raises(TypeError, match='iter_lines'):
+        IncompleteRenderer()  # type: ignore[abstract]
@@ -0,0 +1,86 @@
+import os
+from typing import Any, Dict
+
+import pytest
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher,
+    check_password,
+    make_password,
+)
+from rest_framework import status
+from rest_framework.test import APIClient
+from users import hashers
+from users.models import User as UserType
+
+POOLED_HASHERS = [
+    'users.hashers.PooledScryptPasswordHasher',
+    'users.hashers.PooledPBKDF2PasswordHasher',
+]
+
+
+@pytest.fixture
+def pooled(settings: Any) -> None:
+    settings.PASSWORD_HASHING_WORKERS = 1
+
+
+def test_passwords_are_hashed_in_the_pool(pooled: None) -> None:
+    pool = hashers.get_pool()
+
+    assert pool is not None
+    assert pool.submit(os.getpid).result() != os.getpid()
+    assert hashers.get_pool() is pool
+
+
+def test_pool_disabled(settings: Any) -> None:
+    settings.PASSWORD_HASHING_WORKERS = 0
+
+    assert hashers.get_pool() is None
+    assert check_password('secret', make_password('secret'))
+
+
+def test_pooled_hash_matches_the_base_hasher(pooled: None) -> None:
+    pooled_hasher = hashers.PooledPBKDF2PasswordHasher()
+    encoded = pooled_hasher.encode('secret', 'salt', 1000)
+
+    assert encoded == PBKDF2PasswordHasher().encode('secret', 'salt', 1000)
+    assert pooled_hasher.verify('secret', encoded)
+    assert not pooled_hasher.verify('wrong', encoded)
+
+
+@pytest.mark.django_db
+def test_login_rehashes_with_the_preferred_hasher(
+    api_client: APIClient,
+    user: UserType,
+    user_credentials: Dict[str, str],
+    settings: Any,
+    pooled: None,
+) -> None:
+    assert user.password.startswith('pbkdf2_sha256$')
+    settings.PASSWORD_HASHERS = POOLED_HASHERS
+
+    response = api_client.post('/api/token/', data=user_credentials)
+
+    assert response.status_code == status.HTTP_200_OK
+    user.refresh_from_db()
+    assert user.password.startswith('scrypt$')
+    response = api_client.post('/api/token/', data=user_credentials)
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_register_with_memory_hard_hasher(
+    api_client: APIClient, settings: Any, pooled: None,
+) -> None:
+    settings.PASSWORD_HASHERS = POOLED_HASHERS
+
+    response = api_client.post('/api/users/register/', data={
+        'username': 'scrypt_user',
+        'first_name': 'Scrypt',
+        'last_name': 'User',
+        'password': 'memory-hard-123',
+    })
+
+    assert response.status_code == status.HTTP_201_CREATED
+    user = UserType.objects.get(username='scrypt_user')
+    assert user.password.startswith('scrypt$')
+    assert user.check_password('memory-hard-123')
@@ -0,0 +1,194 @@
+import json
+from io import StringIO
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from rest_framework.test import APIClient
+from tasks.models import Task
+from users.models import User as UserType
+
+
+@pytest.fixture(autouse=True)
+def import_cache(shared_cache: None) -> None:
+    """The imports refuse to run on a cache local to the process."""
+
+
+def import_tasks(path: Path, *args: Any) -> Tuple[str, List[str]]:
+    """Run the command, return its summary and the rejected lines."""
+    stdout, stderr = StringIO(), StringIO()
+    call_command(
+        'import_tasks', str(path), *args, stdout=stdout, stderr=stderr,
+    )
+    return stdout.getvalue().strip(), stderr.getvalue().splitlines()
+
+
+def task_values(**filters: Any) -> List[Tuple[Any, ...]]:
+    return list(Task.objects.filter(**filters).order_by('pk').values_list(
+        'user_id', 'title', 'description', 'status',
+    ))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('format', ['ndjson', 'csv'])
+@pytest.mark.parametrize('method', ['copy', 'bulk'])
+def test_import_export_round_trip(
+    superuser_client: APIClient,
+    tasks_list: List[Task],
+    tmp_path: Path,
+    format: str,
+    method: str,
+) -> None:
+    response = superuser_client.get(
+        '/api/tasks/all/export/', {'format': format},
+    )
+    path = tmp_path / f'tasks.{format}'
+    path.write_bytes(b''.join(getattr(response, 'streaming_content')))
+    exported = task_values()
+    Task.objects.all().delete()
+    summary, rejected = import_tasks(
+        path, '--method', method, '--chunk-size', '4',
+    )
+    assert summary.startswith(f'Imported {len(tasks_list)} tasks, '
+                              f'rejected 0 rows')
+    assert rejected == []
+    assert task_values() == exported
+
+
+@pytest.mark.django_db
+def test_import_reports_rejected_rows(
+    user: UserType, tmp_path: Path,
+) -> None:
+    path = tmp_path / 'tasks.jsonl'
+    path.write_text('\n'.join([
+        json.dumps({'title': 'valid', 'user': user.pk}),
+        json.dumps({'title': 'x' * 65, 'user': user.pk}),
+        json.dumps({'title': 'bad status', 'status': 'done', 'user': user.pk}),
+        json.dumps({'description': 'no title', 'user': user.pk}),
+        json.dumps({'title': 'no user'}),
+        json.dumps({'title': 'unknown user', 'user': 0}),
+        '{"title": ',
+        '[1, 2]',
+        json.dumps({'title': 'also valid', 'status': 'completed',
+                    'user': {'pk': user.pk}}),
+    ]) + '\n')
+    summary, rejected = import_tasks(path)
+    assert summary.startswith('Imported 2 tasks, rejected 7 rows')
+    assert rejected.pop(
+        next(n for n, line in enumerate(rejected) if line.startswith('Line 7'))
+    ).startswith('Line 7: row: Invalid JSON: Expecting value')
+    assert sorted(rejected) == sorted([
+        'Line 2: title: Ensure this value has at most 64 characters '
+        '(it has 65).',
+        "Line 3: status: Value 'done' is not a valid choice.",
+        'Line 4: title: This field cannot be blank.',
+        'Line 5: user: A valid user id is required.',
+        'Line 6: user: User 0 does not exist.',
+        'Line 8: row: Expected a JSON object.',
+    ])
+    assert task_values() == [
+        (user.pk, 'valid', '', 'new'),
+        (user.pk, 'also valid', '', 'completed'),
+    ]
+
+
+@pytest.mark.django_db
+def test_import_csv_for_user(user: UserType, tmp_path: Path) -> None:
+    path = tmp_path / 'tasks.txt'
+    path.write_text(
+        'title,description,status\n'
+        'first,"multi\nline",in_progress\n'
+        'second,,\n'
+        ',,completed\n'
+    )
+    summary, rejected = import_tasks(
+        path, '--format', 'csv', '--user', user.username,
+    )
+    assert rejected == ['Line 5: title: This field cannot be blank.']
+    assert task_values() == [
+        (user.pk, 'first', 'multi\nline', 'in_progress'),
+        (user.pk, 'second', '', 'new'),
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('method', ['copy', 'bulk'])
+def test_import_rejects_rows_refused_by_database(
+    user: UserType, tmp_path: Path, method: str,
+) -> None:
+    path = tmp_path / 'tasks.ndjson'
+    path.write_text(''.join(
+        json.dumps({'title': title, 'user': user.pk}) + '\n'
+        for title in ['first', 'nul \x00 byte', 'third']
+    ))
+    summary, rejected = import_tasks(path, '--method', method)
+    assert summary.startswith('Imported 2 tasks, rejected 1 rows')
+    assert len(rejected) == 1 and rejected[0].startswith('Line 2: row: ')
+    assert [title for _, title, _, _ in task_values()] == ['first', 'third']
+
+
+@pytest.mark.django_db
+def test_import_invalidates_list_cache(
+    auth_client: APIClient, user: UserType, tmp_path: Path,
+) -> None:
+    auth_client.get('/api/tasks/')
+    path = tmp_path / 'tasks.ndjson'
+    path.write_text(json.dumps({'title': 'imported', 'user': user.pk}))
+    import_tasks(path)
+    response = auth_client.get('/api/tasks/')
+    assert response['X-Cache'] == 'MISS'
+    assert response.data['results'][0]['title'] == 'imported'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_in_parallel(user: UserType, tmp_path: Path) -> None:
+    path = tmp_path / 'tasks.ndjson'
+    path.write_text(''.join(
+        json.dumps({'title': f'task {n}', 'user': user.pk}) + '\n'
+        for n in range(50)
+    ) + '{}\n')
+    summary, rejected = import_tasks(
+        path, '--workers', '2', '--chunk-size', '7',
+    )
+    assert summary.startswith('Imported 50 tasks, rejected 1 rows')
+    assert len(rejected) == 1 and rejected[0].startswith('Line 51: ')
+    assert sorted(title for _, title, _, _ in task_values()) == \
+        sorted(f'task {n}' for n in range(50))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('name', 'args', 'error'),
+    [
+        ('tasks.txt', [], 'Unknown file format, use --format.'),
+        ('tasks.csv', ['--user', 'nobody'], 'User `nobody` does not exist.'),
+        (
+            'tasks.csv', ['--chunk-size', '0'],
+            "--chunk-size: '0' is not a positive integer.",
+        ),
+        (
+            'tasks.csv', ['--workers', 'two'],
+            "--workers: 'two' is not a positive integer.",
+        ),
+    ],
+)
+def test_import_invalid_options(
+    tmp_path: Path, name: str, args: List[str], error: str,
+) -> None:
+    path = tmp_path / name
+    path.write_text('')
+    with pytest.raises(CommandError, match=error):
+        import_tasks(path, *args)
+
+
+def test_import_needs_a_shared_cache(settings: Any, tmp_path: Path) -> None:
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}
+    path = tmp_path / 'tasks.csv'
+    path.write_text('title\nTask\n')
+
+    with pytest.raises(ImproperlyConfigured, match='The imports'):
+        import_tasks(path)
@@ -0,0 +1,306 @@
+import csv
+import threading
+from datetime import timedelta
+from io import StringIO
+from typing import Any, Callable, List
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+from jobs.models import FAILED, QUEUED, RUNNING, SUCCEEDED, Job
+from jobs.registry import handlers
+from jobs.worker import claim_job, run_job
+from rest_framework import status
+from rest_framework.test import APIClient
+from tasks.models import Task, TaskTombstone
+from users.models import User as UserType
+
+
+def make_due(job: Job) -> None:
+    Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+
+
+@pytest.mark.django_db
+def test_job_retried_then_failed(
+    user: UserType, run_jobs: Callable[[], int], monkeypatch: Any,
+) -> None:
+    def handler(job: Job) -> None:
+        raise ValueError('boom')
+
+    monkeypatch.setitem(handlers, 'test.fail', handler)
+    job = Job.enqueue('test.fail', user.pk)
+
+    assert run_jobs() == 1
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == (QUEUED, 1)
+    assert job.error == 'ValueError: boom'
+    assert job.run_at > timezone.now()
+    assert run_jobs() == 0
+
+    for _ in range(job.max_attempts - 1):
+        make_due(job)
+        assert run_jobs() == 1
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == (FAILED, job.max_attempts)
+    assert job.finished_at is not None
+
+
+@pytest.mark.django_db
+def test_job_succeeds_on_retry(
+    user: UserType, run_jobs: Callable[[], int], monkeypatch: Any,
+) -> None:
+    calls: List[int] = []
+
+    def handler(job: Job) -> int:
+        calls.append(job.attempts)
+        if len(calls) == 1:
+            raise ConnectionError
+        return job.attempts
+
+    monkeypatch.setitem(handlers, 'test.flaky', handler)
+    job = Job.enqueue('test.flaky', user.pk)
+    run_jobs()
+    make_due(job)
+    run_jobs()
+
+    job.refresh_from_db()
+    assert (job.status, job.result, job.error) == (SUCCEEDED, 2, '')
+    assert calls == [1, 2]
+
+
+@pytest.mark.django_db
+def test_unknown_job_fails(user: UserType, run_jobs: Callable[[], int]) -> None:
+    job = Job.enqueue('test.unknown', user.pk)
+
+    run_jobs()
+
+    job.refresh_from_db()
+    assert (job.status, job.error) == (FAILED, 'Unknown job `test.unknown`.')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(('attempts', 'expected'), [(1, QUEUED), (3, FAILED)])
+def test_lost_job_taken_over(
+    user: UserType, settings: Any, attempts: int, expected: str,
+    monkeypatch: Any,
+) -> None:
+    def handler(job: Job) -> None:
+        raise ValueError
+
+    monkeypatch.setitem(handlers, 'test.lost', handler)
+    job = Job.enqueue('test.lost', user.pk)
+    Job.objects.filter(pk=job.pk).update(
+        status=RUNNING, attempts=attempts,
+        updated_at=timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT),
+    )
+
+    claimed = claim_job()
+
+    assert claimed is not None and claimed.pk == job.pk
+    assert claimed.attempts == attempts + 1
+    run_job(claimed)
+    job.refresh_from_db()
+    assert job.status == expected
+
+
+@pytest.mark.django_db
+def test_running_job_not_taken_over(user: UserType) -> None:
+    job = Job.enqueue('test.running', user.pk)
+    Job.objects.filter(pk=job.pk).update(status=RUNNING)
+
+    assert claim_job() is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_locked_job_skipped_by_other_workers(user: UserType) -> None:
+    job = Job.enqueue('test.locked', user.pk)
+    locked, release = threading.Event(), threading.Event()
+
+    def lock() -> None:
+        with transaction.atomic():
+            Job.objects.select_for_update().get(pk=job.pk)
+            locked.set()
+            release.wait(5)
+        connection.close()
+
+    thread = threading.Thread(target=lock)
+    thread.start()
+    try:
+        assert locked.wait(5)
+        assert claim_job() is None
+    finally:
+        release.set()
+        thread.join()
+    assert claim_job() is not None
+
+
+@pytest.mark.django_db
+def test_mark_completed_in_chunks(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    run_jobs: Callable[[], int],
+    settings: Any,
+) -> None:
+    settings.TASKS_JOB_CHUNK_SIZE = 2
+    Task.objects.update(status='new')
+
+    response = auth_client.post(
+        '/api/tasks/mark_completed/', data={'status': 'new'},
+    )
+    run_jobs()
+
+    job = Job.objects.get(pk=response.data['pk'])
+    assert (job.status, job.done, job.total) == (SUCCEEDED, 15, 15)
+    assert job.result == {'updated': 15}
+    assert not Task.objects.exclude(status='completed').exists()
+
+
+@pytest.mark.django_db
+def test_purge(
+    superuser_client: APIClient,
+    user: UserType,
+    tasks_list: List[Task],
+    run_jobs: Callable[[], int],
+    settings: Any,
+) -> None:
+    settings.TASKS_JOB_CHUNK_SIZE = 4
+
+    response = superuser_client.post(
+        '/api/tasks/all/purge/', data={'user': user.pk},
+    )
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.data['params'] == {'user': user.pk}
+    run_jobs()
+    assert not Task.objects.filter(user=user).exists()
+    assert set(TaskTombstone.objects.filter(user=user)
+               .values_list('task_id', flat=True)) \
+        == {task.pk for task in tasks_list}
+    job = superuser_client.get(response['Location']).data
+    assert (job['status'], job['result']) == ('succeeded', {'deleted': 15})
+
+
+@pytest.mark.django_db
+def test_purge_resumes_after_an_error(
+    superuser: UserType,
+    user: UserType,
+    tasks_list: List[Task],
+    run_jobs: Callable[[], int],
+    settings: Any,
+    monkeypatch: Any,
+) -> None:
+    settings.TASKS_JOB_CHUNK_SIZE = 4
+    record = TaskTombstone.record
+    calls: List[int] = []
+
+    def flaky_record(user_id: Any, task_ids: List[int]) -> None:
+        calls.append(len(task_ids))
+        if len(calls) == 2:
+            raise ConnectionError
+        record(user_id, task_ids)
+
+    monkeypatch.setattr(TaskTombstone, 'record', flaky_record)
+    job = Job.enqueue('tasks.purge', superuser.pk, user=user.pk)
+    run_jobs()
+    job.refresh_from_db()
+    assert (job.status, job.done, job.total) == (QUEUED, 4, 15)
+
+    make_due(job)
+    run_jobs()
+
+    job.refresh_from_db()
+    assert (job.status, job.done, job.total) == (SUCCEEDED, 15, 15)
+    assert job.result == {'deleted': 15}
+    assert TaskTombstone.objects.filter(user=user).count() == 15
+
+
+@pytest.mark.django_db
+def test_purge_is_staff_only(
+    auth_client: APIClient, user: UserType,
+) -> None:
+    response = auth_client.post(
+        '/api/tasks/all/purge/', data={'user': user.pk},
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_purge_of_unknown_user(superuser_client: APIClient) -> None:
+    response = superuser_client.post('/api/tasks/all/purge/', data={'user': 0})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db
+def test_export_job(
+    superuser_client: APIClient,
+    tasks_list: List[Task],
+    run_jobs: Callable[[], int],
+) -> None:
+    response = superuser_client.post('/api/tasks/all/export/job/', data={
+        'format': 'csv', 'status': 'new', 'fields': ['pk', 'title'],
+    }, format='json')
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    location = response['Location']
+    assert superuser_client.get(f'{location}download/').status_code \
+        == status.HTTP_404_NOT_FOUND
+
+    run_jobs()
+
+    download: Any = superuser_client.get(f'{location}download/')
+    assert download.status_code == status.HTTP_200_OK
+    assert download['Content-Disposition'].startswith('attachment')
+    content = b''.join(download.streaming_content).decode()
+    expected = [task for task in reversed(tasks_list) if task.status == 'new']
+    assert list(csv.reader(StringIO(content))) == [
+        ['pk', 'title'], *([str(task.pk), task.title] for task in expected),
+    ]
+    job = superuser_client.get(location).data
+    assert job['result']['rows'] == len(expected)
+
+
+@pytest.mark.django_db
+def test_export_job_validation(superuser_client: APIClient) -> None:
+    response = superuser_client.post('/api/tasks/all/export/job/', data={
+        'format': 'xml', 'fields': ['secret'],
+    }, format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert set(response.data) == {'format', 'fields'}
+
+
+@pytest.mark.django_db
+def test_jobs_of_other_users_hidden(
+    auth_client: APIClient, user: UserType, superuser: UserType,
+) -> None:
+    own = Job.enqueue('test.own', user.pk)
+    other = Job.enqueue('test.other', superuser.pk)
+
+    response = auth_client.get('/api/jobs/')
+
+    assert [job['pk'] for job in response.data['results']] == [own.pk]
+    assert auth_client.get(f'/api/jobs/{other.pk}/').status_code \
+        == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_run_worker_command(
+    user: UserType, tasks_list: List[Task], shared_cache: None,
+) -> None:
+    Job.enqueue('tasks.mark_completed', user.pk, status='new')
+    out = StringIO()
+
+    call_command('run_worker', '--burst', stdout=out)
+
+    assert 'Ran 1 jobs.' in out.getvalue()
+    assert not Task.objects.filter(status='new').exists()
+
+
+def test_run_worker_needs_a_shared_cache() -> None:
+    """The invalidations of the jobs must reach the server processes."""
+    with pytest.raises(ImproperlyConfigured, match='The job workers'):
+        call_command('run_worker', '--burst')
@@ -0,0 +1,99 @@
+import re
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+from mysite import metrics as metrics_module
+from mysite.metrics import (
+    RequestStats,
+    current_stats,
+    metrics,
+    timed_serialization,
+)
+from rest_framework import status
+from rest_framework.test import APIClient
+from tasks.models import Task
+
+
+@pytest.mark.django_db
+def test_sampled_request_has_server_timing(
+    auth_client: APIClient, tasks_list: List[Task], settings: Any,
+) -> None:
+    settings.PERF_SAMPLE_RATE = 1
+    response = auth_client.get('/api/tasks/')
+    assert response.status_code == status.HTTP_200_OK
+    timing = response['Server-Timing']
+    assert re.fullmatch(
+        r'total;dur=[\d.]+, view;dur=[\d.]+, '
+        r'db;dur=[\d.]+;desc="2 queries", serialize;dur=[\d.]+, '
+        r'render;dur=[\d.]+, cache;desc=MISS',
+        timing,
+    ), timing
+
+
+@pytest.mark.django_db
+def test_unsampled_request_is_only_counted(
+    auth_client: APIClient, tasks_list: List[Task], settings: Any,
+) -> None:
+    settings.PERF_SAMPLE_RATE = 0
+    metrics.reset()  # the login of `auth_client` may have been sampled
+    response = auth_client.get(f'/api/tasks/{tasks_list[0].pk}/')
+    assert 'Server-Timing' not in response
+    output = APIClient().get('/metrics/').content.decode()
+    assert 'http_requests_total{view="TasksApiViewSet.retrieve",' \
+           'method="GET",status="200"} 1' in output
+    assert 'http_sampled_requests_total{' not in output
+
+
+@pytest.mark.django_db
+def test_metrics_per_view(
+    auth_client: APIClient, tasks_list: List[Task], settings: Any,
+) -> None:
+    settings.PERF_SAMPLE_RATE = 1
+    auth_client.get('/api/tasks/')
+    auth_client.get('/api/tasks/')
+    auth_client.post('/api/tasks/', data={'title': 'new'}, format='json')
+    output = APIClient().get('/metrics/').content.decode()
+    view = 'view="TasksApiViewSet.list"'
+    assert f'http_request_duration_seconds_count{{{view}}} 2' in output
+    assert f'http_request_duration_seconds_bucket{{{view},le="+Inf"}} 2' \
+        in output
+    assert f'http_sampled_requests_total{{{view}}} 2' in output
+    assert f'db_queries_total{{{view}}} 2' in output
+    assert f'view_duration_seconds_total{{{view}}} ' in output
+    assert f'serialize_duration_seconds_total{{{view}}} ' in output
+    assert f'http_cache_requests_total{{{view},result="hit"}} 1' in output
+    assert f'http_cache_requests_total{{{view},result="miss"}} 1' in output
+    assert 'http_requests_total{view="TasksApiViewSet.create",' \
+           'method="POST",status="201"} 1' in output
+    assert 'task_list_cache_requests_total{result="hits"}' in output
+
+
+@pytest.mark.django_db
+def test_metrics_hidden_from_remote_clients(api_client: APIClient) -> None:
+    response = api_client.get('/metrics/', REMOTE_ADDR='203.0.113.7')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_serializer_time_excludes_nested_calls_and_queries(
+    monkeypatch: Any,
+) -> None:
+    clock = iter([1.0, 5.0])
+    fake_time = SimpleNamespace(perf_counter=lambda: next(clock))
+    monkeypatch.setattr(metrics_module, 'time', fake_time)
+    stats = RequestStats(sampled=True)
+
+    @timed_serialization
+    def nested() -> None:
+        stats.db_duration += 1.0  # a query of a lazy queryset
+
+    @timed_serialization
+    def serialize() -> None:
+        nested()
+
+    token = current_stats.set(stats)
+    try:
+        serialize()
+    finally:
+        current_stats.reset(token)
+    assert stats.serialize_duration == 3.0
@@ -0,0 +1,264 @@
+from itertools import count
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+import pytest
+from _pytest.fixtures import SubRequest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+from jobs.models import SUCCEEDED, Job
+from rest_framework.test import APIClient
+from tasks.models import Task
+from users.models import User as UserType
+
+User = get_user_model()
+
+DATA_SIZES = [5, 50]
+# Slack for the SQL time of the biggest data size over the smallest one
+TIME_GROWTH_FACTOR = 5
+TIME_GROWTH_SLACK = 0.05
+
+Data = Callable[[Dict[str, Any]], Any]
+usernames = (f'budget_user_{number}' for number in count())
+
+
+def no_data(context: Dict[str, Any]) -> Any:
+    return None
+
+
+# name: (client fixture, method, url, request data, query budget)
+# The writes in a transaction count its SAVEPOINT and RELEASE, and all the
+# writes load the user of the token.
+BUDGETS: Dict[str, Tuple[str, str, str, Data, int]] = {
+    'token': (
+        'api_client', 'post', '/api/token/',
+        lambda context: {'username': 'testuser', 'password': 'testpass123'},
+        1,
+    ),
+    'token_refresh': (
+        'api_client', 'post', '/api/token/refresh/',
+        lambda context: {'refresh': context['refresh']},
+        1,
+    ),
+    'register': (
+        'api_client', 'post', '/api/users/register/',
+        lambda context: {
+            'username': next(usernames),
+            'first_name': 'Budget',
+            'last_name': 'User',
+            'password': 'budget-pass-123',
+        },
+        2,
+    ),
+    'list': ('auth_client', 'get', '/api/tasks/', no_data, 2),
+    'list_filtered': (
+        'auth_client', 'get', '/api/tasks/?status=new', no_data, 2,
+    ),
+    'list_search': (
+        'auth_client', 'get', '/api/tasks/?search=task', no_data, 2,
+    ),
+    'list_cursor': (
+        'auth_client', 'get', '/api/tasks/?pagination=cursor', no_data, 2,
+    ),
+    'retrieve': ('auth_client', 'get', '/api/tasks/{pk}/', no_data, 1),
+    'create': (
+        'auth_client', 'post', '/api/tasks/',
+        lambda context: {'title': 'created'},
+        2,
+    ),
+    'update': (
+        'auth_client', 'put', '/api/tasks/{pk}/',
+        lambda context: {'title': 'changed', 'status': 'new'},
+        5,
+    ),
+    'partial_update': (
+        'auth_client', 'patch', '/api/tasks/{pk}/',
+        lambda context: {'title': 'changed'},
+        5,
+    ),
+    'destroy': ('auth_client', 'delete', '/api/tasks/{pk}/', no_data, 6),
+    'mark_completed': (
+        'auth_client', 'post', '/api/tasks/{pk}/mark_completed/', no_data, 3,
+    ),
+    'mark_completed_bulk': (
+        'auth_client', 'post', '/api/tasks/mark_completed/',
+        lambda context: {'status': 'new'},
+        2,
+    ),
+    'bulk_create': (
+        'auth_client', 'post', '/api/tasks/bulk/',
+        lambda context: [{'title': f'batch {n}'} for n in range(10)],
+        4,
+    ),
+    'bulk_update': (
+        'auth_client', 'patch', '/api/tasks/bulk/',
+        lambda context: [
+            {'pk': pk, 'title': 'changed'} for pk in context['pks'][:10]
+        ],
+        5,
+    ),
+    'bulk_destroy': (
+        'auth_client', 'delete', '/api/tasks/bulk/',
+        lambda context: {'ids': context['pks'][:10]},
+        6,
+    ),
+    'changes': ('auth_client', 'get', '/api/tasks/changes/', no_data, 2),
+    'stats': ('auth_client', 'get', '/api/tasks/stats/', no_data, 1),
+    'async_list': ('auth_client', 'get', '/api/tasks/async/', no_data, 2),
+    'async_retrieve': (
+        'auth_client', 'get', '/api/tasks/async/{pk}/', no_data, 1,
+    ),
+    'async_create': (
+        'auth_client', 'post', '/api/tasks/async/',
+        lambda context: {'title': 'created'},
+        3,
+    ),
+    'async_update': (
+        'auth_client', 'patch', '/api/tasks/async/{pk}/',
+        lambda context: {'title': 'changed'},
+        3,
+    ),
+    'async_mark_completed': (
+        'auth_client', 'post', '/api/tasks/async/{pk}/mark_completed/',
+        no_data, 3,
+    ),
+    'all_tasks': (
+        'superuser_client', 'get', '/api/tasks/all/', no_data, 2,
+    ),
+    'all_tasks_search': (
+        'superuser_client', 'get', '/api/tasks/all/?search=task', no_data, 2,
+    ),
+    'export': (
+        'superuser_client', 'get', '/api/tasks/all/export/', no_data, 1,
+    ),
+    'all_tasks_stats': (
+        'superuser_client', 'get', '/api/tasks/all/stats/', no_data, 1,
+    ),
+    'export_tasks_job': (
+        'superuser_client', 'post', '/api/tasks/all/export/job/',
+        lambda context: {'format': 'csv', 'status': 'new'},
+        1,
+    ),
+    'purge_tasks': (
+        'superuser_client', 'post', '/api/tasks/all/purge/',
+        lambda context: {'user': context['user']},
+        2,
+    ),
+    'job-list': ('auth_client', 'get', '/api/jobs/', no_data, 2),
+    'job-detail': ('auth_client', 'get', '/api/jobs/{job}/', no_data, 1),
+    'job-download': (
+        'auth_client', 'get', '/api/jobs/{job}/download/', no_data, 1,
+    ),
+    'admin_tasks': ('admin_client', 'get', '/admin/tasks/task/', no_data, 5),
+    'admin_task': (
+        'admin_client', 'get', '/admin/tasks/task/{pk}/change/', no_data, 4,
+    ),
+    'schema': ('api_client', 'get', '/api/schema/', no_data, 0),
+    'swagger': ('api_client', 'get', '/api/schema/swagger/', no_data, 0),
+    'redoc': ('api_client', 'get', '/api/schema/redoc/', no_data, 0),
+    'metrics': ('api_client', 'get', '/metrics/', no_data, 0),
+}
+# Routes shadowed by others, which can't be requested
+UNREACHABLE_ROUTES = {'api-root'}
+
+
+def grow_tasks(users: List[UserType], size: int) -> None:
+    """Give every user `size` tasks."""
+    for user in users:
+        missing = size - Task.objects.filter(user=user).count()
+        Task.objects.bulk_create(
+            Task(user=user, title=f'task {n}', status='new')
+            for n in range(missing)
+        )
+
+
+def measure_queries(
+    client: Any, method: str, url: str, data: Any,
+) -> Tuple[int, float, List[str]]:
+    """Send the request and return the number, time and SQL of its queries."""
+    cache.clear()
+    kwargs = {} if isinstance(client, APIClient) \
+        else {'content_type': 'application/json'}
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(
+            url, data=data, format='json', **kwargs,
+        ) if isinstance(client, APIClient) \
+            else getattr(client, method)(url, **kwargs)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code < 400, response.content
+    queries = context.captured_queries
+    total = sum(float(query['time']) for query in queries)
+    return len(queries), total, [query['sql'] for query in queries]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', BUDGETS)
+def test_query_budget(
+    request: SubRequest,
+    name: str,
+    user: UserType,
+    superuser: UserType,
+    refresh_token: str,
+) -> None:
+    client_name, method, url, data, budget = BUDGETS[name]
+    client = request.getfixturevalue(client_name)
+    other = User.objects.create_user(username='other', password='x')
+    results: List[Tuple[int, float, List[str]]] = []
+    # the first request warms the per-process caches, e.g. of content types
+    for size in DATA_SIZES[:1] + DATA_SIZES:
+        grow_tasks([user, other], size)
+        target = Task.objects.create(user=user, title='target')
+        job = Job.objects.create(
+            name='tasks.export', user=user, status=SUCCEEDED,
+            result={'file': default_storage.save(
+                'exports/budget.ndjson', ContentFile(b'{}\n'),
+            )},
+        )
+        context: Dict[str, Any] = {
+            'refresh': refresh_token,
+            'user': user.pk,
+            'pks': list(Task.objects.filter(user=user)
+                        .values_list('pk', flat=True)),
+        }
+        results.append(measure_queries(
+            client, method, url.format(pk=target.pk, job=job.pk),
+            data(context),
+        ))
+    (small, small_time, _), (large, large_time, sql) = results[1], results[-1]
+    assert large <= budget, \
+        f'{name}: {large} queries over the budget of {budget}:\n' \
+        + '\n'.join(sql)
+    assert large == small, \
+        f'{name}: the queries grew from {small} to {large} with the data'
+    limit = max(
+        small_time * TIME_GROWTH_FACTOR, small_time + TIME_GROWTH_SLACK,
+    )
+    assert large_time <= limit, \
+        f'{name}: the query time grew from {small_time:.4f}s ' \
+        f'to {large_time:.4f}s with the data'
+
+
+def iter_url_names(
+        patterns: Sequence[Any],
+) -> Iterator[str]:
+    """Yield the names of the routes of the project, except the admin."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.app_name != 'admin':
+                yield from iter_url_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name
+
+
+def test_query_budgets_cover_every_route() -> None:
+    covered = {
+        resolve(url.format(pk=1, job=1).split('?')[0]).url_name
+        for _, _, url, _, _ in BUDGETS.values()
+    }
+    routes = set(iter_url_names(get_resolver().url_patterns))
+    assert routes - UNREACHABLE_ROUTES - covered == set()
@@ -0,0 +1,200 @@
+import json
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from _pytest.fixtures import SubRequest
+from django.db import connection
+from django.db.transaction import atomic
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from tasks.models import Task, TaskTombstone
+from users.models import User as UserType
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason='Query plans are checked against PostgreSQL only',
+)
+
+LIST_PATHS = [
+    ('auth_client', '/api/tasks/', {}),
+    ('auth_client', '/api/tasks/', {'status': 'new'}),
+    ('auth_client', '/api/tasks/', {'pagination': 'cursor'}),
+    ('auth_client', '/api/tasks/', {'pagination': 'cursor', 'status': 'new'}),
+    ('superuser_client', '/api/tasks/all/', {}),
+    ('superuser_client', '/api/tasks/all/', {'status': 'in_progress'}),
+    ('superuser_client', '/api/tasks/all/', {'pagination': 'cursor'}),
+    (
+        'superuser_client',
+        '/api/tasks/all/',
+        {'pagination': 'cursor', 'status': 'new'},
+    ),
+]
+
+ADMIN_FILTERS = [{}, {'status': 'new'}, {'user': None}, {'o': '3'}]
+
+OTHER_TASKS = 300
+
+
+@pytest.fixture(autouse=True)
+def analyzed(tasks_list: List[Task], superuser: UserType) -> None:
+    """
+    Pin the statistics of the tables to the rows of the fixtures.
+
+    The completed tasks of another user keep the filters on the owner and
+    the open statuses selective, as they are in production, and the plans
+    no longer depend on the statistics autovacuum left from the rows of
+    the previous tests.
+    """
+    Task.objects.bulk_create(
+        Task(user=superuser, title=f'Task {number}', status='completed')
+        for number in range(OTHER_TASKS)
+    )
+    with connection.cursor() as cursor:
+        for model in (Task, TaskTombstone, UserType):
+            cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+
+
+def iter_plan_nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Walk the plan tree returned by `EXPLAIN (FORMAT JSON)`."""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from iter_plan_nodes(child)
+
+
+def explain(sql: str) -> Dict[str, Any]:
+    """
+    Return the plan of the query with sequential scans and sorts disabled.
+
+    The planner still falls back to them when no index can serve the query,
+    so their presence in the plan means an index is missing. The settings
+    are local to a transaction, opened for the tests run in autocommit.
+    """
+    with atomic(), connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('SET LOCAL enable_sort = off')
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+        result = cursor.fetchone()[0]
+    plans = json.loads(result) if isinstance(result, str) else result
+    plan: Dict[str, Any] = plans[0]['Plan']
+    return plan
+
+
+def captured_task_queries(
+    client: APIClient, url: str, params: Dict[str, Any],
+) -> List[str]:
+    """Walk every page of the list and return the SQL of its task queries."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, query_params=params)
+        while response.status_code == status.HTTP_200_OK \
+                and response.data['next']:
+            response = client.get(response.data['next'])
+    assert response.status_code == status.HTTP_200_OK
+    table = Task._meta.db_table
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT') and f'"{table}"' in query['sql']
+    ]
+
+
+def assert_uses_indexes(sql: str) -> None:
+    """Fail on sorts, sequential scans and rows filtered after the scan."""
+    table = Task._meta.db_table
+    for node in iter_plan_nodes(explain(sql)):
+        assert 'Sort' not in node['Node Type'], \
+            f'Sort in the plan of: {sql}'
+        if node.get('Relation Name') != table:
+            continue
+        assert node['Node Type'] != 'Seq Scan', \
+            f'Sequential scan on {table} in the plan of: {sql}'
+        assert 'Filter' not in node, \
+            f'Rows of {table} filtered outside the index in: {sql}'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(('client_name', 'url', 'params'), LIST_PATHS)
+def test_task_list_queries_use_indexes(
+    request: SubRequest,
+    tasks_list: List[Task],
+    client_name: str,
+    url: str,
+    params: Dict[str, Any],
+) -> None:
+    client = request.getfixturevalue(client_name)
+    queries = captured_task_queries(client, url, params)
+    assert queries, 'No queries on tasks were captured'
+    for sql in queries:
+        assert_uses_indexes(sql)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_task_changes_queries_use_indexes(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    since = auth_client.get('/api/tasks/changes/').data['since']
+    with CaptureQueriesContext(connection) as context:
+        response = auth_client.get(
+            '/api/tasks/changes/', query_params={'since': since},
+        )
+    assert response.status_code == status.HTTP_200_OK
+    tables = {Task._meta.db_table, TaskTombstone._meta.db_table}
+    queries = [
+        query['sql'] for query in context.captured_queries
+        if any(f'FROM "{table}"' in query['sql'] for table in tables)
+    ]
+    assert len(queries) == 2
+    for sql in queries:
+        for node in iter_plan_nodes(explain(sql)):
+            assert 'Sort' not in node['Node Type'], \
+                f'Sort in the plan of: {sql}'
+            assert node['Node Type'] != 'Seq Scan', \
+                f'Sequential scan in the plan of: {sql}'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('search', ['report', 'rep', 'weekly report'])
+def test_task_search_queries_use_the_search_index(
+    superuser_client: APIClient, tasks_list: List[Task], search: str,
+) -> None:
+    queries = captured_task_queries(
+        superuser_client, '/api/tasks/all/', {'search': search},
+    )
+    assert queries, 'No queries on tasks were captured'
+    with connection.cursor() as cursor:
+        # a full scan of another index would replace the sequential scan
+        # of such a small table
+        cursor.execute('SET LOCAL enable_indexscan = off')
+    for sql in queries:
+        indexes = {node.get('Index Name') for node in iter_plan_nodes(
+            explain(sql),
+        )}
+        assert 'task_search_vector_idx' in indexes, \
+            f'Search index not used in: {sql}'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', ADMIN_FILTERS)
+def test_admin_task_list_queries_use_indexes(
+    superuser: UserType,
+    user: UserType,
+    tasks_list: List[Task],
+    params: Dict[str, Any],
+) -> None:
+    client = Client()
+    client.force_login(superuser)
+    params = {
+        name: user.pk if value is None else value
+        for name, value in params.items()
+    }
+    with CaptureQueriesContext(connection) as context:
+        response = client.get('/admin/tasks/task/', query_params=params)
+    assert response.status_code == status.HTTP_200_OK
+    table = Task._meta.db_table
+    queries = [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT') and f'"{table}"' in query['sql']
+    ]
+    assert queries, 'No queries on tasks were captured'
+    for sql in queries:
+        assert_uses_indexes(sql)
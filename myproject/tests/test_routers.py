@@ -0,0 +1,151 @@
+from typing import Any, List
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import router
+from django.test import Client
+from mysite.routers import ReplicaRouter, pin_primary, replica_reads
+from rest_framework import status
+from rest_framework.test import APIClient
+from tasks.models import Task
+from users.models import User as UserType
+
+
+@pytest.fixture
+def replica(settings: Any) -> None:
+    settings.DATABASE_REPLICAS = ['replica_1']
+
+
+def test_reads_go_to_replica_within_block(replica: None) -> None:
+    assert router.db_for_read(Task) == 'default'
+    with replica_reads(1):
+        assert router.db_for_read(Task) == 'replica_1'
+        assert router.db_for_write(Task) == 'default'
+        # the block reads its own writes
+        assert router.db_for_read(Task) == 'default'
+    with replica_reads(1):
+        assert router.db_for_read(Task) == 'replica_1'
+    assert router.db_for_read(Task) == 'default'
+
+
+def test_pinned_session_reads_from_primary(replica: None) -> None:
+    pin_primary(1)
+    with replica_reads(1):
+        assert router.db_for_read(Task) == 'default'
+    with replica_reads(2):
+        assert router.db_for_read(Task) == 'replica_1'
+
+
+@pytest.mark.parametrize(
+    ('backend', 'replicas', 'shared'),
+    [
+        ('django.core.cache.backends.locmem.LocMemCache', [], True),
+        ('django.core.cache.backends.locmem.LocMemCache', ['replica_1'], False),
+        ('django.core.cache.backends.redis.RedisCache', ['replica_1'], True),
+    ],
+)
+def test_replicas_need_a_shared_cache(
+    settings: Any, backend: str, replicas: List[str], shared: bool,
+) -> None:
+    """The pins of the primary must be seen by all processes."""
+    settings.CACHES = {
+        'default': {'BACKEND': backend, 'LOCATION': 'redis://localhost:6379'},
+    }
+    settings.DATABASE_REPLICAS = replicas
+    if shared:
+        ReplicaRouter()
+    else:
+        with pytest.raises(ImproperlyConfigured, match='read replicas'):
+            ReplicaRouter()
+
+
+def test_reads_stay_on_primary_without_replicas() -> None:
+    with replica_reads(1):
+        assert router.db_for_read(Task) == 'default'
+
+
+def test_replicas_are_not_migrated(replica: None) -> None:
+    assert router.allow_migrate('replica_1', 'tasks') is False
+    assert router.allow_migrate('default', 'tasks') is True
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ['/api/tasks/', '/api/tasks/{pk}/'])
+def test_task_reads_use_replica(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    replica_reads_log: List[str],
+    url: str,
+) -> None:
+    response = auth_client.get(url.format(pk=tasks_list[0].pk))
+    assert response.status_code == status.HTTP_200_OK
+    assert replica_reads_log
+
+
+@pytest.mark.django_db
+def test_staff_list_uses_replica(
+    superuser_client: APIClient,
+    tasks_list: List[Task],
+    replica_reads_log: List[str],
+) -> None:
+    response = superuser_client.get('/api/tasks/all/')
+    assert response.status_code == status.HTTP_200_OK
+    assert replica_reads_log
+
+
+@pytest.mark.django_db
+def test_admin_changelist_uses_replica(
+    superuser: UserType,
+    tasks_list: List[Task],
+    replica_reads_log: List[str],
+) -> None:
+    client = Client()
+    client.force_login(superuser)
+    response = client.get('/admin/tasks/task/')
+    assert response.status_code == status.HTTP_200_OK
+    assert replica_reads_log
+    assert tasks_list[0].title in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_reads_after_write_use_primary(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    replica_reads_log: List[str],
+) -> None:
+    response = auth_client.patch(
+        f'/api/tasks/{tasks_list[0].pk}/', data={'title': 'changed'},
+        format='json',
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert replica_reads_log == []
+    response = auth_client.get('/api/tasks/')
+    assert response.data['results'][0]['title'] == 'changed'
+    assert replica_reads_log == []
+
+
+@pytest.mark.django_db
+def test_reads_after_async_write_use_primary(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    replica_reads_log: List[str],
+) -> None:
+    auth_client.post(f'/api/tasks/async/{tasks_list[0].pk}/mark_completed/')
+    auth_client.get(f'/api/tasks/{tasks_list[0].pk}/')
+    assert replica_reads_log == []
+
+
+@pytest.mark.django_db
+def test_admin_write_pins_staff_and_owner(
+    superuser: UserType,
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    replica_reads_log: List[str],
+) -> None:
+    task = tasks_list[0]
+    client = Client()
+    client.force_login(superuser)
+    client.post(f'/admin/tasks/task/{task.pk}/delete/', data={'post': 'yes'})
+    client.get('/admin/tasks/task/')
+    auth_client.get('/api/tasks/')
+    assert replica_reads_log == []
@@ -0,0 +1,126 @@
+from typing import Any, Dict, List
+
+import pytest
+from rest_framework.test import APIClient
+from tasks.models import Task
+from users.models import User as UserType
+
+TASKS = [
+    ('Weekly report', 'Send it to the team'),
+    ('Draft of the weekly report', ''),
+    ('Project plan', 'Milestones of the next quarter'),
+    ('Call the bank', 'About the report of the last month'),
+    ('Groceries', 'Milk, bread and eggs'),
+]
+
+
+@pytest.fixture
+def search_tasks(user: UserType, superuser: UserType) -> Dict[str, Task]:
+    tasks = {
+        title: Task.objects.create(
+            user=user, title=title, description=description,
+        )
+        for title, description in TASKS
+    }
+    Task.objects.create(user=superuser, title='Admin report')
+    return tasks
+
+
+def titles(response: Any) -> List[str]:
+    assert response.status_code == 200, response.data
+    return [task['title'] for task in response.data['results']]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(('search', 'expected'), [
+    ('groceries', ['Groceries']),
+    ('reports', [
+        'Draft of the weekly report', 'Weekly report', 'Call the bank',
+    ]),
+    ('"weekly report"', ['Draft of the weekly report', 'Weekly report']),
+    # ts_rank() gives the same rank to all matches of a negation
+    ('report -draft', ['Call the bank', 'Weekly report']),
+    ('bread or milestones', ['Groceries', 'Project plan']),
+    ('proj', ['Project plan']),
+    ('mil', ['Groceries', 'Project plan']),
+    ('unknown', []),
+])
+def test_search(
+    auth_client: APIClient,
+    search_tasks: Dict[str, Task],
+    search: str,
+    expected: List[str],
+) -> None:
+    response = auth_client.get('/api/tasks/', {'search': search})
+
+    assert titles(response) == expected
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('search', ['&|!:*', '(report', "o'clock:*", '-'])
+def test_search_with_operators(
+    auth_client: APIClient, search_tasks: Dict[str, Task], search: str,
+) -> None:
+    response = auth_client.get('/api/tasks/', {'search': search})
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_search_with_filters(
+    auth_client: APIClient, search_tasks: Dict[str, Task],
+) -> None:
+    task = search_tasks['Call the bank']
+    task.status = 'completed'
+    task.save()
+
+    response = auth_client.get(
+        '/api/tasks/', {'search': 'report', 'status': 'completed'},
+    )
+
+    assert titles(response) == ['Call the bank']
+
+
+@pytest.mark.django_db
+def test_search_follows_updates(
+    auth_client: APIClient, search_tasks: Dict[str, Task],
+) -> None:
+    task = search_tasks['Groceries']
+
+    response = auth_client.patch(
+        f'/api/tasks/{task.pk}/', {'title': 'Pharmacy'}, format='json',
+    )
+    assert response.status_code == 200
+
+    assert titles(auth_client.get('/api/tasks/', {'search': 'pharmacy'})) \
+        == ['Pharmacy']
+    assert titles(auth_client.get('/api/tasks/', {'search': 'groceries'})) \
+        == []
+
+
+@pytest.mark.django_db
+def test_search_with_cursor_pagination(
+    auth_client: APIClient, search_tasks: Dict[str, Task],
+) -> None:
+    response = auth_client.get(
+        '/api/tasks/', {'search': 'report', 'pagination': 'cursor'},
+    )
+
+    # the cursor pages keep the `-pk` order
+    assert titles(response) == [
+        'Call the bank', 'Draft of the weekly report', 'Weekly report',
+    ]
+
+
+@pytest.mark.django_db
+def test_search_all_tasks(
+    superuser_client: APIClient, search_tasks: Dict[str, Task],
+) -> None:
+    response = superuser_client.get('/api/tasks/all/', {'search': 'report'})
+
+    assert titles(response) == [
+        'Admin report',
+        'Draft of the weekly report',
+        'Weekly report',
+        'Call the bank',
+    ]
@@ -0,0 +1,190 @@
+from io import StringIO
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from rest_framework.test import APIClient
+from tasks.importer import TaskImporter
+from tasks.models import Task, TaskStatusCounter
+from users.models import User as UserType
+
+User = get_user_model()
+
+
+def counted() -> Dict[Tuple[int, str], int]:
+    """Return the counters, leaving out the zeroes."""
+    return {
+        (user_id, status): count
+        for user_id, status, count in TaskStatusCounter.objects.values_list(
+            'user_id', 'status', 'count',
+        )
+        if count
+    }
+
+
+def actual() -> Dict[Tuple[int, str], int]:
+    return {
+        (row['user_id'], row['status']): row['count']
+        for row in Task.objects.values('user_id', 'status')
+        .annotate(count=Count('pk')).order_by()
+    }
+
+
+def expected_stats(tasks: List[Task]) -> Dict[str, int]:
+    stats = {'new': 0, 'in_progress': 0, 'completed': 0}
+    for task in tasks:
+        stats[task.status] += 1
+    return {**stats, 'total': len(tasks)}
+
+
+@pytest.mark.django_db
+def test_stats(
+    auth_client: APIClient, tasks_list: List[Task], superuser: UserType,
+) -> None:
+    Task.objects.create(user=superuser, title='not counted')
+
+    response = auth_client.get('/api/tasks/stats/')
+
+    assert response.status_code == 200
+    assert response.data == expected_stats(tasks_list)
+
+
+@pytest.mark.django_db
+def test_stats_without_tasks(auth_client: APIClient) -> None:
+    response = auth_client.get('/api/tasks/stats/')
+
+    assert response.status_code == 200
+    assert response.data == {
+        'new': 0, 'in_progress': 0, 'completed': 0, 'total': 0,
+    }
+
+
+@pytest.mark.django_db
+def test_stats_of_all_users(
+    superuser_client: APIClient, tasks_list: List[Task], superuser: UserType,
+) -> None:
+    task = Task.objects.create(user=superuser, title='counted')
+
+    response = superuser_client.get('/api/tasks/all/stats/')
+
+    assert response.status_code == 200
+    assert response.data == expected_stats([*tasks_list, task])
+
+
+@pytest.mark.django_db
+def test_stats_of_all_users_is_staff_only(auth_client: APIClient) -> None:
+    response = auth_client.get('/api/tasks/all/stats/')
+
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_counters_follow_api_writes(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    pks = [task.pk for task in tasks_list]
+    requests: List[Tuple[str, str, Any]] = [
+        ('post', '/api/tasks/', {'title': 'created'}),
+        ('patch', f'/api/tasks/{pks[0]}/', {'status': 'in_progress'}),
+        ('put', f'/api/tasks/{pks[1]}/', {'title': 'put', 'status': 'new'}),
+        ('delete', f'/api/tasks/{pks[2]}/', None),
+        ('post', f'/api/tasks/{pks[3]}/mark_completed/', None),
+        ('post', '/api/tasks/mark_completed/', {'status': 'new'}),
+        ('post', '/api/tasks/bulk/', [{'title': 'a'}, {'title': 'b'}]),
+        ('patch', '/api/tasks/bulk/', [
+            {'pk': pks[4], 'status': 'new'},
+            {'pk': pks[5], 'status': 'in_progress'},
+        ]),
+        ('delete', '/api/tasks/bulk/', {'ids': pks[6:9]}),
+        ('post', '/api/tasks/async/', {'title': 'async'}),
+        ('patch', f'/api/tasks/async/{pks[9]}/', {'status': 'new'}),
+        ('post', f'/api/tasks/async/{pks[10]}/mark_completed/', None),
+    ]
+    for method, url, data in requests:
+        response = getattr(auth_client, method)(url, data, format='json')
+        assert response.status_code < 400, (url, response.content)
+        assert counted() == actual(), (method, url)
+
+
+@pytest.mark.django_db
+def test_counters_follow_admin_writes(
+    tasks_list: List[Task], superuser: UserType, user: UserType,
+) -> None:
+    client = Client()
+    client.force_login(superuser)
+    task = tasks_list[0]
+
+    response = client.post(f'/admin/tasks/task/{task.pk}/change/', {
+        'user': superuser.pk, 'title': task.title, 'status': 'in_progress',
+    })
+    assert response.status_code == 302
+    assert counted() == actual()
+
+    response = client.post('/admin/tasks/task/', {
+        'action': 'delete_selected', 'post': 'yes',
+        '_selected_action': [task.pk for task in tasks_list[1:5]],
+    })
+    assert response.status_code == 302
+    assert counted() == actual()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('method', TaskImporter.methods)
+def test_counters_follow_imports(
+    user: UserType, tmp_path: Path, method: str, shared_cache: None,
+) -> None:
+    path = tmp_path / 'tasks.csv'
+    path.write_text(
+        'title,status\nfirst,new\nsecond,completed\nthird,completed\n',
+    )
+
+    call_command(
+        'import_tasks', str(path), '--user', user.username,
+        '--method', method, stdout=StringIO(),
+    )
+
+    assert counted() == {(user.pk, 'new'): 1, (user.pk, 'completed'): 2}
+
+
+@pytest.mark.django_db
+def test_counters_of_deleted_user(
+    tasks_list: List[Task], user: UserType,
+) -> None:
+    user.delete()
+    connection.check_constraints()  # deferred to the commit otherwise
+
+    assert not TaskStatusCounter.objects.filter(user_id=user.pk).exists()
+
+
+@pytest.mark.django_db
+def test_rebuild_task_counters(
+    tasks_list: List[Task], superuser: UserType, user: UserType,
+) -> None:
+    Task.objects.create(user=superuser, title='admin task')
+    wrong = TaskStatusCounter.objects.filter(user=user).update(count=100)
+    TaskStatusCounter.objects.filter(user=superuser).delete()
+    stdout = StringIO()
+
+    call_command('rebuild_task_counters', stdout=stdout)
+
+    assert stdout.getvalue().startswith(f'Fixed {wrong + 1} wrong counters')
+    assert counted() == actual()
+
+
+@pytest.mark.django_db
+def test_rebuild_task_counters_of_a_user(
+    tasks_list: List[Task], superuser: UserType, user: UserType,
+) -> None:
+    Task.objects.create(user=superuser, title='admin task')
+    TaskStatusCounter.objects.update(count=100)
+
+    call_command(
+        'rebuild_task_counters', '--user', user.username, stdout=StringIO(),
+    )
+
+    assert counted() == {**actual(), (superuser.pk, 'new'): 100}
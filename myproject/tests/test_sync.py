@@ -0,0 +1,205 @@
+import threading
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from io import StringIO
+from typing import Any, Dict, List, Optional
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from tasks.models import Task, TaskTombstone
+from tasks.serializers import TaskSerializer
+from users.models import User as UserType
+
+# The changes are served once their transaction is over: the tests commit
+# them instead of writing in the transaction of the test.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def sync(
+    client: APIClient, since: Optional[str] = None, **params: Any,
+) -> Dict[str, Any]:
+    if since is not None:
+        params['since'] = since
+    response = client.get('/api/tasks/changes/', query_params=params)
+    assert response.status_code == status.HTTP_200_OK
+    data: Dict[str, Any] = response.data
+    return data
+
+
+def test_initial_sync_returns_all_tasks(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    data = sync(auth_client)
+    ordered = sorted(tasks_list, key=lambda task: task.pk)
+    assert data['changed'] == TaskSerializer(ordered, many=True).data
+    assert data['deleted'] == []
+    assert data['has_more'] is False
+    assert sync(auth_client, data['since']) == {
+        'changed': [],
+        'deleted': [],
+        'since': data['since'],
+        'has_more': False,
+    }
+
+
+def test_sync_returns_only_changes(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    since = sync(auth_client)['since']
+    updated, deleted = tasks_list[3], tasks_list[5]
+    auth_client.patch(
+        f'/api/tasks/{updated.pk}/', data={'title': 'changed'}, format='json',
+    )
+    auth_client.delete(f'/api/tasks/{deleted.pk}/')
+    auth_client.post('/api/tasks/', data={'title': 'created'}, format='json')
+    data = sync(auth_client, since)
+    assert [task['title'] for task in data['changed']] == ['changed', 'created']
+    assert data['deleted'] == [deleted.pk]
+    assert sync(auth_client, data['since'])['changed'] == []
+
+
+def test_sync_records_batch_and_admin_deletes(
+    auth_client: APIClient, tasks_list: List[Task], superuser: UserType,
+) -> None:
+    since = sync(auth_client)['since']
+    auth_client.delete(
+        '/api/tasks/bulk/',
+        data={'ids': [tasks_list[0].pk, tasks_list[1].pk]},
+        format='json',
+    )
+    admin_client = Client()
+    admin_client.force_login(superuser)
+    admin_client.post('/admin/tasks/task/', data={
+        'action': 'delete_selected',
+        '_selected_action': [tasks_list[2].pk],
+        'post': 'yes',
+    })
+    admin_client.post(f'/admin/tasks/task/{tasks_list[3].pk}/delete/',
+                      data={'post': 'yes'})
+    data = sync(auth_client, since)
+    assert sorted(data['deleted']) == sorted(
+        task.pk for task in tasks_list[:4]
+    )
+
+
+def test_sync_in_batches(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    for task in tasks_list[:4]:
+        auth_client.delete(f'/api/tasks/{task.pk}/')
+    changed: List[int] = []
+    deleted: List[int] = []
+    data = sync(auth_client, limit=4)
+    while True:
+        assert len(data['changed']) + len(data['deleted']) <= 4
+        changed.extend(task['pk'] for task in data['changed'])
+        deleted.extend(data['deleted'])
+        if not data['has_more']:
+            break
+        data = sync(auth_client, data['since'], limit=4)
+    assert sorted(changed) == sorted(task.pk for task in tasks_list[4:])
+    assert sorted(deleted) == sorted(task.pk for task in tasks_list[:4])
+
+
+def test_sync_with_sparse_fields(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    data = sync(auth_client, fields='pk,status')
+    assert data['changed'][0] == {
+        'pk': tasks_list[-1].pk, 'status': tasks_list[-1].status,
+    }
+
+
+def test_sync_waits_for_running_transactions(
+    auth_client: APIClient, tasks_list: List[Task], user: UserType,
+) -> None:
+    """A late commit never lands behind a token already handed out."""
+    since = sync(auth_client)['since']
+    written, release = threading.Event(), threading.Event()
+
+    def write() -> None:
+        with transaction.atomic():
+            Task.objects.create(user=user, title='running')
+            written.set()
+            release.wait(5)
+        connection.close()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    try:
+        assert written.wait(5)
+        # another status, the running one locks the counter of `new`
+        Task.objects.create(user=user, title='committed', status='completed')
+        data = sync(auth_client, since)
+    finally:
+        release.set()
+        thread.join()
+    assert data['changed'] == []
+    data = sync(auth_client, data['since'])
+    assert [task['title'] for task in data['changed']] == [
+        'running', 'committed',
+    ]
+
+
+def test_sync_records_reassigned_tasks(
+    auth_client: APIClient, tasks_list: List[Task], superuser: UserType,
+) -> None:
+    since = sync(auth_client)['since']
+    task = tasks_list[0]
+    admin_client = Client()
+    admin_client.force_login(superuser)
+    response = admin_client.post(f'/admin/tasks/task/{task.pk}/change/', {
+        'user': superuser.pk, 'title': task.title, 'status': task.status,
+    })
+    assert response.status_code == status.HTTP_302_FOUND
+    data = sync(auth_client, since)
+    assert data['changed'] == []
+    assert data['deleted'] == [task.pk]
+
+
+def test_prune_tombstones(
+    auth_client: APIClient, tasks_list: List[Task], settings: Any,
+) -> None:
+    for task in tasks_list[:3]:
+        auth_client.delete(f'/api/tasks/{task.pk}/')
+    TaskTombstone.objects.filter(task_id=tasks_list[0].pk).update(
+        deleted_at=timezone.now() - timedelta(
+            days=settings.TASKS_TOMBSTONE_RETENTION, seconds=1,
+        ),
+    )
+    out = StringIO()
+    call_command('prune_tombstones', stdout=out)
+    assert 'Deleted 1 tombstones' in out.getvalue()
+    assert sorted(
+        TaskTombstone.objects.values_list('task_id', flat=True),
+    ) == sorted(task.pk for task in tasks_list[1:3])
+
+
+@pytest.mark.parametrize(
+    ('params', 'errors'),
+    [
+        ({'since': 'garbage'}, {'since': ['Invalid change token.']}),
+        (
+            {'since': urlsafe_b64encode(b'1|1|0').decode()},
+            {'since': ['Expired change token, sync again without `since`.']},
+        ),
+        (
+            {'limit': 501},
+            {'limit': ['Ensure this value is less than or equal to 500.']},
+        ),
+    ],
+)
+def test_sync_invalid_params(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    params: Dict[str, Any],
+    errors: Dict[str, List[str]],
+) -> None:
+    response = auth_client.get('/api/tasks/changes/', query_params=params)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data == errors
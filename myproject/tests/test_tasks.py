@@ -1,8 +1,18 @@
 import random
-from typing import Any, List
+import threading
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
 
 import pytest
+from _pytest.fixtures import SubRequest
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from mysite.gunicorn import post_worker_init
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from rest_framework.utils.serializer_helpers import ReturnDict
 from tasks.models import Task
@@ -223,3 +233,599 @@ def test_all_tasks_list_from_user_client_failed(
     assert 'detail' in response.data
     assert response.data['detail'] == ('You do not have permission to perform '
                                        'this action.')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('client_name', 'url'),
+    [('auth_client', '/api/tasks/'), ('superuser_client', '/api/tasks/all/')],
+)
+def test_tasks_list_with_cursor_pagination_successful(
+    request: SubRequest,
+    tasks_serialized: List[ReturnDict[str, Any]],
+    page_size: int,
+    client_name: str,
+    url: str,
+) -> None:
+    """Walking the cursor links returns every task exactly once."""
+    client = request.getfixturevalue(client_name)
+    response = client.get(url, query_params={'pagination': 'cursor'})
+    results = []
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        assert list(response.data.keys()) == ['next', 'previous', 'results']
+        assert len(response.data['results']) <= page_size
+        results.extend(response.data['results'])
+        if response.data['next'] is None:
+            break
+        response = client.get(response.data['next'])
+    assert results == tasks_serialized
+
+
+@pytest.mark.django_db
+def test_tasks_list_with_cursor_pagination_stable_under_inserts(
+    auth_client: APIClient,
+    tasks_serialized: List[ReturnDict[str, Any]],
+    user: UserType,
+    page_size: int,
+) -> None:
+    """Tasks created between requests do not shift the next page."""
+    response = auth_client.get(
+        '/api/tasks/', query_params={'pagination': 'cursor'},
+    )
+    Task.objects.create(user=user, title='new task')
+    response = auth_client.get(response.data['next'])
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'] == tasks_serialized[page_size:]
+
+
+@pytest.mark.django_db
+def test_tasks_list_with_cursor_pagination_and_count(
+    auth_client: APIClient,
+    tasks_serialized: List[ReturnDict[str, Any]],
+    page_size: int,
+) -> None:
+    response = auth_client.get(
+        '/api/tasks/',
+        query_params={'pagination': 'cursor', 'with_count': 'true'},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert list(response.data.keys()) == [
+        'count', 'next', 'previous', 'results',
+    ]
+    assert response.data['count'] == len(tasks_serialized)
+    assert response.data['results'] == tasks_serialized[:page_size]
+
+
+@pytest.mark.django_db
+def test_tasks_bulk_create_successful(
+    auth_client: APIClient, user: UserType,
+) -> None:
+    response_data = [
+        {'title': 'first', 'description': 'one'},
+        {'title': 'second', 'status': 'in_progress'},
+    ]
+    response = auth_client.post(
+        '/api/tasks/bulk/', data=response_data, format='json',
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    created_tasks = Task.objects.filter(user=user).order_by('pk')
+    assert response.data == TaskSerializer(created_tasks, many=True).data
+    assert [t.title for t in created_tasks] == ['first', 'second']
+    assert [t.status for t in created_tasks] == ['new', 'in_progress']
+
+
+@pytest.mark.django_db
+def test_tasks_bulk_create_failed_with_invalid_item(
+    auth_client: APIClient, user: UserType,
+) -> None:
+    """Nothing is created when one of the items is invalid."""
+    response_data = [{'title': 'valid'}, {'title': 'x', 'status': 'wrong'}]
+    response = auth_client.post(
+        '/api/tasks/bulk/', data=response_data, format='json',
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data[0] == {}
+    assert 'status' in response.data[1]
+    assert not Task.objects.filter(user=user).exists()
+
+
+@pytest.mark.django_db
+def test_tasks_bulk_create_failed_over_max_size(
+    auth_client: APIClient, settings: Any,
+) -> None:
+    settings.TASKS_BULK_MAX_SIZE = 2
+    response = auth_client.post(
+        '/api/tasks/bulk/', data=[{'title': 'task'}] * 3, format='json',
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data['non_field_errors'] == [
+        'Ensure this field has no more than 2 elements.',
+    ]
+
+
+@pytest.mark.django_db
+def test_tasks_bulk_update_successful(
+    auth_client: APIClient, tasks_serialized: List[ReturnDict[str, Any]],
+) -> None:
+    tasks_to_change = random.sample(tasks_serialized, k=3)
+    response_data = [
+        {'pk': task['pk'], 'title': f'title {num}', 'status': 'completed'}
+        for num, task in enumerate(tasks_to_change)
+    ]
+    response = auth_client.patch(
+        '/api/tasks/bulk/', data=response_data, format='json',
+    )
+    assert response.status_code == status.HTTP_200_OK
+    for task, changes, data in zip(
+            tasks_to_change, response_data, response.data,
+    ):
+        task.update(changes)
+        expected_task = Task.objects.get(pk=task['pk'])
+        assert task == TaskSerializer(expected_task).data == data
+
+
+@pytest.mark.django_db
+def test_tasks_bulk_update_failed_with_foreign_task(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    superuser: UserType,
+) -> None:
+    """Tasks of other users cannot be changed in a batch."""
+    foreign_task = Task.objects.create(user=superuser, title='foreign')
+    response_data = [
+        {'pk': tasks_list[0].pk, 'title': 'mine'},
+        {'pk': foreign_task.pk, 'title': 'not mine'},
+    ]
+    response = auth_client.patch(
+        '/api/tasks/bulk/', data=response_data, format='json',
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data == [
+        {}, {'pk': ['No Task matches the given query.']},
+    ]
+    assert Task.objects.get(pk=tasks_list[0].pk).title == tasks_list[0].title
+    assert Task.objects.get(pk=foreign_task.pk).title == 'foreign'
+
+
+@pytest.mark.django_db
+def test_tasks_bulk_delete_successful(
+    auth_client: APIClient, tasks_list: List[Task], superuser: UserType,
+) -> None:
+    foreign_task = Task.objects.create(user=superuser, title='foreign')
+    ids = [tasks_list[0].pk, foreign_task.pk, tasks_list[1].pk]
+    response = auth_client.delete(
+        '/api/tasks/bulk/', data={'ids': ids}, format='json',
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert sorted(response.data['deleted']) == sorted(
+        [tasks_list[0].pk, tasks_list[1].pk],
+    )
+    assert response.data['not_found'] == [foreign_task.pk]
+    assert not Task.objects.filter(pk__in=response.data['deleted']).exists()
+    assert Task.objects.filter(pk=foreign_task.pk).exists()
+
+
+@pytest.mark.django_db
+def test_tasks_bulk_mark_completed_by_ids_successful(
+    auth_client: APIClient, tasks_list: List[Task], superuser: UserType,
+) -> None:
+    foreign_task = Task.objects.create(user=superuser, title='foreign')
+    tasks_to_complete = random.sample(tasks_list, k=5)
+    ids = [task.pk for task in tasks_to_complete]
+    response = auth_client.post(
+        '/api/tasks/mark_completed/',
+        data={'ids': [*ids, foreign_task.pk]},
+        format='json',
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['updated'] == len(
+        [task for task in tasks_to_complete if task.status != 'completed']
+    )
+    assert set(
+        Task.objects.filter(pk__in=ids).values_list('status', flat=True)
+    ) == {'completed'}
+    assert Task.objects.get(pk=foreign_task.pk).status == 'new'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('task_status', ['new', 'in_progress'])
+def test_tasks_bulk_mark_completed_by_status_successful(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    task_status: str,
+    run_jobs: Callable[[], int],
+) -> None:
+    response = auth_client.post(
+        '/api/tasks/mark_completed/', data={'status': task_status},
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.data['status'] == 'queued'
+    assert run_jobs() == 1
+    job = auth_client.get(response['Location']).data
+    assert job['status'] == 'succeeded'
+    assert job['result'] == {'updated': len(
+        [task for task in tasks_list if task.status == task_status]
+    )}
+    assert not Task.objects.filter(status=task_status).exists()
+
+
+@pytest.mark.django_db
+def test_tasks_bulk_mark_completed_failed_without_filter(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    response = auth_client.post('/api/tasks/mark_completed/', data={})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data['non_field_errors'] == [
+        'Either `ids` or `status` is required.',
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('query_params', 'expected_fields'),
+    [
+        ({'fields': 'pk,title'}, ['pk', 'title']),
+        ({'fields': 'status,user'}, ['status', 'user']),
+        ({'fields': 'pk', 'expand': 'user'}, ['pk', 'user']),
+        ({'expand': 'user'}, ['pk', 'title', 'description', 'status', 'user']),
+    ],
+)
+def test_tasks_list_with_sparse_fields_successful(
+    auth_client: APIClient,
+    tasks_serialized: List[ReturnDict[str, Any]],
+    page_size: int,
+    query_params: Dict[str, str],
+    expected_fields: List[str],
+) -> None:
+    response = auth_client.get('/api/tasks/', query_params=query_params)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'] == [
+        {name: task[name] for name in expected_fields}
+        for task in tasks_serialized[:page_size]
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fields', ['title', 'status,user'])
+def test_tasks_list_with_cursor_pagination_and_sparse_fields(
+    auth_client: APIClient,
+    tasks_serialized: List[ReturnDict[str, Any]],
+    fields: str,
+) -> None:
+    """The cursor position is read from `pk` even when not requested."""
+    names = fields.split(',')
+    response = auth_client.get(
+        '/api/tasks/', query_params={'pagination': 'cursor', 'fields': fields},
+    )
+    results = []
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        results.extend(response.data['results'])
+        if response.data['next'] is None:
+            break
+        response = auth_client.get(response.data['next'])
+    assert results == [
+        {name: task[name] for name in names} for task in tasks_serialized
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'query_params',
+    [{}, {'pagination': 'cursor', 'with_count': 'true'}],
+)
+def test_tasks_list_counts_without_user_join(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    query_params: Dict[str, str],
+) -> None:
+    with CaptureQueriesContext(connection) as context:
+        response = auth_client.get('/api/tasks/', query_params=query_params)
+    assert response.data['count'] == len(tasks_list)
+    counts = [query['sql'] for query in context.captured_queries
+              if 'COUNT(' in query['sql']]
+    assert len(counts) == 1
+    assert 'users_user' not in counts[0]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'query_params',
+    [{}, {'fields': 'title,pk'}, {'fields': 'user'}, {'pagination': 'cursor'}],
+)
+def test_tasks_list_renders_like_task_serializer(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    page_size: int,
+    query_params: Dict[str, str],
+) -> None:
+    """The values() rows render to the same JSON as TaskSerializer."""
+    fields = query_params.get('fields')
+    expected = TaskSerializer(
+        tasks_list[:page_size], many=True,
+        fields=fields.split(',') if fields else None,
+    ).data
+    response = auth_client.get('/api/tasks/', query_params=query_params)
+    assert response.status_code == status.HTTP_200_OK
+    assert JSONRenderer().render(response.data['results']) \
+        == JSONRenderer().render(expected)
+
+
+@pytest.mark.django_db
+def test_task_detail_with_sparse_fields_skips_user_join(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    task = tasks_list[0]
+    with CaptureQueriesContext(connection) as context:
+        response = auth_client.get(
+            f'/api/tasks/{task.pk}/', query_params={'fields': 'pk,status'},
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {'pk': task.pk, 'status': task.status}
+    task_queries = [q['sql'] for q in context.captured_queries
+                    if '"tasks_task"' in q['sql']]
+    assert len(task_queries) == 1
+    assert '"users_user"' not in task_queries[0]
+    assert '"description"' not in task_queries[0]
+
+
+@pytest.mark.django_db
+def test_tasks_list_with_unknown_sparse_fields_failed(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    response = auth_client.get(
+        '/api/tasks/', query_params={'fields': 'pk,secret', 'expand': 'owner'},
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data == {
+        'fields': ['Unknown field(s): secret.'],
+        'expand': ['Unknown relation(s): owner.'],
+    }
+
+
+@pytest.mark.django_db
+def test_tasks_list_served_from_cache(
+    auth_client: APIClient, tasks_serialized: List[ReturnDict[str, Any]],
+) -> None:
+    first_response = auth_client.get('/api/tasks/', query_params={'page': 2})
+    assert first_response['X-Cache'] == 'MISS'
+    with CaptureQueriesContext(connection) as context:
+        response = auth_client.get('/api/tasks/', query_params={'page': 2})
+    assert response['X-Cache'] == 'HIT'
+    assert response.data == first_response.data
+    assert not [q for q in context.captured_queries
+                if '"tasks_task"' in q['sql']]
+    response = auth_client.get('/api/tasks/', query_params={'page': 1})
+    assert response['X-Cache'] == 'MISS'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('method', 'url', 'data'),
+    [
+        ('post', '/api/tasks/', lambda pk: {'title': 'new task'}),
+        ('patch', '/api/tasks/{pk}/', lambda pk: {'title': 'changed'}),
+        (
+            'put',
+            '/api/tasks/{pk}/',
+            lambda pk: {'title': 'changed', 'status': 'new'},
+        ),
+        ('delete', '/api/tasks/{pk}/', lambda pk: None),
+        ('post', '/api/tasks/{pk}/mark_completed/', lambda pk: None),
+        ('post', '/api/tasks/mark_completed/', lambda pk: {'ids': [pk]}),
+        ('post', '/api/tasks/bulk/', lambda pk: [{'title': 'new task'}]),
+        (
+            'patch',
+            '/api/tasks/bulk/',
+            lambda pk: [{'pk': pk, 'title': 'changed'}],
+        ),
+        ('delete', '/api/tasks/bulk/', lambda pk: {'ids': [pk]}),
+    ],
+)
+def test_tasks_list_cache_invalidated_on_write(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    method: str,
+    url: str,
+    data: Callable[[int], Any],
+) -> None:
+    task = Task.objects.create(user=tasks_list[0].user, title='to change')
+    auth_client.get('/api/tasks/')
+    response = getattr(auth_client, method)(
+        url.format(pk=task.pk), data=data(task.pk), format='json',
+    )
+    assert response.status_code < 400
+    response = auth_client.get('/api/tasks/')
+    assert response['X-Cache'] == 'MISS'
+    expected_tasks = Task.objects.filter(user=task.user).order_by('-pk')
+    assert response.data['results'] == TaskSerializer(
+        expected_tasks[:len(response.data['results'])], many=True,
+    ).data
+
+
+@pytest.mark.django_db
+def test_tasks_list_cache_invalidated_on_admin_change(
+    auth_client: APIClient, tasks_list: List[Task], superuser: UserType,
+) -> None:
+    task = tasks_list[0]
+    auth_client.get('/api/tasks/')
+    admin_client = Client()
+    admin_client.force_login(superuser)
+    admin_response = admin_client.post(
+        f'/admin/tasks/task/{task.pk}/change/',
+        data={
+            'user': task.user_id,
+            'title': 'changed in admin',
+            'description': task.description,
+            'status': task.status,
+        },
+    )
+    assert admin_response.status_code == status.HTTP_302_FOUND
+    response = auth_client.get('/api/tasks/')
+    assert response['X-Cache'] == 'MISS'
+    assert response.data['results'][0]['title'] == 'changed in admin'
+
+
+@pytest.mark.parametrize(
+    ('backend', 'workers', 'shared'),
+    [
+        ('django.core.cache.backends.locmem.LocMemCache', 1, True),
+        ('django.core.cache.backends.locmem.LocMemCache', 2, False),
+        ('django.core.cache.backends.redis.RedisCache', 2, True),
+    ],
+)
+def test_gunicorn_workers_need_a_shared_cache(
+    settings: Any, backend: str, workers: int, shared: bool,
+) -> None:
+    """The cache versions must be seen by all workers to invalidate."""
+    settings.CACHES = {
+        'default': {'BACKEND': backend, 'LOCATION': 'redis://localhost:6379'},
+    }
+    worker = SimpleNamespace(cfg=SimpleNamespace(workers=workers))
+    if shared:
+        post_worker_init(worker)
+    else:
+        with pytest.raises(ImproperlyConfigured, match='2 gunicorn workers'):
+            post_worker_init(worker)
+
+
+@pytest.mark.django_db
+def test_task_detail_not_modified(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    url = f'/api/tasks/{tasks_list[0].pk}/'
+    first_response = auth_client.get(url)
+    etag = first_response['ETag']
+    response = auth_client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response['ETag'] == etag
+    assert not response.content
+    response = auth_client.get(
+        url, query_params={'fields': 'pk'}, headers={'If-None-Match': etag},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_tasks_list_not_modified(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    first_response = auth_client.get('/api/tasks/')
+    etag = first_response['ETag']
+    with CaptureQueriesContext(connection) as context:
+        response = auth_client.get(
+            '/api/tasks/', headers={'If-None-Match': etag},
+        )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response['X-Cache'] == 'HIT'
+    assert not [q for q in context.captured_queries
+                if '"tasks_task"' in q['sql']]
+    cache.clear()  # the version of the user's pages starts again
+    response = auth_client.get('/api/tasks/', headers={'If-None-Match': etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response['X-Cache'] == 'MISS'
+
+
+@pytest.mark.django_db
+def test_tasks_list_etag_without_aggregate(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    """The ETag of an uncached page costs no query over all the tasks."""
+    with CaptureQueriesContext(connection) as context:
+        response = auth_client.get(
+            '/api/tasks/', query_params={'pagination': 'cursor'},
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert response['X-Cache'] == 'MISS' and response['ETag']
+    task_queries = [q['sql'] for q in context.captured_queries
+                    if '"tasks_task"' in q['sql']]
+    assert len(task_queries) == 1
+    assert 'LIMIT' in task_queries[0]
+
+
+@pytest.mark.django_db
+def test_tasks_list_etag_changes_on_write(
+    auth_client: APIClient, tasks_list: List[Task],
+) -> None:
+    etag = auth_client.get('/api/tasks/')['ETag']
+    auth_client.patch(
+        f'/api/tasks/{tasks_list[-1].pk}/', data={'title': 'changed'},
+        format='json',
+    )
+    response = auth_client.get('/api/tasks/', headers={'If-None-Match': etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('method', ['patch', 'delete'])
+def test_task_write_if_match_with_concurrent_write(
+    auth_client: APIClient, tasks_list: List[Task], method: str,
+) -> None:
+    """The ETag is checked on the row once the other writer committed."""
+    task = tasks_list[0]
+    url = f'/api/tasks/{task.pk}/'
+    etag = auth_client.get(url)['ETag']
+    locked, release = threading.Event(), threading.Event()
+
+    def write() -> None:
+        with transaction.atomic():
+            row = Task.objects.select_for_update().get(pk=task.pk)
+            locked.set()
+            release.wait(5)
+            row.title = 'concurrent'
+            row.save()
+        connection.close()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    timer = threading.Timer(0.5, release.set)
+    try:
+        assert locked.wait(5)
+        timer.start()
+        response = getattr(auth_client, method)(
+            url, data={'title': 'mine'}, format='json',
+            headers={'If-Match': etag},
+        )
+    finally:
+        release.set()
+        thread.join()
+        timer.cancel()
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert Task.objects.get(pk=task.pk).title == 'concurrent'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('method', 'data', 'expected_status'),
+    [
+        ('patch', {'title': 'changed'}, status.HTTP_200_OK),
+        ('put', {'title': 'changed', 'status': 'new'}, status.HTTP_200_OK),
+        ('delete', None, status.HTTP_204_NO_CONTENT),
+    ],
+)
+def test_task_write_if_match(
+    auth_client: APIClient,
+    tasks_list: List[Task],
+    method: str,
+    data: Optional[Dict[str, Any]],
+    expected_status: int,
+) -> None:
+    url = f'/api/tasks/{tasks_list[0].pk}/'
+    etag = auth_client.get(url)['ETag']
+    auth_client.patch(url, data={'description': 'concurrent'}, format='json')
+    response = getattr(auth_client, method)(
+        url, data=data, format='json', headers={'If-Match': etag},
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    task = Task.objects.get(pk=tasks_list[0].pk)
+    assert task.title != 'changed'
+    etag = auth_client.get(url)['ETag']
+    response = getattr(auth_client, method)(
+        url, data=data, format='json', headers={'If-Match': etag},
+    )
+    assert response.status_code == expected_status
+    if response.status_code == status.HTTP_200_OK:
+        assert response['ETag'] == auth_client.get(url)['ETag']
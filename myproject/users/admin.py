@@ -1,6 +1,138 @@
-from django.contrib import admin
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
+
+from django.contrib import admin, messages
+from django.contrib.auth import get_permission_codename
 from django.contrib.auth.admin import UserAdmin
+from django.db import models
+from django.db.models import ForeignObjectRel
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.http import HttpRequest
+from django.urls import reverse
+from django.utils.text import capfirst
+from jobs.models import Job
+from mysite.paginator import EstimatedCountPaginator
 
 from .models import User
 
-admin.site.register(User, UserAdmin)
+if TYPE_CHECKING:
+    UserAdminClass = UserAdmin[User]
+else:
+    UserAdminClass = UserAdmin
+
+# (model, lookup of the users from it, whether its rows are protected)
+Related = Tuple[Type[models.Model], str, bool]
+
+
+def iter_related(
+    model: Type[models.Model], lookup: str,
+    path: Tuple[Type[models.Model], ...] = (),
+) -> Iterator[Related]:
+    """
+    Yield the models whose rows are deleted in cascade with the rows of
+    `model`, or protect them, with the lookup of those rows from them.
+    """
+    relations = get_candidate_relations_to_delete(model._meta)
+    for relation in cast(Iterable[ForeignObjectRel], relations):
+        on_delete = relation.on_delete
+        related = relation.related_model
+        protected = on_delete in (models.PROTECT, models.RESTRICT)
+        if on_delete is not models.CASCADE and not protected \
+                or related in path:
+            continue
+        related_lookup = f'{relation.field.name}__{lookup}'
+        yield related, related_lookup, protected
+        if not protected:
+            yield from iter_related(related, related_lookup, (*path, model))
+
+
+@admin.register(User)
+class UserModelAdmin(UserAdminClass):
+    """
+    User admin with estimated counts of the big user lists.
+
+    The deleted users are deactivated at once and deleted with their tasks
+    by a `users.delete` job, see `tasks.deletion.delete_user()`.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_deleted_objects(
+        self, objs: Union[Sequence[User], models.QuerySet[User]],
+        request: HttpRequest,
+    ) -> Tuple[List[str], Dict[str, int], Set[str], List[str]]:
+        """
+        Count the rows deleted in cascade with the users for the
+        confirmation page, instead of loading all of them to list them.
+        """
+        users = list(objs)
+        model_count = {str(User._meta.verbose_name_plural): len(users)}
+        perms_needed: Set[str] = set()
+        protected: List[str] = []
+        for model, lookup, is_protected in iter_related(User, 'in'):
+            rows = model._default_manager.filter(**{lookup: users})
+            if is_protected:
+                protected.extend(
+                    f'{capfirst(model._meta.verbose_name)}: {row}'
+                    for row in rows
+                )
+            else:
+                self.count_deleted(request, model, rows.count(),
+                                   model_count, perms_needed)
+        return [str(user) for user in users], model_count, perms_needed, \
+            protected
+
+    def count_deleted(
+        self, request: HttpRequest, model: Type[models.Model], count: int,
+        model_count: Dict[str, int], perms_needed: Set[str],
+    ) -> None:
+        """Add the deleted rows of the model, checking their permission."""
+
+        opts = model._meta
+        if not count or opts.auto_created:
+            return
+        name = str(opts.verbose_name_plural)
+        model_count[name] = model_count.get(name, 0) + count
+        codename = get_permission_codename('delete', opts)
+        if not request.user.has_perm(f'{opts.app_label}.{codename}'):
+            perms_needed.add(str(opts.verbose_name))
+
+    def delete_model(self, request: HttpRequest, obj: User) -> None:
+        self.enqueue_deletion(request, [obj.pk])
+
+    def delete_queryset(
+        self, request: HttpRequest, queryset: models.QuerySet[User],
+    ) -> None:
+        self.enqueue_deletion(request, queryset.values_list('pk', flat=True))
+
+    def enqueue_deletion(
+        self, request: HttpRequest, pks: Iterable[Any],
+    ) -> None:
+        """Deactivate the users and queue a job deleting each of them."""
+
+        pks = list(pks)
+        User.objects.filter(pk__in=pks).update(is_active=False)
+        jobs = [Job.enqueue('users.delete', request.user.pk, user=pk)
+                for pk in pks]
+        links = ', '.join(
+            reverse('jobs:job-detail', args=[job.pk]) for job in jobs
+        )
+        self.message_user(
+            request,
+            f'The users are deactivated and deleted in the background, '
+            f'follow the progress at {links}.',
+            messages.INFO,
+        )
@@ -0,0 +1,125 @@
+import os
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from threading import Lock
+from typing import Any, Callable, Optional, TypeVar
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BasePasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_T = TypeVar('_T')
+
+_pool: Optional[futures.ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+_pool_lock = Lock()
+_in_worker = False
+
+
+def _init_worker(nice: int) -> None:
+    global _in_worker
+
+    _in_worker = True
+    os.nice(nice)
+
+
+def get_pool() -> Optional[futures.ProcessPoolExecutor]:
+    """
+    Return the password hashing pool of the process, None when disabled.
+
+    The pool is started on first use in every process, e.g. in every
+    gunicorn worker, so it is never shared across a fork.
+    """
+    global _pool, _pool_pid
+
+    if settings.PASSWORD_HASHING_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = futures.ProcessPoolExecutor(
+                settings.PASSWORD_HASHING_WORKERS,
+                mp_context=get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(settings.PASSWORD_HASHING_NICE,),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+@receiver(setting_changed)
+def reset_pool(setting: str, **kwargs: Any) -> None:
+    if setting in ('PASSWORD_HASHING_WORKERS', 'PASSWORD_HASHING_NICE'):
+        shutdown_pool()
+
+
+def run_in_pool(func: Callable[..., _T], *args: Any) -> _T:
+    """Call `func` in the hashing pool, or here when it's disabled."""
+
+    pool = None if _in_worker else get_pool()
+    if pool is None:
+        return func(*args)
+    try:
+        return pool.submit(func, *args).result()
+    except BrokenProcessPool:
+        # a worker died, e.g. killed for its memory: start a new pool
+        shutdown_pool()
+        return func(*args)
+
+
+class PooledHasherMixin(BasePasswordHasher):
+    """
+    Hashes the passwords in the process pool of `get_pool()`.
+
+    The pool caps the number of passwords hashed at once by a server
+    process, in processes of a lower priority, so a burst of logins or
+    registrations queues up instead of taking the CPU of the other
+    requests.
+    """
+
+    def get_base(self) -> Any:
+        """Return the hasher class doing the work in the pool."""
+
+        return next(
+            cls for cls in type(self).__mro__
+            if not issubclass(cls, PooledHasherMixin)
+        )
+
+    def encode(self, password: str, salt: str, *args: Any) -> str:
+        encoded: str = run_in_pool(
+            self.get_base().encode, self, password, salt, *args,
+        )
+        return encoded
+
+    def verify(self, password: str, encoded: str) -> bool:
+        verified: bool = run_in_pool(
+            self.get_base().verify, self, password, encoded,
+        )
+        return verified
+
+
+class PooledPBKDF2PasswordHasher(PooledHasherMixin, PBKDF2PasswordHasher):
+    pass
+
+
+class PooledScryptPasswordHasher(PooledHasherMixin, ScryptPasswordHasher):
+    pass
+
+
+class PooledArgon2PasswordHasher(PooledHasherMixin, Argon2PasswordHasher):
+    pass
@@ -0,0 +1,17 @@
+from typing import Dict
+
+from jobs.models import Job
+from jobs.registry import register
+from tasks.deletion import delete_user
+
+
+@register('users.delete')
+def delete(job: Job) -> Dict[str, int]:
+    """Delete the `user` with their tasks, see `delete_user()`."""
+
+    resumed = job.done
+
+    def progress(done: int, total: int) -> None:
+        job.set_progress(resumed + done, resumed + total)
+
+    return {'deleted': resumed + delete_user(job.params['user'], progress)}
@@ -0,0 +1,11 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import (
+    SimpleJWTStatelessUserScheme,
+)
+
+
+class ClaimsScheme(  # type: ignore[no-untyped-call]
+    SimpleJWTStatelessUserScheme,
+):
+    """Documents `ClaimsAuthentication` as the JWT bearer scheme."""
+
+    target_class = 'users.authentication.ClaimsAuthentication'
@@ -2,7 +2,10 @@ from typing import Any, Dict
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from mysite.metrics import timed_serialization
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import Token
 
 from .models import User as UserType
 
@@ -20,6 +23,10 @@ class UserSerializer(serializers.ModelSerializer[UserType]):
         model = User
         fields = ['pk', 'username', 'first_name', 'last_name', 'password']
 
+    @timed_serialization
+    def to_representation(self, instance: UserType) -> Dict[str, Any]:
+        return super().to_representation(instance)
+
     def create(self, validated_data: Dict[str, Any]) -> UserType:
         """Create and return a new user with encrypted password."""
 
@@ -30,3 +37,15 @@ class UserSerializer(serializers.ModelSerializer[UserType]):
             password=validated_data['password'],
         )
         return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Issues tokens carrying the user claims read by ClaimsUser."""
+
+    @classmethod
+    def get_token(cls, user: UserType) -> Token:  # type: ignore[override]
+        token = super().get_token(user)
+        token['username'] = user.get_username()
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        return token